@@ -0,0 +1,303 @@
+"""
+Benchmarks for the Caloric Calculator hot paths.
+
+Measures cold import time, single-object construction, per-method costs
+and batch/stream throughput over the seeded synthetic population of
+``caloric_calculator.synthetic``, and prints the results as JSON. Save a run
+with ``--save`` and gate later runs on it with ``--compare``:
+
+    python benchmarks/bench_calculator.py --save baseline.json
+    python benchmarks/bench_calculator.py --compare baseline.json --tolerance 0.15
+
+The exit status is 1 when any benchmark is slower than the baseline by more
+than the tolerance.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+SOURCE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SOURCE_PATH)
+
+from caloric_calculator import (  # noqa: E402
+    CalculatorContext,
+    CaloricCalculator,
+    WeightGoal,
+    __version__,
+    compute,
+)
+from caloric_calculator.cache import CalculationCache  # noqa: E402
+from caloric_calculator.stream import INPUT_FIELDS, stream_calculate  # noqa: E402
+
+try:
+    import numpy as np
+
+    from caloric_calculator.batch import calculate_batch
+    from caloric_calculator.cohort import CohortAggregator
+    from caloric_calculator.fixed_point import calculate_fixed_point
+    from caloric_calculator.parallel import parallel_calculate
+    from caloric_calculator.synthetic import COLUMNS, generate_population
+except ImportError:
+    np = None
+
+DEFAULT_SCALES = (1, 1000, 100000, 1000000)
+STREAM_MAX_SCALE = 1000000
+PARALLEL_MIN_SCALE = 1000000
+
+# Modules whose cold import time is measured, each in a fresh interpreter
+IMPORT_MODULES = ("caloric_calculator", "caloric_calculator.stream", "caloric_calculator.batch")
+
+# Target BMI bands, goals and their shares for profiles generated without
+# NumPy; with it, profiles come from generate_population
+BMI_BANDS = ((16.0, 18.4, 0.05), (18.5, 24.9, 0.40), (25.0, 29.9, 0.35), (30.0, 45.0, 0.20))
+GOALS = (
+    (WeightGoal.MAINTAIN, (0.0,), 0.4),
+    (WeightGoal.LOSE, (0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 2.5), 0.45),
+    (WeightGoal.GAIN, (0.25, 0.5, 0.75, 1.0), 0.15),
+)
+ACTIVITY_LEVELS = ("S", "LA", "MA", "VA", "SA")
+
+
+def generate_columns(count, seed=0):
+    """
+    Generate ``count`` input rows with ``generate_population``.
+
+    Returns:
+        list: Arrays in ``calculate_batch`` argument order, with weight goals
+        as their values
+    """
+    population = next(generate_population(count, seed=seed, chunk_size=count))
+    return [population[name] for name in COLUMNS[:7]]
+
+
+def generate_profiles(count, seed=0):
+    """
+    Generate ``count`` input rows spread across BMI bands, goals and sexes.
+
+    These are the rows of :func:`generate_columns`; without NumPy a similar
+    mix is drawn in pure Python, so the scalar and stream benchmarks still
+    run.
+
+    Returns:
+        list: Tuples in ``CaloricCalculator`` argument order
+    """
+    if np is not None:
+        columns = [column.tolist() for column in generate_columns(count, seed)]
+        columns[5] = [WeightGoal(goal) for goal in columns[5]]
+        return list(zip(*columns))
+    rng = random.Random(seed)
+    bands = [band[:2] for band in BMI_BANDS]
+    band_weights = [band[2] for band in BMI_BANDS]
+    goal_weights = [goal[2] for goal in GOALS]
+    profiles = []
+    for _ in range(count):
+        sex = rng.choice("MF")
+        height = rng.randint(150, 200) if sex == "M" else rng.randint(145, 185)
+        low, high = rng.choices(bands, band_weights)[0]
+        weight = round(rng.uniform(low, high) * (height / 100) ** 2, 1)
+        goal, amounts, _ = rng.choices(GOALS, goal_weights)[0]
+        profiles.append((
+            weight, height, rng.randint(18, 80), sex, rng.choice(ACTIVITY_LEVELS),
+            goal, rng.choice(amounts),
+        ))
+    return profiles
+
+
+def _time(function, number, repeat):
+    """Best time per call of ``function`` over ``repeat`` runs of ``number`` calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def _record(results, name, seconds, rows=1):
+    results[name] = {
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds else None,
+    }
+
+
+def run_scalar(results, repeat):
+    profiles = generate_profiles(1000)
+    calculators = [CaloricCalculator(*profile) for profile in profiles]
+    context = CalculatorContext()
+
+    def each(function):
+        return lambda: [function(item) for item in calculators]
+
+    cases = {
+        "construct": lambda: [CaloricCalculator(*profile) for profile in profiles],
+        "construct_lazy": lambda: [
+            CaloricCalculator(*profile, lazy=True) for profile in profiles
+        ],
+        "construct_lazy_bmi": lambda: [
+            CaloricCalculator(*profile, lazy=True).bmi for profile in profiles
+        ],
+        "compute": lambda: [compute(*profile) for profile in profiles],
+        "context_compute": lambda: [context.compute(*profile) for profile in profiles],
+        "method.calculate_bmi": each(CaloricCalculator.calculate_bmi),
+        "method.calculate_bmr": each(CaloricCalculator.calculate_bmr),
+        "method.calculate_daily_caloric_needs": each(
+            CaloricCalculator.calculate_daily_caloric_needs
+        ),
+    }
+    for name, function in cases.items():
+        _record(results, f"scalar.{name}", _time(function, 1, repeat) / len(profiles))
+
+    cache = CalculationCache(maxsize=len(profiles))
+    for profile in profiles:
+        cache.calculate(*profile)
+    _record(
+        results, "scalar.cache_hit",
+        _time(lambda: [cache.calculate(*profile) for profile in profiles], 1, repeat)
+        / len(profiles),
+    )
+
+
+def run_bulk(results, scales, repeat):
+    # Larger scales tile a 100k-row sample instead of generating every row
+    sample = generate_profiles(min(max(scales), 100000))
+    stream_rows = [
+        dict(zip(INPUT_FIELDS, profile[:5] + (profile[5].value,) + profile[6:]))
+        for profile in sample
+    ]
+    sample_columns = generate_columns(len(sample)) if np is not None else None
+    for scale in scales:
+        # Row-at-a-time parsing makes streaming beyond 1M rows take minutes
+        if scale <= STREAM_MAX_SCALE:
+            rows = [stream_rows[index % len(stream_rows)] for index in range(scale)]
+            seconds = _time(
+                lambda: sum(1 for _ in stream_calculate(rows, chunk_size=10000)), 1, repeat
+            )
+            _record(results, f"stream.{scale}", seconds, scale)
+        if sample_columns is None:
+            continue
+        columns = [np.resize(column, scale) for column in sample_columns]
+        seconds = _time(lambda: calculate_batch(*columns), 1, repeat)
+        _record(results, f"batch.{scale}", seconds, scale)
+        seconds = _time(lambda: calculate_fixed_point(*columns), 1, repeat)
+        _record(results, f"fixed_point.{scale}", seconds, scale)
+        batch = calculate_batch(*columns)
+        seconds = _time(lambda: CohortAggregator().add(batch, *columns[3:6]), 1, repeat)
+        _record(results, f"cohort.{scale}", seconds, scale)
+        if scale >= PARALLEL_MIN_SCALE:
+            seconds = _time(lambda: parallel_calculate(*columns), 1, repeat)
+            _record(results, f"parallel.{scale}", seconds, scale)
+
+
+def _import_seconds(module):
+    """Time ``import module`` in a fresh interpreter, excluding interpreter startup."""
+    script = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    environment = dict(os.environ, PYTHONPATH=SOURCE_PATH)
+    output = subprocess.run(
+        [sys.executable, "-c", script], env=environment, check=True,
+        capture_output=True, text=True,
+    ).stdout
+    return float(output)
+
+
+def run_import(results, repeat):
+    for module in IMPORT_MODULES:
+        if module == "caloric_calculator.batch" and np is None:
+            continue
+        seconds = min(_import_seconds(module) for _ in range(repeat))
+        _record(results, f"import.{module}", seconds)
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results with a saved baseline.
+
+    Args:
+        results (dict): Benchmark results of this run
+        baseline (dict): Benchmark results of the baseline run
+        tolerance (float): Allowed relative slowdown, e.g. 0.1 for 10%
+
+    Returns:
+        list: ``(name, baseline_seconds, seconds, ratio)`` for every
+        benchmark that regressed beyond the tolerance
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        reference = baseline.get(name)
+        if not reference or not reference["seconds"]:
+            continue
+        ratio = result["seconds"] / reference["seconds"]
+        if ratio > 1 + tolerance:
+            regressions.append((name, reference["seconds"], result["seconds"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--scales", type=lambda text: [int(value) for value in text.split(",")],
+        default=list(DEFAULT_SCALES),
+        help="comma-separated row counts for bulk benchmarks, up to 10000000",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark")
+    parser.add_argument(
+        "--only", choices=("import", "scalar", "bulk"), help="run one group of benchmarks"
+    )
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.1,
+        help="allowed relative slowdown in compare mode (default: 0.1)",
+    )
+    args = parser.parse_args(argv)
+
+    results = {}
+    if args.only in (None, "import"):
+        run_import(results, args.repeat)
+    if args.only in (None, "scalar"):
+        run_scalar(results, args.repeat)
+    if args.only in (None, "bulk"):
+        run_bulk(results, args.scales, args.repeat)
+
+    report = {
+        "meta": {
+            "version": __version__,
+            "python": platform.python_version(),
+            "numpy": np.__version__ if np is not None else None,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for name, before, after, ratio in regressions:
+            print(
+                f"REGRESSION {name}: {before:.3g}s -> {after:.3g}s ({ratio:.2f}x)",
+                file=sys.stderr,
+            )
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,5 +9,15 @@ setup(
     author_email="intixel.intwin@gmail.com",
     description="Caloric needs calculator",
     python_requires=">=3.7",
+    extras_require={
+        "fast": ["numpy>=1.17"],
+        "pandas": ["numpy>=1.17", "pandas>=1.0"],
+        "arrow": ["numpy>=1.17", "pyarrow>=4.0"],
+    },
+    entry_points={
+        "console_scripts": [
+            "caloric-calculator=caloric_calculator.cli:main",
+        ],
+    },
     url="https://github.com/InTwin-Platform/calorie_calculator.git",
 )
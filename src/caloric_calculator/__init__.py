@@ -1,5 +1,96 @@
-from .calculator import CaloricCalculator
+"""
+Caloric Calculator package.
+
+Importing the package loads only the scalar calculator and context, their
+models, policy and result types. The batch, I/O, service and CLI machinery
+(and NumPy, pandas or pyarrow behind them) is imported on first attribute
+access, so ``import caloric_calculator`` stays cheap for short-lived
+processes:
+
+    >>> import caloric_calculator
+    >>> caloric_calculator.calculate_batch  # imports caloric_calculator.batch now
+"""
+
+import importlib
+
+from .calculator import CaloricCalculator, compute
+from .context import CalculatorContext
 from .models import WeightGoal
+from .policy import DEFAULT_POLICY, CalculationPolicy
+from .results import RESULT_FIELDS, CalculationResult, ResultSet
 
 __version__ = "2.0.0"
-__all__ = ["CaloricCalculator", "WeightGoal"]
+__all__ = [
+    "CaloricCalculator",
+    "WeightGoal",
+    "compute",
+    "CalculatorContext",
+    "CalculationResult",
+    "ResultSet",
+    "RESULT_FIELDS",
+    "CalculationPolicy",
+    "DEFAULT_POLICY",
+]
+
+# Names loaded from their submodule on first access
+_LAZY_ATTRIBUTES = {
+    "calculate_batch": "batch",
+    "encode_inputs": "batch",
+    "CalculationCache": "cache",
+    "stream_calculate": "stream",
+    "parallel_calculate": "parallel",
+    "AsyncCalculatorService": "service",
+    "project_trajectory": "trajectory",
+    "project_trajectories": "trajectory",
+    "calculate_frame": "columnar",
+    "calculate_table": "columnar",
+    "calculate_parquet": "columnar",
+    "validate_batch": "validation",
+    "solve_target": "solver",
+    "GridIndex": "grid",
+    "build_grid": "grid",
+    "ResultStore": "store",
+    "CohortAggregator": "cohort",
+    "sweep_profile": "sweep",
+    "SQLiteBackend": "store",
+    "generate_population": "synthetic",
+    "differential_check": "synthetic",
+    "calculate_fixed_point": "fixed_point",
+}
+
+_LAZY_SUBMODULES = (
+    "batch",
+    "cache",
+    "cli",
+    "cohort",
+    "columnar",
+    "fixed_point",
+    "grid",
+    "instrumentation",
+    "parallel",
+    "service",
+    "solver",
+    "store",
+    "stream",
+    "sweep",
+    "synthetic",
+    "trajectory",
+    "validation",
+)
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(f".{_LAZY_ATTRIBUTES[name]}", __name__)
+        value = getattr(module, name)
+    elif name in _LAZY_SUBMODULES:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Later lookups find the attribute directly and skip this hook
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | set(_LAZY_SUBMODULES))
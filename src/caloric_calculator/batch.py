@@ -0,0 +1,505 @@
+"""
+Vectorized batch computation for the Caloric Calculator.
+
+Computes the full BMI -> DCN pipeline of :class:`CaloricCalculator` over
+column arrays in a handful of NumPy operations instead of one object per
+profile. Results match the scalar class bit for bit, including its rounding.
+
+Requires NumPy (``pip install calorie-calculator[fast]``).
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+from . import instrumentation
+from .formulas import BMR_FORMULAS, DEFAULT_FORMULA
+from .models import ACTIVITY_LEVELS, SEXES, WEIGHT_GOALS, WeightGoal
+from .policy import DEFAULT_POLICY
+from .results import RESULT_FIELDS
+from .units import (
+    CENTIMETERS_PER_UNIT,
+    ENERGY_FIELDS,
+    ENERGY_UNITS,
+    HEIGHT_UNITS,
+    KILOGRAMS_PER_UNIT,
+    KILOJOULES_PER_KILOCALORIE,
+    WEIGHT_UNITS,
+)
+
+BATCH_FIELDS = RESULT_FIELDS
+
+_MALE = SEXES.index("M")
+_NO_FLOOR = np.iinfo(np.int64).min
+
+# Unit sizes by unit code
+_KILOGRAMS_PER_UNIT = np.array(KILOGRAMS_PER_UNIT)
+_CENTIMETERS_PER_UNIT = np.array(CENTIMETERS_PER_UNIT)
+
+# Distance from a .5 boundary (in units of the last kept digit) below which
+# ``x * 100`` may have been rounded onto the wrong side of the tie.
+_TIE_TOLERANCE = 1e-6
+
+# Veltkamp splitting constant (2**27 + 1) for error-free float products
+_SPLITTER = 134217729.0
+
+# Distinct categorical values peeled off one vectorized pass at a time before
+# the rest of a column is factorized row by row
+_PEEL_PASSES = 8
+
+
+def _product_error(values, factor):
+    """
+    Exact rounding error of ``values * factor``.
+
+    ``factor`` must fit in 26 bits so that it splits into itself and zero.
+    """
+    product = values * factor
+    scaled = _SPLITTER * values
+    high = scaled - (scaled - values)
+    low = values - high
+    return product, (high * factor - product) + low * factor
+
+
+def round2(values):
+    """
+    Round an array to 2 decimal places exactly like the built-in ``round(x, 2)``.
+
+    ``np.round`` scales by 100 before rounding, which can push values sitting
+    next to a .5 boundary onto the other side. For those elements the exact
+    value of ``x * 200`` is compared with the odd integer at the boundary,
+    and exact ties are rounded half to even, as the built-in does.
+
+    Args:
+        values (ndarray): Float array
+
+    Returns:
+        ndarray: Float array rounded to 2 decimal places
+    """
+    scaled = values * 100.0
+    rounded = np.rint(scaled)
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < _TIE_TOLERANCE
+    if near_tie.any():
+        index = np.flatnonzero(near_tie)
+        product, error = _product_error(values[index], 200.0)
+        boundary = np.rint(product)
+        # Both terms are exact, so the sign of the sum is the sign of x*200 - boundary
+        side = (product - boundary) + error
+        lower = (boundary - 1) / 2
+        upper = (boundary + 1) / 2
+        rounded[index] = np.where(
+            side > 0, upper,
+            np.where(side < 0, lower, np.where(lower % 2 == 0, lower, upper)),
+        )
+    return rounded / 100.0
+
+
+@lru_cache(maxsize=32)
+def _policy_arrays(policy):
+    """Code-indexed NumPy tables for a policy, built once per policy."""
+    activity_factors = np.array(
+        [np.nan if factor is None else factor for factor in policy.activity_factor_table]
+    )
+    minimum_calories = np.array(
+        [_NO_FLOOR if floor is None else floor for floor in policy.minimum_calorie_table],
+        dtype=np.int64,
+    )
+    goal_adjustments = tuple(
+        (np.array(list(table), dtype=np.float64), np.array(list(table.values()), dtype=np.int64))
+        for table in policy.goal_adjustment_table
+    )
+    return activity_factors, minimum_calories, goal_adjustments
+
+
+def _encode(values, choices, normalize, error, size, strict=True):
+    """
+    Map a column of categorical values onto indexes into ``choices``.
+
+    Integer columns are taken as pre-encoded codes and only range checked.
+    Otherwise each distinct value is normalized and looked up once. The first
+    few distinct values are matched with one vectorized pass each; whatever
+    is left after ``_PEEL_PASSES`` (e.g. free-form junk in a column being
+    validated) is factorized in a single pass, so the cost stays linear in
+    the rows. With ``strict`` off, invalid values get code -1 instead of
+    raising.
+    """
+    column = np.asarray(values)
+    if column.dtype.kind in "iu":
+        invalid = (column < 0) | (column >= len(choices))
+        if invalid.any():
+            if strict:
+                raise ValueError(error(column[invalid].flat[0]))
+            column = np.where(invalid, -1, column)
+        return np.broadcast_to(column.astype(np.intp, copy=False), (size,))
+    if column.ndim == 0:
+        key = normalize(column.item())
+        if key not in choices:
+            if strict:
+                raise ValueError(error(column.item()))
+            return np.full(size, -1, dtype=np.intp)
+        return np.full(size, choices.index(key), dtype=np.intp)
+    # Peel off one distinct value per pass; valid columns hold only a few,
+    # so this beats hashing every row.
+    codes = np.empty(size, dtype=np.intp)
+    remaining = np.arange(size)
+    for _ in range(_PEEL_PASSES):
+        if not len(remaining):
+            return codes
+        value = column[remaining[0]]
+        key = normalize(value)
+        if key in choices:
+            code = choices.index(key)
+        elif strict:
+            raise ValueError(error(value))
+        else:
+            code = -1
+        matches = np.asarray(column[remaining] == value, dtype=bool)
+        # NaN never equals itself, so match it separately
+        if value != value:
+            matches |= _is_nan(column[remaining])
+        matches[0] = True
+        codes[remaining[matches]] = code
+        remaining = remaining[~matches]
+    if len(remaining):
+        codes[remaining] = _factorize(column[remaining], choices, normalize, error, strict)
+    return codes
+
+
+def _factorize(column, choices, normalize, error, strict):
+    """Codes of a column with many distinct values, normalizing each value once."""
+    found = {}
+
+    def lookup(value):
+        key = normalize(value)
+        if key in choices:
+            code = choices.index(key)
+        elif strict:
+            raise ValueError(error(value))
+        else:
+            code = -1
+        found[value] = code
+        return code
+
+    return np.array(
+        [found[value] if value in found else lookup(value) for value in column.tolist()],
+        dtype=np.intp,
+    )
+
+
+def _is_nan(values):
+    if values.dtype.kind == "f":
+        return np.isnan(values)
+    return np.array([value != value for value in values], dtype=bool)
+
+
+def _normalize_goal(value):
+    if isinstance(value, WeightGoal):
+        return value
+    try:
+        return WeightGoal(value)
+    except ValueError:
+        return None
+
+
+def _column(values, size):
+    column = np.asarray(values, dtype=np.float64)
+    if column.ndim == 0:
+        return np.full(size, float(column))
+    return column
+
+
+def _check_numbers(weight, height, age, weight_amount=None):
+    """
+    Raise ValueError for the first row with a non-finite input, or with a
+    weight or height that is not positive. ``weight_amount`` is skipped
+    when None.
+
+    Unchecked, the batch engine would turn these rows into meaningless
+    integers. ``CaloricCalculator`` is more lenient: it raises for some of
+    them (a NaN weight, a height of 0) but calculates others, such as a
+    weight of 0 or a NaN weight amount (a 0 kcal adjustment). Callers that
+    may use either engine for the same rows, such as ``ResultStore``, apply
+    this rule themselves.
+    """
+    for name, values, positive in (
+        ("weight", weight, True),
+        ("height", height, True),
+        ("age", age, False),
+        ("weight amount", weight_amount, False),
+    ):
+        if values is None:
+            continue
+        with np.errstate(invalid="ignore"):
+            # Written as a negation so NaN is invalid too
+            invalid = ~((values > 0) & (values < np.inf)) if positive else ~np.isfinite(values)
+        if invalid.any():
+            row = int(np.flatnonzero(invalid)[0])
+            raise ValueError(f"Invalid {name} in row {row}: {values[row]}")
+
+
+def _goal_adjustment(goal_code, weight_amount, goal_adjustments):
+    """Signed kcal/day adjustment per row; unsupported amounts map to 0."""
+    result = np.zeros(goal_code.shape, dtype=np.int64)
+    for code, (amounts, calories) in enumerate(goal_adjustments):
+        if not len(amounts):
+            continue
+        rows = np.flatnonzero(goal_code == code)
+        if not len(rows):
+            continue
+        matches = weight_amount[rows, None] == amounts
+        found = matches.any(axis=1)
+        result[rows[found]] = calories[matches[found].argmax(axis=1)]
+    return result
+
+
+# Choices, normalizer and error message builder of each categorical input
+_CATEGORICAL = {
+    "sex": (
+        SEXES, lambda value: str(value).upper(),
+        lambda value: "Invalid gender. Please specify 'M' or 'F'.",
+    ),
+    "activity_level": (
+        ACTIVITY_LEVELS, lambda value: str(value).upper(),
+        lambda value: f"Invalid activity level: {str(value).upper()}",
+    ),
+    "weight_goal": (
+        WEIGHT_GOALS, _normalize_goal,
+        lambda value: "Invalid weight goal specified. Choose from WeightGoal enum values.",
+    ),
+    "weight_unit": (
+        WEIGHT_UNITS, lambda value: str(value).lower(),
+        lambda value: f"Invalid weight unit: {value}. Choose from {WEIGHT_UNITS}.",
+    ),
+    "height_unit": (
+        HEIGHT_UNITS, lambda value: str(value).lower(),
+        lambda value: f"Invalid height unit: {value}. Choose from {HEIGHT_UNITS}.",
+    ),
+    "energy_unit": (
+        ENERGY_UNITS, lambda value: str(value).lower(),
+        lambda value: f"Invalid energy unit: {value}. Choose from {ENERGY_UNITS}.",
+    ),
+}
+
+
+def _encode_field(field, values, size, strict=True):
+    choices, normalize, error = _CATEGORICAL[field]
+    return _encode(values, choices, normalize, error, size, strict)
+
+
+def encode_inputs(sex, activity_level, weight_goal, size=1):
+    """
+    Convert categorical columns to the integer codes of ``caloric_calculator.models``.
+
+    Columns that are already integer arrays are range checked and passed
+    through, so callers can encode once and reuse the codes.
+
+    Args:
+        sex (array-like): 'M'/'F' (any case) or sex codes
+        activity_level (array-like): Activity level codes (any case) or integers
+        weight_goal (array-like): WeightGoal members, their values or goal codes
+        size (int): Row count that scalar arguments are broadcast to
+
+    Returns:
+        tuple: ``(sex_code, activity_code, goal_code)`` integer arrays
+
+    Raises:
+        ValueError: If any row has an invalid sex, activity level or weight goal
+    """
+    return (
+        _encode_field("sex", sex, size),
+        _encode_field("activity_level", activity_level, size),
+        _encode_field("weight_goal", weight_goal, size),
+    )
+
+
+def _to_metric(values, unit, field, unit_sizes, size):
+    """
+    Convert a float column to kg or cm.
+
+    ``unit`` is one unit for every row or a column of units (names or
+    codes), so mixed-unit input is converted by one multiplication.
+    Columns already in kg or cm are returned as they are.
+    """
+    if np.ndim(unit) == 0:
+        code = _encode_field(field, unit, 1)[0]
+        return values if code == 0 else values * unit_sizes[code]
+    return values * unit_sizes[_encode_field(field, unit, size)]
+
+
+def _to_energy_unit(results, energy_code):
+    """Convert the kcal fields of batch results to the energy unit with this code."""
+    if energy_code == 0:
+        return results
+    for field in ENERGY_FIELDS:
+        results[field] = np.rint(results[field] * KILOJOULES_PER_KILOCALORIE).astype(np.int64)
+    return results
+
+
+def _body_fat(formula, body_fat, size):
+    """Body fat column for formulas that need one, validated; None otherwise."""
+    if not formula.requires_body_fat:
+        return None
+    if body_fat is None:
+        raise ValueError(f"The {formula.name} BMR formula requires body_fat.")
+    body_fat = _column(body_fat, size)
+    # Written as a negation so NaN is invalid too
+    invalid = ~((body_fat >= 0) & (body_fat < 100))
+    if invalid.any():
+        raise ValueError(f"Invalid body fat percentage: {body_fat[invalid][0]}")
+    return body_fat
+
+
+def _bmr(weight, height, age, is_male, mark=instrumentation._skip, formula=None, body_fat=None):
+    """
+    BMI through BMR for float columns; ``is_male`` is a boolean column.
+
+    ``formula`` defaults to Mifflin-St Jeor; ``body_fat`` must already have
+    been checked with :func:`_body_fat`.
+    """
+    height_m = height / 100
+    bmi = round2(weight / (height_m ** 2))
+    mark("bmi")
+
+    height_inches = height / 2.54
+    ideal_weight = round2(np.where(is_male, 50.0, 45.5) + 2.3 * (height_inches - 60))
+    mark("ideal_weight")
+    adjusted_weight = round2(ideal_weight + 0.25 * (weight - ideal_weight))
+    mark("adjusted_weight")
+
+    recommended_weight = np.where(
+        bmi <= 24.9,
+        weight,
+        np.where((bmi >= 25) & (bmi <= 29.9), ideal_weight, adjusted_weight),
+    )
+    mark("recommended_weight")
+
+    if formula is None:
+        formula = BMR_FORMULAS[DEFAULT_FORMULA]
+    bmr = formula.vectorized(weight, recommended_weight, height, age, is_male, body_fat)
+    bmr = np.rint(bmr).astype(np.int64)
+    mark("bmr")
+
+    return bmi, ideal_weight, adjusted_weight, recommended_weight, bmr
+
+
+def calculate_batch(
+    weight,
+    height,
+    age,
+    sex,
+    activity_level,
+    weight_goal,
+    weight_amount=0.0,
+    policy=None,
+    body_fat=None,
+    weight_unit="kg",
+    height_unit="cm",
+    energy_unit="kcal",
+):
+    """
+    Calculate the derived values of :class:`CaloricCalculator` for many profiles.
+
+    Every argument is either a column (list or array) with one entry per
+    profile or a scalar that applies to all of them. Categorical columns may
+    also be integer arrays of the codes in ``caloric_calculator.models``.
+
+    Args:
+        weight (array-like): Weight in kg
+        height (array-like): Height in cm
+        age (array-like): Age in years
+        sex (array-like): 'M' for male, 'F' for female
+        activity_level (array-like): 'S', 'LA', 'MA', 'VA', 'SA'
+        weight_goal (array-like): WeightGoal members or their values
+        weight_amount (array-like): Amount to lose/gain per week in kg
+        policy (CalculationPolicy): Tables and BMR formula to calculate
+            with. Defaults to ``DEFAULT_POLICY``.
+        body_fat (array-like): Body fat percentage, for BMR formulas that
+            need it; ignored otherwise
+        weight_unit (array-like): 'kg' or 'lb', for all rows or per row
+        height_unit (array-like): 'cm', 'in' or 'ft', for all rows or per row
+        energy_unit (str): Unit of ``bmr``, ``tdee`` and
+            ``daily_caloric_needs``, 'kcal' or 'kJ'
+
+    Returns:
+        dict: Arrays keyed by ``BATCH_FIELDS``. ``bmr``, ``tdee`` and
+        ``daily_caloric_needs`` are int64, the rest float64. Pass the dict to
+        ``ResultSet.from_columns`` for record-style access.
+
+    Raises:
+        ValueError: If any row has an invalid sex, activity level, weight
+            goal or unit, a weight, height, age or weight amount that is not
+            finite, a weight or height that is not positive, or a body fat
+            percentage the formula needs is missing or out of range
+    """
+    size = max(np.size(column) for column in (
+        weight, height, age, sex, activity_level, weight_goal, weight_amount,
+        weight_unit, height_unit,
+    ))
+    recorder = instrumentation._recorder
+    if recorder is None:
+        return _calculate_batch(
+            weight, height, age, sex, activity_level, weight_goal, weight_amount,
+            policy, body_fat, weight_unit, height_unit, energy_unit, size,
+            instrumentation._skip,
+        )
+    try:
+        return _calculate_batch(
+            weight, height, age, sex, activity_level, weight_goal, weight_amount,
+            policy, body_fat, weight_unit, height_unit, energy_unit, size,
+            recorder.timer("batch", size),
+        )
+    except Exception as error:
+        recorder.record_error("batch", "validation", error)
+        raise
+
+
+def _calculate_batch(
+    weight, height, age, sex, activity_level, weight_goal, weight_amount, policy, body_fat,
+    weight_unit, height_unit, energy_unit, size, mark,
+):
+    """``calculate_batch`` body; ``mark(stage)`` is called as each stage completes."""
+    weight = _to_metric(
+        _column(weight, size), weight_unit, "weight_unit", _KILOGRAMS_PER_UNIT, size
+    )
+    height = _to_metric(
+        _column(height, size), height_unit, "height_unit", _CENTIMETERS_PER_UNIT, size
+    )
+    energy_code = _encode_field("energy_unit", energy_unit, 1)[0]
+    age = _column(age, size)
+    weight_amount = _column(weight_amount, size)
+    _check_numbers(weight, height, age, weight_amount)
+    sex_code, activity_code, goal_code = encode_inputs(
+        sex, activity_level, weight_goal, size
+    )
+    policy = DEFAULT_POLICY if policy is None else policy
+    activity_factors, minimum_calories, goal_adjustments = _policy_arrays(policy)
+    body_fat = _body_fat(policy.formula, body_fat, size)
+    is_male = sex_code == _MALE
+    mark("encode")
+
+    bmi, ideal_weight, adjusted_weight, recommended_weight, bmr = _bmr(
+        weight, height, age, is_male, mark, policy.formula, body_fat
+    )
+
+    activity_factor = activity_factors[activity_code]
+    if np.isnan(activity_factor).any():
+        missing = activity_code[np.isnan(activity_factor)][0]
+        raise ValueError(f"Invalid activity level: {ACTIVITY_LEVELS[missing]}")
+    mark("activity_factor")
+    tdee = np.rint(bmr * activity_factor).astype(np.int64)
+    mark("tdee")
+
+    adjustment = _goal_adjustment(goal_code, weight_amount, goal_adjustments)
+    daily_caloric_needs = np.maximum(tdee + adjustment, minimum_calories[sex_code])
+    mark("daily_caloric_needs")
+
+    return _to_energy_unit({
+        "bmi": bmi,
+        "ideal_weight": ideal_weight,
+        "adjusted_weight": adjusted_weight,
+        "recommended_weight": recommended_weight,
+        "bmr": bmr,
+        "activity_factor": activity_factor,
+        "tdee": tdee,
+        "daily_caloric_needs": daily_caloric_needs,
+    }, energy_code)
@@ -0,0 +1,313 @@
+"""
+Memoizing cache in front of the Caloric Calculator.
+
+Results are keyed on the inputs after the same normalization the calculator
+applies (upper-cased sex and activity level, ``float(weight_amount)``), so
+repeat requests skip every calculation. The default backend is an in-process
+LRU; :class:`SharedMemoryBackend` shares entries between processes.
+"""
+
+import struct
+import threading
+from collections import OrderedDict, namedtuple
+
+from .calculator import compute
+from .models import ACTIVITY_LEVELS, SEXES, WEIGHT_GOALS
+from .policy import DEFAULT_POLICY, policy_fingerprint
+from .results import CalculationResult
+
+CacheStats = namedtuple("CacheStats", ["hits", "misses", "evictions", "size", "maxsize"])
+
+
+def make_key(
+    weight, height, age, sex, activity_level, weight_goal, weight_amount=0.0, body_fat=None
+):
+    """
+    Build the cache key for one set of calculator inputs.
+
+    Returns:
+        tuple: Inputs normalized the way ``CaloricCalculator.__init__`` does
+    """
+    return (
+        weight,
+        height,
+        age,
+        sex.upper(),
+        activity_level.upper(),
+        weight_goal,
+        float(weight_amount),
+        None if body_fat is None else float(body_fat),
+    )
+
+
+class LRUBackend:
+    """In-process storage that evicts the least recently used entry."""
+
+    def __init__(self, maxsize):
+        if maxsize < 1:
+            raise ValueError("Cache size must be at least 1.")
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        result = self._entries.get(key)
+        if result is not None:
+            self._entries.move_to_end(key)
+        return result
+
+    def put(self, key, result):
+        """Store ``result`` and return True if another entry was evicted."""
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            return True
+        return False
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# The table starts with the fingerprint of the policy its results were
+# computed with, followed by the slots.
+_HEADER_SIZE = 16
+
+# Slot layout: occupied flag, sex/activity/goal codes, weight, height, age,
+# weight_amount and body_fat, followed by the eight result fields.
+_SLOT = struct.Struct("<?BBB4xdddddddddqdqq")
+_KEY_FIELDS = 8
+
+# Stored body fat of keys without one; never a valid percentage
+_NO_BODY_FAT = -1.0
+
+
+class SharedMemoryBackend:
+    """
+    Fixed-size cache table in shared memory, usable from several processes.
+
+    Entries are direct-mapped: each key hashes to one slot and replaces
+    whatever was stored there, which counts as an eviction. Every process
+    must use the same ``lock``; pass it along with ``name`` to
+    :meth:`attach` in the workers. Requires Python 3.8+.
+
+    Slots hold only the inputs, so a table is tied to one policy: its
+    fingerprint is stored in the block, and attaching or caching with any
+    other policy raises ValueError.
+    """
+
+    def __init__(self, maxsize, lock=None, name=None, policy=None):
+        """
+        Create a new shared table.
+
+        Args:
+            maxsize (int): Number of slots
+            lock (multiprocessing.Lock): Lock shared by every process using
+                the table. A new one is created when omitted.
+            name (str): Shared memory block name, chosen by the OS if omitted
+            policy (CalculationPolicy): Policy every stored result is
+                computed with. Defaults to ``DEFAULT_POLICY``.
+        """
+        if maxsize < 1:
+            raise ValueError("Cache size must be at least 1.")
+        import multiprocessing
+        from multiprocessing import shared_memory
+
+        self.maxsize = maxsize
+        self.lock = lock if lock is not None else multiprocessing.Lock()
+        self.fingerprint = policy_fingerprint(policy)
+        self._memory = shared_memory.SharedMemory(
+            name=name, create=True, size=_HEADER_SIZE + maxsize * _SLOT.size
+        )
+        self._memory.buf[:_HEADER_SIZE] = self.fingerprint
+        self._owner = True
+
+    @classmethod
+    def attach(cls, name, maxsize, lock, policy=None):
+        """
+        Attach to a table created by another process.
+
+        Args:
+            name (str): ``name`` of the creating backend
+            maxsize (int): ``maxsize`` of the creating backend
+            lock (multiprocessing.Lock): ``lock`` of the creating backend
+            policy (CalculationPolicy): ``policy`` of the creating backend
+
+        Returns:
+            SharedMemoryBackend: Backend reading and writing the same table
+
+        Raises:
+            ValueError: If the table was created for a different policy
+        """
+        from multiprocessing import shared_memory
+
+        backend = cls.__new__(cls)
+        backend.maxsize = maxsize
+        backend.lock = lock
+        backend.fingerprint = policy_fingerprint(policy)
+        backend._memory = shared_memory.SharedMemory(name=name)
+        backend._owner = False
+        if bytes(backend._memory.buf[:_HEADER_SIZE]) != backend.fingerprint:
+            backend.close()
+            raise ValueError(f"Shared cache {name} was created for a different policy.")
+        return backend
+
+    @property
+    def name(self):
+        return self._memory.name
+
+    @staticmethod
+    def _encode(key):
+        weight, height, age, sex, activity_level, weight_goal, weight_amount, body_fat = key
+        try:
+            codes = (
+                SEXES.index(sex),
+                ACTIVITY_LEVELS.index(activity_level),
+                WEIGHT_GOALS.index(weight_goal),
+            )
+        except ValueError:
+            return None
+        return codes + (
+            float(weight), float(height), float(age), weight_amount,
+            _NO_BODY_FAT if body_fat is None else body_fat,
+        )
+
+    def _offset(self, fields):
+        return _HEADER_SIZE + (hash(fields) % self.maxsize) * _SLOT.size
+
+    def get(self, key):
+        fields = self._encode(key)
+        if fields is None:
+            return None
+        offset = self._offset(fields)
+        with self.lock:
+            slot = _SLOT.unpack_from(self._memory.buf, offset)
+        if slot[0] and slot[1:_KEY_FIELDS + 1] == fields:
+            return CalculationResult(*slot[_KEY_FIELDS + 1:])
+        return None
+
+    def put(self, key, result):
+        """Store ``result`` and return True if another entry was evicted."""
+        fields = self._encode(key)
+        if fields is None:
+            return False
+        offset = self._offset(fields)
+        with self.lock:
+            previous = _SLOT.unpack_from(self._memory.buf, offset)
+            _SLOT.pack_into(self._memory.buf, offset, True, *fields, *result)
+        return previous[0] and previous[1:_KEY_FIELDS + 1] != fields
+
+    def clear(self):
+        with self.lock:
+            self._memory.buf[_HEADER_SIZE:] = bytes(len(self._memory.buf) - _HEADER_SIZE)
+
+    def __len__(self):
+        with self.lock:
+            return sum(
+                self._memory.buf[offset]
+                for offset in range(
+                    _HEADER_SIZE, _HEADER_SIZE + self.maxsize * _SLOT.size, _SLOT.size
+                )
+            )
+
+    def close(self):
+        """Detach from the table, and free it if this process created it."""
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+class CalculationCache:
+    """
+    Bounded, thread-safe cache of calculation results.
+
+    Example:
+        >>> cache = CalculationCache(maxsize=10000)
+        >>> result = cache.calculate(70, 175, 30, "M", "MA", WeightGoal.MAINTAIN)
+        >>> cache.stats().misses
+        1
+    """
+
+    def __init__(self, maxsize=1024, backend=None, policy=None):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize (int): Maximum number of cached results for the default
+                LRU backend
+            backend: Storage backend such as :class:`SharedMemoryBackend`.
+                Defaults to an in-process :class:`LRUBackend`.
+            policy (CalculationPolicy): Policy every cached result is
+                computed with. Defaults to ``DEFAULT_POLICY``.
+
+        Raises:
+            ValueError: If ``backend`` holds results of a different policy
+        """
+        fingerprint = getattr(backend, "fingerprint", None)
+        if fingerprint is not None and fingerprint != policy_fingerprint(policy):
+            raise ValueError("The cache backend was created for a different policy.")
+        self._backend = backend if backend is not None else LRUBackend(maxsize)
+        self.policy = policy
+        formula = (DEFAULT_POLICY if policy is None else policy).formula
+        self._requires_body_fat = formula.requires_body_fat
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def calculate(
+        self, weight, height, age, sex, activity_level, weight_goal, weight_amount=0.0,
+        body_fat=None,
+    ):
+        """
+        Get the derived values for one profile, computing them on a miss.
+
+        Takes the same arguments as :class:`CaloricCalculator`. ``body_fat``
+        is part of the key only when the policy's BMR formula needs it.
+
+        Returns:
+            CalculationResult: Derived values for the profile
+
+        Raises:
+            ValueError: If the inputs are invalid (invalid inputs are never cached)
+        """
+        if not self._requires_body_fat:
+            body_fat = None
+        key = make_key(
+            weight, height, age, sex, activity_level, weight_goal, weight_amount, body_fat
+        )
+        with self._lock:
+            result = self._backend.get(key)
+            if result is not None:
+                self.hits += 1
+                return result
+            self.misses += 1
+
+        result = compute(*key[:7], policy=self.policy, body_fat=key[7])
+
+        with self._lock:
+            if self._backend.put(key, result):
+                self.evictions += 1
+        return result
+
+    def stats(self):
+        """
+        Get the cache counters.
+
+        Returns:
+            CacheStats: Hits, misses and evictions seen by this cache object,
+            plus the current and maximum number of entries
+        """
+        with self._lock:
+            return CacheStats(
+                self.hits, self.misses, self.evictions, len(self._backend),
+                self._backend.maxsize,
+            )
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._backend.clear()
+            self.hits = self.misses = self.evictions = 0
@@ -1,13 +1,130 @@
-from .models import WeightGoal
+from .formulas import _check_body_fat
+from .models import ACTIVITY_CODES, GOAL_CODES, SEX_CODES
+from .policy import DEFAULT_POLICY
+from .results import RESULT_FIELDS, CalculationResult
+from .units import ENERGY_FIELDS, to_centimeters, to_energy_unit, to_kilograms
+
+# Direct inputs of every derived value
+DEPENDENCIES = {
+    "bmi": ("weight", "height"),
+    "ideal_weight": ("height", "sex"),
+    "adjusted_weight": ("ideal_weight", "weight"),
+    "recommended_weight": ("bmi", "weight", "ideal_weight", "adjusted_weight"),
+    "bmr": ("recommended_weight", "weight", "height", "age", "sex", "body_fat", "policy"),
+    "activity_factor": ("activity_level", "policy"),
+    "tdee": ("bmr", "activity_factor"),
+    "daily_caloric_needs": ("tdee", "weight_goal", "weight_amount", "sex", "policy"),
+}
+
+INPUT_FIELDS = (
+    "weight",
+    "height",
+    "age",
+    "sex",
+    "activity_level",
+    "weight_goal",
+    "weight_amount",
+    "policy",
+    "body_fat",
+)
+
+
+def _downstream(name):
+    """Derived values that depend on ``name``, directly or not, in compute order."""
+    affected = {name}
+    for field in RESULT_FIELDS:
+        if affected.intersection(DEPENDENCIES[field]):
+            affected.add(field)
+    return tuple(field for field in RESULT_FIELDS if field in affected)
+
+
+# Derived values to discard when an input changes
+DOWNSTREAM = {name: _downstream(name) for name in INPUT_FIELDS}
+
+
+class _Input:
+    """Input attribute; reassigning it discards the derived values depending on it."""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return instance._inputs[self.name]
+
+    def __set__(self, instance, value):
+        instance._inputs[self.name] = value
+        for field in DOWNSTREAM[self.name]:
+            instance._derived.pop(field, None)
+
+
+class _Derived:
+    """Derived attribute computed by ``method`` on first access and cached."""
+
+    def __init__(self, method):
+        self.method = method
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        derived = instance._derived
+        value = derived.get(self.name)
+        if value is None:
+            value = derived[self.name] = getattr(instance, self.method)()
+        return value
+
+    def __set__(self, instance, value):
+        instance._derived[self.name] = value
 
 
 class CaloricCalculator:
+    weight = _Input()
+    height = _Input()
+    age = _Input()
+    sex = _Input()
+    activity_level = _Input()
+    weight_goal = _Input()
+    weight_amount = _Input()
+    policy = _Input()
+    body_fat = _Input()
+
+    bmi = _Derived("calculate_bmi")
+    ideal_weight = _Derived("calculate_ideal_weight")
+    adjusted_weight = _Derived("calculate_adjusted_weight")
+    recommended_weight = _Derived("get_recommended_weight")
+    bmr = _Derived("calculate_bmr")
+    activity_factor = _Derived("get_activity_factor")
+    tdee = _Derived("calculate_tdee")
+    daily_caloric_needs = _Derived("calculate_daily_caloric_needs")
+
+    DERIVED_FIELDS = RESULT_FIELDS
+
     def __init__(
-        self, weight, height, age, sex, activity_level, weight_goal, weight_amount=0.0
+        self,
+        weight,
+        height,
+        age,
+        sex,
+        activity_level,
+        weight_goal,
+        weight_amount=0.0,
+        lazy=False,
+        policy=None,
+        body_fat=None,
+        weight_unit="kg",
+        height_unit="cm",
     ):
         """
         Initialize the Caloric Calculator.
 
+        Derived values are cached once computed. Reassigning an input
+        attribute discards the values that depend on it, which are then
+        recomputed on next access.
+
         Args:
             weight (float): Weight in kg
             height (float): Height in cm
@@ -16,27 +133,126 @@ class CaloricCalculator:
             activity_level (str): 'S', 'LA', 'MA', 'VA', 'SA'
             weight_goal (WeightGoal): Weight goal enum
             weight_amount (float): Amount to lose/gain per week in kg
+            lazy (bool): Compute each derived value on first access instead of
+                all of them here. Invalid inputs then raise on access.
+            policy (CalculationPolicy): Activity factor, goal adjustment and
+                minimum calorie tables and BMR formula. Defaults to
+                ``DEFAULT_POLICY``.
+            body_fat (float): Body fat percentage; required by BMR formulas
+                based on lean body mass such as 'katch_mcardle'
+            weight_unit (str): Unit of ``weight``, 'kg' or 'lb'. The
+                ``weight`` attribute holds the weight converted to kg.
+            height_unit (str): Unit of ``height``, 'cm', 'in' or 'ft'. The
+                ``height`` attribute holds the height converted to cm.
+        """
+        # Nothing is derived yet, so the inputs skip invalidation
+        self._inputs = {
+            "weight": to_kilograms(weight, weight_unit),
+            "height": to_centimeters(height, height_unit),
+            "age": age,
+            "sex": sex.upper(),
+            "activity_level": activity_level.upper(),
+            "weight_goal": weight_goal,
+            "weight_amount": float(weight_amount),
+            "policy": DEFAULT_POLICY if policy is None else policy,
+            "body_fat": None if body_fat is None else float(body_fat),
+        }
+        self._derived = {}
+        self._lazy = lazy
+
+        if not lazy:
+            for field in self.DERIVED_FIELDS:
+                getattr(self, field)
+
+    @property
+    def caloric_requirements(self):
+        """Backward compatibility alias for ``tdee``."""
+        return self.tdee
+
+    def update(self, **changes):
         """
-        self.weight = weight
-        self.height = height
-        self.age = age
-        self.sex = sex.upper()
-        self.activity_level = activity_level.upper()
-        self.weight_goal = weight_goal
-        self.weight_amount = float(weight_amount)
-
-        # Calculate derived values
-        self.bmi = self.calculate_bmi()
-        self.ideal_weight = self.calculate_ideal_weight()
-        self.adjusted_weight = self.calculate_adjusted_weight()
-        self.recommended_weight = self.get_recommended_weight()
-        self.bmr = self.calculate_bmr()
-        self.activity_factor = self.get_activity_factor()
-        self.tdee = self.calculate_tdee()
-        self.daily_caloric_needs = self.calculate_daily_caloric_needs()
-        
-        # Backward compatibility alias
-        self.caloric_requirements = self.tdee
+        Change some inputs and recompute only the values that depend on them.
+
+        Inputs are normalized as in the constructor. In eager mode every
+        affected value is recomputed immediately; in lazy mode only the
+        affected values that had already been computed are, and the rest wait
+        for their first access. If recomputation fails, the inputs and values
+        are restored and the error is raised.
+
+        Example:
+            >>> calculator.update(weight=82.5)
+            ('bmi', 'adjusted_weight', 'recommended_weight', 'bmr', 'tdee',
+             'daily_caloric_needs')
+
+        Args:
+            **changes: New values for any of ``INPUT_FIELDS``
+
+        Returns:
+            tuple: Names of the recomputed derived values whose value
+            changed, in ``DERIVED_FIELDS`` order
+
+        Raises:
+            TypeError: If a name is not an input field
+            ValueError: If the new inputs are invalid
+        """
+        for name in changes:
+            if name not in INPUT_FIELDS:
+                raise TypeError(f"update() got an unexpected keyword argument '{name}'")
+        if "sex" in changes:
+            changes["sex"] = changes["sex"].upper()
+        if "activity_level" in changes:
+            changes["activity_level"] = changes["activity_level"].upper()
+        if "weight_amount" in changes:
+            changes["weight_amount"] = float(changes["weight_amount"])
+        if changes.get("body_fat") is not None:
+            changes["body_fat"] = float(changes["body_fat"])
+        if changes.get("policy", self.policy) is None:
+            changes["policy"] = DEFAULT_POLICY
+
+        changed_inputs = [
+            name for name, value in changes.items() if self._inputs[name] != value
+        ]
+        affected = set()
+        for name in changed_inputs:
+            affected.update(DOWNSTREAM[name])
+        affected = [field for field in RESULT_FIELDS if field in affected]
+        if self._lazy:
+            affected = [field for field in affected if field in self._derived]
+
+        previous_inputs = dict(self._inputs)
+        previous_derived = dict(self._derived)
+        for name in changed_inputs:
+            setattr(self, name, changes[name])
+        try:
+            for field in affected:
+                getattr(self, field)
+        except Exception:
+            self._inputs = previous_inputs
+            self._derived = previous_derived
+            raise
+        return tuple(
+            field for field in affected
+            if field not in previous_derived
+            or self._derived[field] != previous_derived[field]
+        )
+
+    def result(self, energy_unit="kcal"):
+        """
+        Get the derived values as an immutable record.
+
+        Args:
+            energy_unit (str): Unit of ``bmr``, ``tdee`` and
+                ``daily_caloric_needs``, 'kcal' or 'kJ'
+
+        Returns:
+            CalculationResult: Derived values in ``RESULT_FIELDS`` order
+        """
+        result = CalculationResult(*(getattr(self, field) for field in RESULT_FIELDS))
+        if energy_unit == "kcal":
+            return result
+        return result._replace(**{
+            field: to_energy_unit(getattr(result, field), energy_unit) for field in ENERGY_FIELDS
+        })
 
     def calculate_bmi(self):
         """
@@ -105,22 +321,36 @@ class CaloricCalculator:
 
     def calculate_bmr(self):
         """
-        Calculate Basal Metabolic Rate (BMR) using the recommended weight.
+        Calculate Basal Metabolic Rate (BMR) with the policy's formula.
+
+        The default Mifflin-St Jeor formula uses the recommended weight:
         For Males: BMR = (10 × W(kg)) + (6.25 × Height (cm)) - (5 × Age(y)) + 5
         For Females: BMR = (10 × W(kg)) + (6.25 × Height (cm)) - (5 × Age(y)) - 161
+
+        See ``caloric_calculator.formulas`` for the other formulas.
         
         Returns:
             int: BMR in kcal/day, rounded to nearest integer
+
+        Raises:
+            ValueError: If the sex is invalid, or the formula needs a body fat
+                percentage and ``body_fat`` is missing or out of range
         """
         weight_for_bmr = self.recommended_weight
         
         if self.sex == "M":
-            bmr = (10 * weight_for_bmr) + (6.25 * self.height) - (5 * self.age) + 5
+            is_male = True
         elif self.sex == "F":
-            bmr = (10 * weight_for_bmr) + (6.25 * self.height) - (5 * self.age) - 161
+            is_male = False
         else:
             raise ValueError("Invalid gender. Please specify 'M' or 'F'.")
-        
+
+        formula = self.policy.formula
+        if formula.requires_body_fat:
+            _check_body_fat(formula, self.body_fat)
+        bmr = formula.scalar(
+            self.weight, weight_for_bmr, self.height, self.age, is_male, self.body_fat
+        )
         return round(bmr)
 
     def get_activity_factor(self):
@@ -133,21 +363,16 @@ class CaloricCalculator:
         Moderately Active | MA | 1.55
         Very Active    | VA   | 1.725
         Super Active   | SA   | 1.9
+
+        Factors are read from ``policy``; the table shows the defaults.
         
         Returns:
             float: Activity factor
         """
-        activity_factors = {
-            "S": 1.2,
-            "LA": 1.375,
-            "MA": 1.55,
-            "VA": 1.725,
-            "SA": 1.9
-        }
-        activity_factor = activity_factors.get(self.activity_level, None)
-        if activity_factor is None:
+        code = ACTIVITY_CODES.get(self.activity_level)
+        if code is None:
             raise ValueError(f"Invalid activity level: {self.activity_level}")
-        return activity_factor
+        return self.policy.activity_factor(code)
 
     def calculate_tdee(self):
         """
@@ -183,47 +408,59 @@ class CaloricCalculator:
         Minimum safe thresholds are enforced:
         - Female: 1300 kcal/day
         - Male: 1500 kcal/day
+
+        Adjustments and thresholds are read from ``policy``; the values above
+        are the defaults.
         
         Returns:
             int: Daily caloric needs in kcal/day, rounded to nearest integer
         """
-        # Caloric adjustments for weight loss (kcal/day)
-        weight_loss_adjustments = {
-            0.25: 250,
-            0.5: 500,
-            0.75: 750,
-            1.0: 1000,
-            1.5: 1500,
-            2.0: 2000,
-            2.5: 2500
-        }
-        
-        # Caloric adjustments for weight gain (kcal/day)
-        weight_gain_adjustments = {
-            0.25: 250,
-            0.5: 500,
-            0.75: 750,
-            1.0: 1000
-        }
-        
-        # Calculate desired daily caloric intake based on weight goal
-        if self.weight_goal == WeightGoal.MAINTAIN:
-            daily_calories = self.tdee
-        elif self.weight_goal == WeightGoal.LOSE:
-            adjustment = weight_loss_adjustments.get(self.weight_amount, 0)
-            daily_calories = self.tdee - adjustment
-        elif self.weight_goal == WeightGoal.GAIN:
-            adjustment = weight_gain_adjustments.get(self.weight_amount, 0)
-            daily_calories = self.tdee + adjustment
-        else:
+        goal_code = GOAL_CODES.get(self.weight_goal)
+        if goal_code is None:
             raise ValueError(
                 "Invalid weight goal specified. Choose from WeightGoal enum values."
             )
-        
+        daily_calories = self.tdee + self.policy.goal_adjustment(
+            goal_code, self.weight_amount
+        )
+
         # Enforce minimum safe calorie thresholds
-        if self.sex == "F":
-            daily_calories = max(daily_calories, 1300)
-        elif self.sex == "M":
-            daily_calories = max(daily_calories, 1500)
+        sex_code = SEX_CODES.get(self.sex)
+        if sex_code is not None:
+            daily_calories = self.policy.apply_minimum(sex_code, daily_calories)
         
         return round(daily_calories)
+
+
+def compute(
+    weight,
+    height,
+    age,
+    sex,
+    activity_level,
+    weight_goal,
+    weight_amount=0.0,
+    policy=None,
+    body_fat=None,
+    weight_unit="kg",
+    height_unit="cm",
+    energy_unit="kcal",
+):
+    """
+    Calculate every derived value for one profile.
+
+    Takes the same arguments as :class:`CaloricCalculator` and returns only
+    the compact result record, so no calculator instance is kept alive.
+
+    Args:
+        energy_unit (str): Unit of ``bmr``, ``tdee`` and
+            ``daily_caloric_needs``, 'kcal' or 'kJ'
+
+    Returns:
+        CalculationResult: Derived values for the profile
+    """
+    return CaloricCalculator(
+        weight, height, age, sex, activity_level, weight_goal, weight_amount,
+        lazy=True, policy=policy, body_fat=body_fat, weight_unit=weight_unit,
+        height_unit=height_unit,
+    ).result(energy_unit)
@@ -0,0 +1,113 @@
+"""
+Command-line entry point for the Caloric Calculator.
+
+Scores a CSV or JSONL file of profiles and writes the input rows with the
+calculated values appended:
+
+    caloric-calculator profiles.csv -o scored.csv --rejects rejects.jsonl
+"""
+
+import argparse
+import json
+import sys
+
+from . import __version__
+from .stream import DEFAULT_CHUNK_SIZE, RowWriter, read_rows, stream_calculate
+
+FORMATS = ("csv", "jsonl")
+
+
+def _guess_format(path, default="csv"):
+    for file_format in FORMATS:
+        if path.lower().endswith("." + file_format):
+            return file_format
+    if path.lower().endswith(".json"):
+        return "jsonl"
+    return default
+
+
+def _open(path, mode):
+    if path == "-":
+        return sys.stdin if "r" in mode else sys.stdout
+    return open(path, mode, newline="", encoding="utf-8")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="caloric-calculator",
+        description="Calculate daily caloric needs for a CSV or JSONL file of profiles.",
+    )
+    parser.add_argument("input", help="input file, or '-' for stdin")
+    parser.add_argument(
+        "-o", "--output", default="-", help="output file, or '-' for stdout (default)"
+    )
+    parser.add_argument(
+        "--input-format", choices=FORMATS,
+        help="input format (default: from the file extension, else csv)",
+    )
+    parser.add_argument(
+        "--output-format", choices=FORMATS,
+        help="output format (default: from the file extension, else the input format)",
+    )
+    parser.add_argument(
+        "--rejects",
+        help="write rows that cannot be calculated to this JSONL file with an 'error' field",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+        help=f"rows calculated together (default: {DEFAULT_CHUNK_SIZE})",
+    )
+    parser.add_argument(
+        "--energy-unit", choices=("kcal", "kJ"), default="kcal",
+        help="unit of bmr, tdee and daily_caloric_needs (default: kcal)",
+    )
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    return parser
+
+
+def main(argv=None):
+    """
+    Run the command-line interface.
+
+    Returns:
+        int: Exit status; 0 even when some rows were rejected
+    """
+    args = build_parser().parse_args(argv)
+    input_format = args.input_format or _guess_format(args.input)
+    output_format = args.output_format or _guess_format(args.output, input_format)
+
+    rejected = 0
+    reject_file = _open(args.rejects, "w") if args.rejects else None
+
+    def on_reject(row, reason):
+        nonlocal rejected
+        rejected += 1
+        if reject_file is not None:
+            record = dict(row)
+            record["error"] = reason
+            reject_file.write(json.dumps(record, default=str) + "\n")
+
+    input_file = _open(args.input, "r")
+    output_file = _open(args.output, "w")
+    try:
+        writer = RowWriter(output_file, output_format)
+        rows = stream_calculate(
+            read_rows(input_file, input_format),
+            chunk_size=args.chunk_size,
+            rejects=on_reject,
+            energy_unit=args.energy_unit,
+        )
+        for row in rows:
+            writer.write(row)
+    finally:
+        for file in (input_file, output_file, reject_file):
+            if file is not None and file not in (sys.stdin, sys.stdout):
+                file.close()
+
+    if rejected:
+        print(f"{rejected} row(s) rejected", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
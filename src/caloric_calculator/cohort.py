@@ -0,0 +1,343 @@
+"""
+Streaming cohort statistics with bounded memory.
+
+:class:`CohortAggregator` consumes batches of profiles (or of results the
+batch engine already produced) and keeps, for every combination of sex,
+activity level, weight goal and BMI band, the count, sum, sum of squares,
+minimum, maximum and a fixed-width histogram of each metric. Memory does
+not grow with the number of rows, and aggregators built on different
+workers merge exactly:
+
+    >>> aggregator = CohortAggregator()
+    >>> for chunk in chunks:
+    ...     aggregator.update(*chunk)
+    >>> aggregator.summary(by=("sex", "bmi_band"), quantiles=(0.5, 0.9))
+
+Quantiles are interpolated within histogram bins, so they are within one
+bin width (``DEFAULT_BINS``) of the exact value; counts, means, minimums and
+maximums are exact.
+
+Requires NumPy.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from .batch import calculate_batch, encode_inputs
+from .models import ACTIVITY_LEVELS, SEXES, WEIGHT_GOALS
+from .policy import DEFAULT_POLICY, policy_fingerprint
+
+# The weight get_recommended_weight() picks: actual weight below a BMI of
+# 25, ideal weight from 25 to 29.9 and adjusted weight otherwise. As in the
+# calculator, BMIs between the bands (e.g. 24.95) count as obese.
+BMI_BANDS = ("underweight", "normal", "overweight", "obese")
+
+# Dimensions every aggregate is broken down by, and the labels of their codes
+DIMENSIONS = {
+    "sex": SEXES,
+    "activity_level": ACTIVITY_LEVELS,
+    "weight_goal": WEIGHT_GOALS,
+    "bmi_band": BMI_BANDS,
+}
+
+METRICS = ("bmi", "bmr", "tdee", "daily_caloric_needs")
+
+# Histogram (low, high, bin width) per metric. Values outside [low, high)
+# fall in an underflow or overflow bin bounded by the exact minimum/maximum.
+DEFAULT_BINS = {
+    "bmi": (10.0, 70.0, 0.1),
+    "bmr": (500.0, 4000.0, 5.0),
+    "tdee": (500.0, 8000.0, 10.0),
+    "daily_caloric_needs": (500.0, 10000.0, 10.0),
+}
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+_SHAPE = tuple(len(labels) for labels in DIMENSIONS.values())
+_GROUPS = int(np.prod(_SHAPE))
+
+MetricSummary = namedtuple(
+    "MetricSummary", ["count", "mean", "std", "minimum", "maximum", "quantiles"]
+)
+MetricSummary.__doc__ = """
+Statistics of one metric in one group. ``quantiles`` holds one estimate per
+requested quantile, in the requested order; ``std`` is the population
+standard deviation.
+"""
+
+
+def bmi_bands(bmi):
+    """
+    Get the ``BMI_BANDS`` code of each BMI.
+
+    Args:
+        bmi (ndarray): BMI column, rounded as the calculator rounds it
+
+    Returns:
+        ndarray: int64 band codes
+    """
+    return np.where(
+        bmi < 18.5, 0, np.where(bmi <= 24.9, 1, np.where((bmi >= 25) & (bmi <= 29.9), 2, 3))
+    )
+
+
+class CohortAggregator:
+    """
+    Grouped counts, means and histograms of calculation results.
+
+    Example:
+        >>> aggregator = CohortAggregator()
+        >>> aggregator.update(weight, height, age, sex, activity, goal, amount)
+        >>> median, p90, p99 = aggregator.summary(by=("sex",))[("F",)]["tdee"].quantiles
+    """
+
+    def __init__(self, policy=None, bins=None):
+        """
+        Initialize an empty aggregator.
+
+        Args:
+            policy (CalculationPolicy): Policy :meth:`update` calculates with.
+                Defaults to ``DEFAULT_POLICY``.
+            bins (dict): ``(low, high, width)`` per metric, overriding
+                ``DEFAULT_BINS``. Only aggregators with equal bins and
+                policies can be merged.
+
+        Raises:
+            ValueError: If a metric is unknown or its bins are empty
+        """
+        self.policy = DEFAULT_POLICY if policy is None else policy
+        self.bins = dict(DEFAULT_BINS)
+        for metric, (low, high, width) in (bins or {}).items():
+            if metric not in DEFAULT_BINS:
+                raise ValueError(f"Unknown metric: {metric}. Choose from {METRICS}.")
+            if not (width > 0 and high > low):
+                raise ValueError(f"Invalid bins for {metric}: {(low, high, width)}")
+            self.bins[metric] = (float(low), float(high), float(width))
+        # Inner bin edges; values below the first or from the last one on go
+        # to the underflow or overflow bin
+        self._edges = {
+            metric: low + width * np.arange(int(np.ceil((high - low) / width)) + 1)
+            for metric, (low, high, width) in self.bins.items()
+        }
+        self.counts = np.zeros(_GROUPS, dtype=np.int64)
+        self.sums = {metric: np.zeros(_GROUPS) for metric in METRICS}
+        self.squares = {metric: np.zeros(_GROUPS) for metric in METRICS}
+        self.minimums = {metric: np.full(_GROUPS, np.inf) for metric in METRICS}
+        self.maximums = {metric: np.full(_GROUPS, -np.inf) for metric in METRICS}
+        # Bin 0 is the underflow bin and the last one the overflow bin
+        self.histograms = {
+            metric: np.zeros((_GROUPS, len(self._edges[metric]) + 1), dtype=np.int64)
+            for metric in METRICS
+        }
+
+    def update(
+        self,
+        weight,
+        height,
+        age,
+        sex,
+        activity_level,
+        weight_goal,
+        weight_amount=0.0,
+        body_fat=None,
+    ):
+        """
+        Calculate a batch of profiles and add their results.
+
+        Takes the arguments of :func:`caloric_calculator.batch.calculate_batch`.
+
+        Raises:
+            ValueError: If any row is invalid; nothing is added then
+        """
+        results = calculate_batch(
+            weight, height, age, sex, activity_level, weight_goal, weight_amount,
+            policy=self.policy, body_fat=body_fat,
+        )
+        self.add(results, sex, activity_level, weight_goal)
+
+    def add(self, results, sex, activity_level, weight_goal):
+        """
+        Add results that were already calculated.
+
+        Args:
+            results (dict): Columns of :func:`calculate_batch` or
+                :func:`parallel_calculate`; only ``METRICS`` are read
+            sex (array-like): Sex of each row, as labels or codes
+            activity_level (array-like): Activity level of each row
+            weight_goal (array-like): Weight goal of each row
+
+        Raises:
+            ValueError: If any categorical value is invalid
+        """
+        size = np.size(results["bmi"])
+        if size == 0:
+            return
+        sex_code, activity_code, goal_code = encode_inputs(
+            sex, activity_level, weight_goal, size
+        )
+        group = np.ravel_multi_index(
+            (sex_code, activity_code, goal_code, bmi_bands(results["bmi"])), _SHAPE
+        )
+        self.counts += np.bincount(group, minlength=_GROUPS)
+        for metric in METRICS:
+            values = np.asarray(results[metric], dtype=np.float64)
+            self.sums[metric] += np.bincount(group, weights=values, minlength=_GROUPS)
+            self.squares[metric] += np.bincount(
+                group, weights=values * values, minlength=_GROUPS
+            )
+            np.minimum.at(self.minimums[metric], group, values)
+            np.maximum.at(self.maximums[metric], group, values)
+
+            histogram = self.histograms[metric]
+            histogram += np.bincount(
+                group * histogram.shape[1] + self._bins(metric, values),
+                minlength=histogram.size,
+            ).reshape(histogram.shape)
+
+    def _bins(self, metric, values):
+        """
+        Histogram bin of each value, as ``np.searchsorted(edges, values, "right")``.
+
+        The bin is found arithmetically and then corrected by comparing with
+        its edges, which is several times faster than a binary search.
+        """
+        low, _, width = self.bins[metric]
+        edges = self._edges[metric]
+        last = len(edges) - 1
+        guess = np.clip(np.floor((values - low) / width), 0, last).astype(np.intp)
+        following = np.minimum(guess + 1, last)
+        return guess + (values >= edges[guess]) + ((guess < last) & (values >= edges[following]))
+
+    def merge(self, other):
+        """
+        Add the aggregates of another aggregator, e.g. from a worker process.
+
+        Returns:
+            CohortAggregator: This aggregator
+
+        Raises:
+            ValueError: If the two aggregators use different bins or
+                policies
+        """
+        if other.bins != self.bins:
+            raise ValueError("Cannot merge aggregators with different bins.")
+        # Compared by fingerprint: policies are equal tables, not the same
+        # object, once pickled to or from a worker
+        if policy_fingerprint(other.policy) != policy_fingerprint(self.policy):
+            raise ValueError("Cannot merge aggregators with different policies.")
+        self.counts += other.counts
+        for metric in METRICS:
+            self.sums[metric] += other.sums[metric]
+            self.squares[metric] += other.squares[metric]
+            np.minimum(self.minimums[metric], other.minimums[metric], out=self.minimums[metric])
+            np.maximum(self.maximums[metric], other.maximums[metric], out=self.maximums[metric])
+            self.histograms[metric] += other.histograms[metric]
+        return self
+
+    @property
+    def count(self):
+        """Number of rows added."""
+        return int(self.counts.sum())
+
+    def _reduce(self, by):
+        """Indices of the non-empty groups, keyed by their labels for the dimensions in ``by``."""
+        unknown = set(by) - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(
+                f"Unknown dimension: {sorted(unknown)}. Choose from {tuple(DIMENSIONS)}."
+            )
+        axes = [list(DIMENSIONS).index(name) for name in by]
+        codes = np.unravel_index(np.arange(_GROUPS), _SHAPE)
+        keys = {}
+        for group in np.flatnonzero(self.counts):
+            key = tuple(list(DIMENSIONS.values())[axis][codes[axis][group]] for axis in axes)
+            keys.setdefault(key, []).append(group)
+        return keys
+
+    def histogram(self, metric, **filters):
+        """
+        Get the histogram of one metric over the matching groups.
+
+        Args:
+            metric (str): One of ``METRICS``
+            **filters: Labels to restrict to, e.g. ``sex="F"``,
+                ``bmi_band="obese"``
+
+        Returns:
+            tuple: ``(edges, counts)``; ``counts[i]`` rows fall in
+            ``[edges[i], edges[i + 1])``. The first and last bins hold values
+            below ``low`` and from ``high`` up, bounded by the minimum and
+            maximum seen.
+        """
+        groups = self._reduce(tuple(filters)).get(tuple(filters.values()), [])
+        counts = self.histograms[metric][groups].sum(axis=0)
+        return self._bin_edges(metric, groups), counts
+
+    def _bin_edges(self, metric, groups):
+        """Edges of every bin, closing the outer bins at the minimum and maximum."""
+        inner = self._edges[metric]
+        minimum, maximum = inner[0], inner[-1]
+        if len(groups):
+            minimum = min(minimum, self.minimums[metric][groups].min())
+            maximum = max(maximum, self.maximums[metric][groups].max())
+        return np.concatenate(([minimum], inner, [maximum]))
+
+    def summary(self, by=tuple(DIMENSIONS), quantiles=DEFAULT_QUANTILES, metrics=METRICS):
+        """
+        Get the statistics of each group.
+
+        Args:
+            by (tuple): Dimensions to group by, from ``DIMENSIONS``; groups
+                of the other dimensions are combined. ``()`` summarizes the
+                whole cohort.
+            quantiles (tuple): Quantiles to estimate, each in [0, 1]
+            metrics (tuple): Metrics to summarize
+
+        Returns:
+            dict: ``{metric: MetricSummary}`` keyed by group, a tuple of the
+            labels of ``by``. Groups without rows are left out.
+
+        Raises:
+            ValueError: If a dimension, metric or quantile is invalid
+        """
+        if any(not 0 <= q <= 1 for q in quantiles):
+            raise ValueError(f"Quantiles must be in [0, 1]: {quantiles}")
+        summaries = {}
+        for key, groups in self._reduce(tuple(by)).items():
+            count = int(self.counts[groups].sum())
+            summaries[key] = {}
+            for metric in metrics:
+                if metric not in METRICS:
+                    raise ValueError(f"Unknown metric: {metric}. Choose from {METRICS}.")
+                mean = self.sums[metric][groups].sum() / count
+                variance = max(self.squares[metric][groups].sum() / count - mean * mean, 0.0)
+                minimum = float(self.minimums[metric][groups].min())
+                maximum = float(self.maximums[metric][groups].max())
+                summaries[key][metric] = MetricSummary(
+                    count,
+                    float(mean),
+                    float(np.sqrt(variance)),
+                    minimum,
+                    maximum,
+                    self._quantiles(metric, groups, count, quantiles, minimum, maximum),
+                )
+        return summaries
+
+    def _quantiles(self, metric, groups, count, quantiles, minimum, maximum):
+        """Estimate quantiles by linear interpolation within histogram bins."""
+        counts = self.histograms[metric][groups].sum(axis=0)
+        edges = self._bin_edges(metric, groups)
+        cumulative = np.cumsum(counts)
+        estimates = []
+        for q in quantiles:
+            rank = q * count
+            index = min(int(np.searchsorted(cumulative, rank)), len(counts) - 1)
+            # Skip empty bins so the estimate lands inside occupied ones
+            while counts[index] == 0 and index < len(counts) - 1:
+                index += 1
+            below = cumulative[index] - counts[index]
+            fraction = (rank - below) / counts[index] if counts[index] else 0.0
+            value = edges[index] + fraction * (edges[index + 1] - edges[index])
+            estimates.append(float(min(max(value, minimum), maximum)))
+        return tuple(estimates)
@@ -0,0 +1,264 @@
+"""
+pandas and Apache Arrow integration for the Caloric Calculator.
+
+Input columns are handed to the batch engine as NumPy views of the frame or
+table buffers wherever the column type allows it, and categorical columns
+(pandas ``category`` or Arrow dictionary/string columns) are encoded once per
+distinct value rather than once per row. Parquet files are processed one row
+group at a time, so peak memory is a single row group plus its results.
+
+Requires NumPy, plus pandas or pyarrow for the respective entry points:
+``pip install calorie-calculator[pandas]`` or ``[arrow]``.
+"""
+
+import numpy as np
+
+from .batch import _encode_field, calculate_batch
+from .policy import DEFAULT_POLICY
+from .results import RESULT_FIELDS
+from .stream import INPUT_FIELDS
+from .units import ENERGY_FIELDS
+
+# Result columns appended when ``outputs`` is not given
+DEFAULT_OUTPUT_FIELDS = ("bmi", "bmr", "tdee", "daily_caloric_needs")
+
+_CATEGORICAL_FIELDS = ("sex", "activity_level", "weight_goal")
+
+# Input columns that may be left out
+_OPTIONAL_FIELDS = ("weight_amount", "body_fat")
+
+
+def _source_names(columns, policy):
+    """
+    Map every input field to its column name, applying ``columns`` overrides.
+
+    ``body_fat`` is only read when the policy's BMR formula needs it.
+    """
+    names = {field: field for field in INPUT_FIELDS + ("body_fat",)}
+    if columns:
+        for field in columns:
+            if field not in names:
+                raise ValueError(f"Unknown input field: {field}")
+        names.update(columns)
+    if not (DEFAULT_POLICY if policy is None else policy).formula.requires_body_fat:
+        del names["body_fat"]
+    return names
+
+
+def _numeric(field, values):
+    values = np.asarray(values, dtype=np.float64)
+    if np.isnan(values).any():
+        raise ValueError(f"Column {field} has missing values.")
+    return values
+
+
+def _from_dictionary(field, name, indices, dictionary):
+    """Encode a dictionary column by encoding its distinct values only."""
+    if (indices < 0).any():
+        raise ValueError(f"Column {name} has missing values.")
+    codes = _encode_field(field, np.asarray(dictionary, dtype=object), len(dictionary))
+    return codes[indices]
+
+
+def _check_outputs(outputs):
+    for field in outputs:
+        if field not in RESULT_FIELDS:
+            raise ValueError(f"Unknown output field: {field}")
+
+
+def _calculate(inputs, outputs, policy):
+    _check_outputs(outputs)
+    results = calculate_batch(
+        inputs["weight"],
+        inputs["height"],
+        inputs["age"],
+        inputs["sex"],
+        inputs["activity_level"],
+        inputs["weight_goal"],
+        inputs.get("weight_amount", 0.0),
+        policy=policy,
+        body_fat=inputs.get("body_fat"),
+    )
+    return {field: results[field] for field in outputs}
+
+
+def _frame_inputs(frame, names):
+    inputs = {}
+    for field, name in names.items():
+        if name not in frame:
+            if field in _OPTIONAL_FIELDS:
+                continue
+            raise ValueError(f"Missing input column: {name}")
+        series = frame[name]
+        if field not in _CATEGORICAL_FIELDS:
+            inputs[field] = _numeric(name, series.to_numpy(dtype=np.float64, na_value=np.nan))
+        elif str(series.dtype) == "category":
+            inputs[field] = _from_dictionary(
+                field, name, series.cat.codes.to_numpy(), series.cat.categories
+            )
+        else:
+            codes, uniques = series.factorize()
+            inputs[field] = _from_dictionary(field, name, codes, uniques)
+    return inputs
+
+
+def calculate_frame(frame, outputs=DEFAULT_OUTPUT_FIELDS, columns=None, policy=None):
+    """
+    Calculate every row of a pandas DataFrame.
+
+    Example:
+        >>> scored = calculate_frame(pd.read_parquet("profiles.parquet"))
+        >>> scored[["user_id", "daily_caloric_needs"]]
+
+    Args:
+        frame (DataFrame): One profile per row with columns named after
+            ``INPUT_FIELDS``; ``weight_amount`` is optional and defaults to 0.
+            A ``body_fat`` column is read when the policy's BMR formula
+            needs one.
+        outputs (tuple): ``RESULT_FIELDS`` to append as columns
+        columns (dict): Column names for input fields whose column is not
+            named after the field, e.g. ``{"weight": "weight_kg"}``
+        policy (CalculationPolicy): Tables to calculate with
+
+    Returns:
+        DataFrame: A new frame with the input columns and the ``outputs``
+        columns appended. The input frame is not modified.
+
+    Raises:
+        ValueError: If an input column is missing, has missing values, or
+            any row has an invalid sex, activity level or weight goal
+    """
+    inputs = _frame_inputs(frame, _source_names(columns, policy))
+    results = _calculate(inputs, outputs, policy)
+    return frame.assign(**results)
+
+
+def _arrow_column(field, name, column):
+    """Convert an Arrow column to what ``calculate_batch`` takes."""
+    import pyarrow as pa
+
+    if column.null_count:
+        raise ValueError(f"Column {name} has missing values.")
+    if isinstance(column, pa.ChunkedArray):
+        if column.num_chunks > 1 and pa.types.is_dictionary(column.type):
+            # Chunks may carry different dictionaries; re-encode them as one
+            column = column.cast(column.type.value_type)
+        column = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+    if field in _CATEGORICAL_FIELDS:
+        if pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+            column = column.dictionary_encode()
+        elif not pa.types.is_dictionary(column.type):
+            return column.to_numpy(zero_copy_only=False)
+        return _from_dictionary(
+            field,
+            name,
+            column.indices.to_numpy(zero_copy_only=False),
+            column.dictionary.to_pylist(),
+        )
+    if not (pa.types.is_floating(column.type) or pa.types.is_integer(column.type)):
+        raise ValueError(f"Column {name} is not numeric.")
+    # Zero copy for float64 columns, which cannot hold nulls by now
+    return _numeric(name, column.to_numpy(zero_copy_only=False))
+
+
+def calculate_table(table, outputs=DEFAULT_OUTPUT_FIELDS, columns=None, policy=None):
+    """
+    Calculate every row of a pyarrow Table or RecordBatch.
+
+    Takes the same arguments as :func:`calculate_frame`.
+
+    Returns:
+        Table: A new table with the ``outputs`` columns appended
+
+    Raises:
+        ValueError: If an input column is missing, has missing values, or
+            any row has an invalid sex, activity level or weight goal
+    """
+    import pyarrow as pa
+
+    if isinstance(table, pa.RecordBatch):
+        table = pa.Table.from_batches([table])
+    inputs = {}
+    for field, name in _source_names(columns, policy).items():
+        if name not in table.column_names:
+            if field in _OPTIONAL_FIELDS:
+                continue
+            raise ValueError(f"Missing input column: {name}")
+        inputs[field] = _arrow_column(field, name, table.column(name))
+    results = _calculate(inputs, outputs, policy)
+    for field, values in results.items():
+        table = table.append_column(field, pa.array(values))
+    return table
+
+
+def stream_parquet(source, outputs=DEFAULT_OUTPUT_FIELDS, columns=None, policy=None):
+    """
+    Calculate a Parquet file one row group at a time.
+
+    Args:
+        source: Path or binary file object of the Parquet file
+        outputs (tuple): ``RESULT_FIELDS`` to append as columns
+        columns (dict): Column name overrides as for :func:`calculate_frame`
+        policy (CalculationPolicy): Tables to calculate with
+
+    Yields:
+        Table: Each row group with the ``outputs`` columns appended, in
+        file order
+    """
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(source)
+    for index in range(parquet.num_row_groups):
+        yield calculate_table(
+            parquet.read_row_group(index), outputs=outputs, columns=columns, policy=policy
+        )
+
+
+def calculate_parquet(
+    source, destination, outputs=DEFAULT_OUTPUT_FIELDS, columns=None, policy=None
+):
+    """
+    Calculate a Parquet file into another, keeping one row group in memory.
+
+    Each input row group is written as one output row group. A file
+    without row groups gives a file without row groups, with the output
+    schema.
+
+    Args:
+        source: Path or binary file object of the input file
+        destination: Path or binary file object of the output file
+        outputs (tuple): ``RESULT_FIELDS`` to append as columns
+        columns (dict): Column name overrides as for :func:`calculate_frame`
+        policy (CalculationPolicy): Tables to calculate with
+
+    Returns:
+        int: Number of rows written
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(source)
+    rows = 0
+    writer = None
+    try:
+        for index in range(parquet.num_row_groups):
+            table = calculate_table(
+                parquet.read_row_group(index), outputs=outputs, columns=columns, policy=policy
+            )
+            if writer is None:
+                writer = pq.ParquetWriter(destination, table.schema)
+            writer.write_table(table)
+            rows += table.num_rows
+        if writer is None:
+            _check_outputs(outputs)
+            schema = parquet.schema_arrow
+            for field in outputs:
+                # Energy fields are int64 in batch results, the rest float64
+                schema = schema.append(
+                    pa.field(field, pa.int64() if field in ENERGY_FIELDS else pa.float64())
+                )
+            writer = pq.ParquetWriter(destination, schema)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
@@ -0,0 +1,171 @@
+"""
+Reusable, thread-safe calculation context for hot loops.
+
+:class:`CalculatorContext` compiles a policy once into lookup tables keyed
+by every accepted spelling of each input, so a call does no string
+normalization and no table building, and keeps no per-call state:
+
+    >>> context = CalculatorContext()
+    >>> with ThreadPoolExecutor() as pool:
+    ...     results = list(pool.map(lambda row: context.compute(*row), rows))
+
+A context never changes after construction and ``compute`` only reads it, so
+one context can be shared by any number of threads, including on
+free-threaded CPython builds. Results equal those of :func:`compute`.
+
+Calls through a context are not seen by ``caloric_calculator.instrumentation``.
+"""
+
+from .formulas import _check_body_fat
+from .models import ACTIVITY_LEVELS, GOAL_CODES, SEX_CODES
+from .policy import DEFAULT_POLICY
+from .results import CalculationResult
+from .units import to_centimeters, to_energy_unit, to_kilograms
+
+# Ideal weight base (kg) per sex
+_IDEAL_WEIGHT_BASE = {"M": 50, "F": 45.5}
+
+
+class CalculatorContext:
+    """
+    Immutable, precompiled tables for one policy.
+
+    Example:
+        >>> context = CalculatorContext(DEFAULT_POLICY.replace(minimum_calories={"F": 1400}))
+        >>> context.compute(50, 160, 30, "f", "s", WeightGoal.LOSE, 1.0).daily_caloric_needs
+        1400
+    """
+
+    __slots__ = ("policy", "_sexes", "_activity_factors", "_goal_adjustments", "_formula")
+
+    def __init__(self, policy=None):
+        """
+        Compile the tables of a policy.
+
+        Args:
+            policy (CalculationPolicy): Tables and BMR formula to calculate
+                with. Defaults to ``DEFAULT_POLICY``.
+        """
+        policy = DEFAULT_POLICY if policy is None else policy
+        # (is_male, ideal weight base, calorie floor or None) per spelling
+        sexes = {}
+        for sex, code in SEX_CODES.items():
+            entry = (sex == "M", _IDEAL_WEIGHT_BASE[sex], policy.minimum_calorie_table[code])
+            sexes[sex] = sexes[sex.lower()] = entry
+        # Levels without a factor are left out, so they fail like unknown ones
+        activity_factors = {}
+        for level, factor in zip(ACTIVITY_LEVELS, policy.activity_factor_table):
+            if factor is not None:
+                activity_factors[level] = activity_factors[level.lower()] = factor
+        goal_adjustments = {
+            goal: policy.goal_adjustment_table[code] for goal, code in GOAL_CODES.items()
+        }
+
+        set_attribute = object.__setattr__
+        set_attribute(self, "policy", policy)
+        set_attribute(self, "_sexes", sexes)
+        set_attribute(self, "_activity_factors", activity_factors)
+        set_attribute(self, "_goal_adjustments", goal_adjustments)
+        set_attribute(self, "_formula", policy.formula)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CalculatorContext is immutable; create a new one instead.")
+
+    def __reduce__(self):
+        return (CalculatorContext, (self.policy,))
+
+    def compute(
+        self,
+        weight,
+        height,
+        age,
+        sex,
+        activity_level,
+        weight_goal,
+        weight_amount=0.0,
+        body_fat=None,
+        weight_unit="kg",
+        height_unit="cm",
+        energy_unit="kcal",
+    ):
+        """
+        Calculate every derived value for one profile.
+
+        Takes the same arguments as :func:`caloric_calculator.compute` except
+        ``policy``, which is the context's, and raises the same errors, in the
+        same order.
+
+        Returns:
+            CalculationResult: Derived values for the profile
+
+        Raises:
+            ValueError: If a unit, the sex, activity level, weight goal or a
+                required body fat percentage is invalid
+        """
+        if weight_unit != "kg":
+            weight = to_kilograms(weight, weight_unit)
+        if height_unit != "cm":
+            height = to_centimeters(height, height_unit)
+        weight_amount = float(weight_amount)
+        if body_fat is not None:
+            body_fat = float(body_fat)
+
+        height_m = height / 100
+        bmi = round(weight / (height_m ** 2), 2)
+
+        sex_entry = self._sexes.get(sex)
+        if sex_entry is None:
+            sex_entry = self._sexes.get(sex.upper())
+            if sex_entry is None:
+                raise ValueError("Invalid gender. Please specify 'M' or 'F'.")
+        is_male, ideal_base, floor = sex_entry
+        ideal_weight = round(ideal_base + 2.3 * (height / 2.54 - 60), 2)
+        adjusted_weight = round(ideal_weight + 0.25 * (weight - ideal_weight), 2)
+
+        if bmi <= 24.9:
+            recommended_weight = weight
+        elif 25 <= bmi <= 29.9:
+            recommended_weight = ideal_weight
+        else:
+            recommended_weight = adjusted_weight
+
+        formula = self._formula
+        if formula.requires_body_fat:
+            _check_body_fat(formula, body_fat)
+        bmr = round(formula.scalar(weight, recommended_weight, height, age, is_male, body_fat))
+
+        activity_factor = self._activity_factors.get(activity_level)
+        if activity_factor is None:
+            activity_factor = self._activity_factors.get(activity_level.upper())
+            if activity_factor is None:
+                raise ValueError(f"Invalid activity level: {activity_level.upper()}")
+        tdee = round(bmr * activity_factor)
+
+        adjustments = self._goal_adjustments.get(weight_goal)
+        if adjustments is None:
+            raise ValueError(
+                "Invalid weight goal specified. Choose from WeightGoal enum values."
+            )
+        daily_calories = tdee + adjustments.get(weight_amount, 0)
+        if floor is not None and daily_calories < floor:
+            daily_calories = floor
+
+        daily_calories = round(daily_calories)
+        if energy_unit != "kcal":
+            bmr = to_energy_unit(bmr, energy_unit)
+            tdee = to_energy_unit(tdee, energy_unit)
+            daily_calories = to_energy_unit(daily_calories, energy_unit)
+
+        return CalculationResult(
+            bmi,
+            ideal_weight,
+            adjusted_weight,
+            recommended_weight,
+            bmr,
+            activity_factor,
+            tdee,
+            daily_calories,
+        )
+
+    def __repr__(self):
+        return f"CalculatorContext(policy={self.policy!r})"
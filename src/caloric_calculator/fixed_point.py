@@ -0,0 +1,259 @@
+"""
+Exact fixed-point batch engine.
+
+:func:`calculate_fixed_point` takes the columns of ``calculate_batch`` and
+returns the same results, computed in int64 fixed point instead of chained
+floating-point roundings: weights in 0.0001 kg, height in 0.01 cm, age in
+0.01 years, BMI and derived weights in hundredths, and BMR and TDEE as
+exact fractions rounded by integer division. Every rounding that is not a
+tie is therefore decided exactly, the same way on every platform:
+
+    >>> results = calculate_fixed_point(weight, height, age, sex, activity, goal, amount)
+
+Where the exact value is a tie (such as BMR 1693.5, common with whole-cm
+heights) the floating-point calculator rounds whichever way its own
+representation error falls. By default those steps, and values within 1e-9
+of a tie, are evaluated the way the batch engine does for the affected rows
+only, so results equal ``CaloricCalculator`` everywhere. With
+``ties="even"`` they are rounded half to even on the exact value instead,
+without any floating point; results then differ from the calculator only at
+such ties, and can be reproduced in any language with 64-bit integers.
+
+Rows whose inputs are not exact in these units (e.g. a weight of 70.12345
+kg) or are out of range, activity factors that are not a whole number of
+millionths, and BMR formulas without a ``fixed_point`` kernel are
+calculated with the batch engine. Inputs are in kg and cm.
+
+Requires NumPy.
+"""
+
+import numpy as np
+
+from .batch import (
+    _MALE,
+    _body_fat,
+    _check_numbers,
+    _column,
+    _encode_field,
+    _goal_adjustment,
+    _policy_arrays,
+    calculate_batch,
+    encode_inputs,
+    round2,
+)
+from .models import ACTIVITY_LEVELS
+from .policy import DEFAULT_POLICY
+
+# Fixed-point units per kg of weight, cm of height, year of age, percent of
+# body fat and activity factor of 1
+WEIGHT_SCALE = 10000
+HEIGHT_SCALE = 100
+AGE_SCALE = 100
+BODY_FAT_SCALE = 100
+FACTOR_SCALE = 10 ** 6
+
+# Inclusive input ranges the int64 arithmetic cannot overflow in; rows
+# outside them go to the batch engine
+_LIMITS = {
+    "weight": (0.0001, 10000.0),
+    "height": (1.0, 500.0),
+    "age": (-10000.0, 10000.0),
+}
+
+# Values closer than 1 / _TIE_MARGIN to a rounding boundary, in the unit
+# rounded to, may be rounded either way by floating point
+_TIE_MARGIN = 10 ** 9
+
+# Ideal weight in hundredths of a kg at a height of 0, per sex code:
+# 100 × (50 or 45.5 - 2.3 × 60)
+_IDEAL_WEIGHT_BASE = np.array([-8800, -9250], dtype=np.int64)
+
+TIE_MODES = ("calculator", "even")
+
+
+def _fixed(values, scale, limits):
+    """
+    Values in fixed-point units, and whether each one is exact and in range.
+
+    Other values are replaced by the lower limit, so they cannot overflow
+    or divide by zero before their rows are recalculated.
+    """
+    with np.errstate(invalid="ignore"):
+        scaled = np.rint(values * scale)
+        exact = (scaled / scale == values) & (values >= limits[0]) & (values <= limits[1])
+    return np.where(exact, scaled, round(limits[0] * scale)).astype(np.int64), exact
+
+
+def _round(numerator, denominator):
+    """
+    Round ``numerator / denominator`` to the nearest integer, half to even.
+
+    Returns:
+        tuple: Rounded int64 values, and whether each value is within
+        1 / ``_TIE_MARGIN`` of a tie
+    """
+    quotient, remainder = np.divmod(numerator, denominator)
+    distance = 2 * remainder - denominator
+    rounded = quotient + ((distance > 0) | ((distance == 0) & (quotient & 1 == 1)))
+    return rounded, np.abs(distance) * _TIE_MARGIN < 2 * denominator
+
+
+def _factor_table(activity_factors):
+    """Activity factors in millionths, and whether each one is exact."""
+    with np.errstate(invalid="ignore"):
+        factors = np.rint(activity_factors * FACTOR_SCALE)
+        exact = factors / FACTOR_SCALE == activity_factors
+    return np.where(exact, factors, 0).astype(np.int64), exact
+
+
+def calculate_fixed_point(
+    weight,
+    height,
+    age,
+    sex,
+    activity_level,
+    weight_goal,
+    weight_amount=0.0,
+    policy=None,
+    body_fat=None,
+    energy_unit="kcal",
+    ties="calculator",
+):
+    """
+    Calculate the derived values of :class:`CaloricCalculator` in fixed point.
+
+    Takes the columns of :func:`caloric_calculator.batch.calculate_batch`,
+    in kg and cm, and returns the same arrays.
+
+    Args:
+        policy (CalculationPolicy): Tables and BMR formula to calculate
+            with. Defaults to ``DEFAULT_POLICY``.
+        body_fat (array-like): Body fat percentage, for BMR formulas that
+            need it; ignored otherwise
+        energy_unit (str): Unit of ``bmr``, ``tdee`` and
+            ``daily_caloric_needs``, 'kcal' or 'kJ'
+        ties (str): 'calculator' to round ties (and near ties) as
+            ``CaloricCalculator`` does, or 'even' to round them half to
+            even on the exact value
+
+    Returns:
+        dict: Arrays keyed by ``BATCH_FIELDS``, as from ``calculate_batch``
+
+    Raises:
+        ValueError: If any row has an invalid sex, activity level or weight
+            goal, a weight, height, age or weight amount that is not finite,
+            a weight or height that is not positive, a body fat percentage
+            the formula needs is missing or out of range, or ``ties`` is
+            unknown
+    """
+    if ties not in TIE_MODES:
+        raise ValueError(f"Invalid ties: {ties}. Choose from {TIE_MODES}.")
+    match_calculator = ties == "calculator"
+    size = max(np.size(column) for column in (
+        weight, height, age, sex, activity_level, weight_goal, weight_amount,
+    ))
+    weight = _column(weight, size)
+    height = _column(height, size)
+    age = _column(age, size)
+    weight_amount = _column(weight_amount, size)
+    _check_numbers(weight, height, age, weight_amount)
+    sex_code, activity_code, goal_code = encode_inputs(sex, activity_level, weight_goal, size)
+    energy_code = _encode_field("energy_unit", energy_unit, 1)[0]
+    policy = DEFAULT_POLICY if policy is None else policy
+    formula = policy.formula
+    body_fat = _body_fat(formula, body_fat, size)
+    activity_factors, minimum_calories, goal_adjustments = _policy_arrays(policy)
+    activity_factor = activity_factors[activity_code]
+    if np.isnan(activity_factor).any():
+        missing = activity_code[np.isnan(activity_factor)][0]
+        raise ValueError(f"Invalid activity level: {ACTIVITY_LEVELS[missing]}")
+    if formula.fixed_point is None:
+        return calculate_batch(
+            weight, height, age, sex_code, activity_code, goal_code, weight_amount,
+            policy=policy, body_fat=body_fat, energy_unit=energy_unit,
+        )
+
+    weight_units, exact = _fixed(weight, WEIGHT_SCALE, _LIMITS["weight"])
+    height_units, exact_height = _fixed(height, HEIGHT_SCALE, _LIMITS["height"])
+    age_units, exact_age = _fixed(age, AGE_SCALE, _LIMITS["age"])
+    exact &= exact_height & exact_age
+    body_fat_units = None
+    if body_fat is not None:
+        body_fat_units, exact_body_fat = _fixed(body_fat, BODY_FAT_SCALE, (0.0, 100.0))
+        exact &= exact_body_fat
+    is_male = sex_code == _MALE
+
+    # BMI in hundredths: weight / height² = W × 10⁶ / H² hundredths
+    bmi, near = _round(weight_units * 10 ** 6, height_units * height_units)
+    near &= exact
+    if match_calculator and near.any():
+        rows = np.flatnonzero(near)
+        bmi[rows] = np.rint(round2(weight[rows] / ((height[rows] / 100) ** 2)) * 100)
+
+    # 2.3 × (height / 2.54 - 60) kg = 115 H / 127 - 13800 hundredths; 127 is
+    # odd, so this is never a tie
+    ideal_weight = _IDEAL_WEIGHT_BASE[sex_code] + _round(115 * height_units, 127)[0]
+
+    # (3 × ideal weight + weight) / 4, in hundredths
+    adjusted_weight, tie = _round(300 * ideal_weight + weight_units, 400)
+    tie &= exact
+    if match_calculator and tie.any():
+        rows = np.flatnonzero(tie)
+        ideal = ideal_weight[rows] / 100
+        adjusted_weight[rows] = np.rint(round2(ideal + 0.25 * (weight[rows] - ideal)) * 100)
+
+    uses_weight = bmi <= 2490
+    uses_ideal = (bmi >= 2500) & (bmi <= 2990)
+    recommended_weight = np.where(
+        uses_weight, weight_units, np.where(uses_ideal, ideal_weight, adjusted_weight) * 100
+    )
+
+    numerator, denominator = formula.fixed_point(
+        weight_units, recommended_weight, height_units, age_units, is_male, body_fat_units
+    )
+    bmr, near = _round(numerator, denominator)
+    near &= exact
+    recommended = np.where(
+        uses_weight, weight, np.where(uses_ideal, ideal_weight, adjusted_weight) / 100
+    )
+    if match_calculator and near.any():
+        rows = np.flatnonzero(near)
+        bmr[rows] = np.rint(formula.vectorized(
+            weight[rows], recommended[rows], height[rows], age[rows], is_male[rows],
+            None if body_fat is None else body_fat[rows],
+        ))
+
+    factors, exact_factors = _factor_table(activity_factors)
+    tdee, near = _round(bmr * factors[activity_code], FACTOR_SCALE)
+    near = ((near if match_calculator else False) | ~exact_factors[activity_code]) & exact
+    if near.any():
+        rows = np.flatnonzero(near)
+        tdee[rows] = np.rint(bmr[rows] * activity_factor[rows])
+
+    adjustment = _goal_adjustment(goal_code, weight_amount, goal_adjustments)
+    daily_caloric_needs = np.maximum(tdee + adjustment, minimum_calories[sex_code])
+
+    results = {
+        "bmi": bmi / 100,
+        "ideal_weight": ideal_weight / 100,
+        "adjusted_weight": adjusted_weight / 100,
+        "recommended_weight": recommended,
+        "bmr": bmr,
+        "activity_factor": activity_factor,
+        "tdee": tdee,
+        "daily_caloric_needs": daily_caloric_needs,
+    }
+    if not exact.all():
+        rows = np.flatnonzero(~exact)
+        computed = calculate_batch(
+            weight[rows], height[rows], age[rows], sex_code[rows], activity_code[rows],
+            goal_code[rows], weight_amount[rows], policy=policy,
+            body_fat=None if body_fat is None else body_fat[rows],
+        )
+        for field, values in computed.items():
+            results[field][rows] = values
+    if energy_code:
+        for field in ("bmr", "tdee", "daily_caloric_needs"):
+            # kcal × 4.184 is never a tie, so rounding half up is exact
+            results[field] = (results[field] * 4184 + 500) // 1000
+    return results
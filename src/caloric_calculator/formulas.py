@@ -0,0 +1,188 @@
+"""
+Registry of Basal Metabolic Rate formulas.
+
+A policy selects its BMR formula by name (``CalculationPolicy(bmr_formula=...)``),
+so every calculation path, scalar or bulk, uses the same formula. Each
+formula has two kernels that must agree bit for bit:
+
+- ``scalar(weight, recommended_weight, height, age, is_male, body_fat)``
+  takes floats and a bool;
+- ``vectorized(...)`` takes the same arguments as NumPy arrays.
+
+Both return unrounded kcal/day; callers round to the nearest integer.
+``body_fat`` is a percentage, or None for formulas that do not need it.
+
+A formula may also have a ``fixed_point`` kernel for
+:mod:`caloric_calculator.fixed_point`. It takes int64 arrays in fixed-point
+units (weights in 0.0001 kg, height in 0.01 cm, age in 0.01 years and body
+fat in 0.01 %) and returns ``(numerator, denominator)`` with BMR exactly
+equal to ``numerator / denominator``. Formulas without one are calculated
+in floating point by that module.
+
+Built-in formulas:
+
+    Name             | Weight used        | Body fat
+    mifflin_st_jeor  | Recommended weight | No
+    harris_benedict  | Recommended weight | No
+    katch_mcardle    | Actual weight      | Yes
+
+This module does not import NumPy; vectorized kernels import it when called.
+"""
+
+from collections import namedtuple
+
+BMRFormula = namedtuple(
+    "BMRFormula",
+    ["name", "scalar", "vectorized", "requires_body_fat", "fixed_point"],
+    defaults=(None,),
+)
+BMRFormula.__doc__ = """
+A registered BMR formula: its name, scalar and vectorized kernels, whether
+it needs a body fat percentage, and its optional fixed-point kernel.
+"""
+
+DEFAULT_FORMULA = "mifflin_st_jeor"
+
+# Registered formulas keyed by name
+BMR_FORMULAS = {}
+
+
+def register_formula(name, scalar, vectorized, requires_body_fat=False, fixed_point=None):
+    """
+    Add a BMR formula to the registry.
+
+    Register formulas at import time of the module defining them, so that
+    worker processes which unpickle a policy naming the formula find it too.
+
+    Args:
+        name (str): Name policies select the formula by
+        scalar (callable): Kernel for one profile
+        vectorized (callable): Kernel for NumPy columns; must match
+            ``scalar`` element for element
+        requires_body_fat (bool): Whether the kernels need ``body_fat``
+        fixed_point (callable): Exact integer kernel returning
+            ``(numerator, denominator)``; must match ``scalar`` wherever
+            rounding its result is not a tie
+
+    Returns:
+        BMRFormula: The registered formula
+
+    Raises:
+        ValueError: If a formula with this name is already registered
+    """
+    if name in BMR_FORMULAS:
+        raise ValueError(f"BMR formula already registered: {name}")
+    formula = BMRFormula(name, scalar, vectorized, requires_body_fat, fixed_point)
+    BMR_FORMULAS[name] = formula
+    return formula
+
+
+def get_formula(name):
+    """
+    Look up a registered BMR formula.
+
+    Raises:
+        ValueError: If no formula has this name
+    """
+    try:
+        return BMR_FORMULAS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown BMR formula: {name}. Choose from {sorted(BMR_FORMULAS)}."
+        ) from None
+
+
+def _check_body_fat(formula, body_fat):
+    """Validate the body fat percentage of one profile for ``formula``."""
+    if body_fat is None:
+        raise ValueError(f"The {formula.name} BMR formula requires body_fat.")
+    if not 0 <= body_fat < 100:
+        raise ValueError(f"Invalid body fat percentage: {body_fat}")
+
+
+def _mifflin_st_jeor(weight, recommended_weight, height, age, is_male, body_fat):
+    """
+    For Males: BMR = (10 × W(kg)) + (6.25 × Height (cm)) - (5 × Age(y)) + 5
+    For Females: BMR = (10 × W(kg)) + (6.25 × Height (cm)) - (5 × Age(y)) - 161
+    """
+    bmr = (10 * recommended_weight) + (6.25 * height) - (5 * age)
+    return bmr + 5 if is_male else bmr - 161
+
+
+def _mifflin_st_jeor_vectorized(weight, recommended_weight, height, age, is_male, body_fat):
+    import numpy as np
+
+    bmr = (10 * recommended_weight) + (6.25 * height) - (5 * age)
+    return bmr + np.where(is_male, 5.0, -161.0)
+
+
+def _mifflin_st_jeor_fixed_point(weight, recommended_weight, height, age, is_male, body_fat):
+    """Mifflin-St Jeor in 0.0001 kcal/day."""
+    bmr = 10 * recommended_weight + 625 * height - 500 * age
+    return bmr + is_male * 1660000 - 1610000, 10000
+
+
+# Revised Harris-Benedict coefficients (Roza & Shizgal, 1984):
+# (constant, per kg, per cm, per year) for female and male
+_HARRIS_BENEDICT = (
+    (447.593, 9.247, 3.098, 4.330),
+    (88.362, 13.397, 4.799, 5.677),
+)
+
+
+def _harris_benedict(weight, recommended_weight, height, age, is_male, body_fat):
+    """
+    For Males: BMR = 88.362 + (13.397 × W(kg)) + (4.799 × Height (cm)) - (5.677 × Age(y))
+    For Females: BMR = 447.593 + (9.247 × W(kg)) + (3.098 × Height (cm)) - (4.330 × Age(y))
+    """
+    constant, per_kg, per_cm, per_year = _HARRIS_BENEDICT[is_male]
+    return constant + (per_kg * recommended_weight) + (per_cm * height) - (per_year * age)
+
+
+def _harris_benedict_vectorized(weight, recommended_weight, height, age, is_male, body_fat):
+    import numpy as np
+
+    constant, per_kg, per_cm, per_year = (
+        np.where(is_male, male, female) for female, male in zip(*_HARRIS_BENEDICT)
+    )
+    return constant + (per_kg * recommended_weight) + (per_cm * height) - (per_year * age)
+
+
+def _harris_benedict_fixed_point(weight, recommended_weight, height, age, is_male, body_fat):
+    """Harris-Benedict in 1e-7 kcal/day, from the coefficients in thousandths."""
+    constant, per_kg, per_cm, per_year = (
+        round(female * 1000) + is_male * (round(male * 1000) - round(female * 1000))
+        for female, male in zip(*_HARRIS_BENEDICT)
+    )
+    bmr = constant * 10000 + per_kg * recommended_weight + 100 * (per_cm * height - per_year * age)
+    return bmr, 10 ** 7
+
+
+def _katch_mcardle(weight, recommended_weight, height, age, is_male, body_fat):
+    """
+    BMR = 370 + (21.6 × Lean Body Mass (kg)), where
+    Lean Body Mass = W(kg) × (1 - Body Fat % / 100)
+
+    Lean mass already excludes fat, so the actual weight is used.
+    """
+    return 370 + 21.6 * (weight * (1 - body_fat / 100))
+
+
+def _katch_mcardle_fixed_point(weight, recommended_weight, height, age, is_male, body_fat):
+    """Katch-McArdle in 1e-9 kcal/day."""
+    return 370 * 10 ** 9 + 216 * weight * (10000 - body_fat), 10 ** 9
+
+
+register_formula(
+    DEFAULT_FORMULA, _mifflin_st_jeor, _mifflin_st_jeor_vectorized,
+    fixed_point=_mifflin_st_jeor_fixed_point,
+)
+register_formula(
+    "harris_benedict", _harris_benedict, _harris_benedict_vectorized,
+    fixed_point=_harris_benedict_fixed_point,
+)
+# Pure arithmetic, so the scalar kernel works on arrays unchanged
+register_formula(
+    "katch_mcardle", _katch_mcardle, _katch_mcardle, requires_body_fat=True,
+    fixed_point=_katch_mcardle_fixed_point,
+)
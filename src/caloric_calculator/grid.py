@@ -0,0 +1,493 @@
+"""
+Precomputed population grid with a memory-mapped lookup index.
+
+Real inputs are quantized: weight to 0.1 kg, height to 1 cm and whole years
+of age. ``build_grid`` precomputes BMR for every grid point into a binary
+file, plus two small tables that turn a BMR into TDEE per activity level
+and a TDEE into daily caloric needs per sex and goal step. A lookup is then
+three table reads.
+
+:class:`GridIndex` memory-maps the file read-only, so every process that
+opens the same file shares its pages through the OS page cache. Inputs off
+the grid (or outside its ranges) fall back to direct computation with the
+policy the grid was built with.
+
+File layout: the 8-byte magic, a little-endian uint32 format version and
+uint32 metadata length, the JSON metadata, then the ``bmr``, ``tdee`` and
+``dcn`` arrays at the 64-byte aligned offsets listed in the metadata.
+
+Requires NumPy.
+"""
+
+import json
+import mmap
+import os
+import random
+import struct
+import tempfile
+from collections import namedtuple
+
+import numpy as np
+
+from .batch import _bmr, _column, _policy_arrays, calculate_batch, encode_inputs
+from .calculator import CaloricCalculator, compute
+from .models import (
+    ACTIVITY_CODES,
+    ACTIVITY_LEVELS,
+    GOAL_CODES,
+    SEX_CODES,
+    SEXES,
+    WEIGHT_GOALS,
+    WeightGoal,
+)
+from .policy import DEFAULT_POLICY, CalculationPolicy
+
+MAGIC = b"CALGRID\x00"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sII")
+_ALIGNMENT = 64
+
+# Inclusive default ranges: weight in kg, height in cm, age in years
+DEFAULT_WEIGHT_RANGE = (30.0, 200.0)
+DEFAULT_HEIGHT_RANGE = (130, 220)
+DEFAULT_AGE_RANGE = (18, 90)
+
+GRID_FIELDS = ("bmr", "tdee", "daily_caloric_needs")
+
+GridResult = namedtuple("GridResult", GRID_FIELDS)
+GridResult.__doc__ = "BMR, TDEE and daily caloric needs of one lookup."
+
+
+def _align(offset):
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _smallest_dtype(low, high):
+    for dtype in (np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _goal_steps(policy):
+    """``(goal_code, amount, adjustment)`` per step; step 0 is no adjustment."""
+    steps = [(GOAL_CODES[WeightGoal.MAINTAIN], 0.0, 0)]
+    for code, table in enumerate(policy.goal_adjustment_table):
+        steps.extend((code, amount, adjustment) for amount, adjustment in table.items())
+    return steps
+
+
+def _policy_tables(policy):
+    return {
+        "activity_factors": policy.activity_factors,
+        "weight_loss_adjustments": [list(item) for item in policy.weight_loss_adjustments.items()],
+        "weight_gain_adjustments": [list(item) for item in policy.weight_gain_adjustments.items()],
+        "minimum_calories": policy.minimum_calories,
+        "bmr_formula": policy.bmr_formula,
+    }
+
+
+def _policy_from_tables(tables):
+    return CalculationPolicy(
+        activity_factors=tables["activity_factors"],
+        weight_loss_adjustments=dict(map(tuple, tables["weight_loss_adjustments"])),
+        weight_gain_adjustments=dict(map(tuple, tables["weight_gain_adjustments"])),
+        minimum_calories=tables["minimum_calories"],
+        bmr_formula=tables.get("bmr_formula"),
+    )
+
+
+def build_grid(
+    path,
+    weight_range=DEFAULT_WEIGHT_RANGE,
+    height_range=DEFAULT_HEIGHT_RANGE,
+    age_range=DEFAULT_AGE_RANGE,
+    policy=None,
+    validate=10000,
+    seed=0,
+):
+    """
+    Precompute a grid file.
+
+    The file is written next to ``path`` and only moved into place once it
+    has been checked against :class:`CaloricCalculator` at every corner of
+    the grid and at ``validate`` random points with random activity levels
+    and goal steps.
+
+    Example:
+        >>> build_grid("population.grid", weight_range=(40.0, 150.0))
+        >>> index = GridIndex("population.grid")
+
+    Args:
+        path (str): Output file
+        weight_range (tuple): Inclusive (low, high) weight in kg, stepped by 0.1
+        height_range (tuple): Inclusive (low, high) whole-cm height
+        age_range (tuple): Inclusive (low, high) whole-year age
+        policy (CalculationPolicy): Tables to precompute with
+        validate (int): Random grid points to check; 0 checks only the corners
+        seed (int): Seed for choosing the random points
+
+    Returns:
+        dict: The file's metadata
+
+    Raises:
+        ValueError: If a range is empty, the policy's BMR formula needs a
+            body fat percentage, or the grid disagrees with the calculator
+    """
+    policy = DEFAULT_POLICY if policy is None else policy
+    if policy.formula.requires_body_fat:
+        raise ValueError(
+            f"The {policy.bmr_formula} BMR formula needs body_fat and cannot be precomputed."
+        )
+    weights = (int(round(weight_range[0] * 10)), int(round(weight_range[1] * 10)))
+    heights = (int(height_range[0]), int(height_range[1]))
+    ages = (int(age_range[0]), int(age_range[1]))
+    for low, high in (weights, heights, ages):
+        if low > high:
+            raise ValueError("Grid ranges must have low <= high.")
+    shape = (
+        len(SEXES),
+        heights[1] - heights[0] + 1,
+        ages[1] - ages[0] + 1,
+        weights[1] - weights[0] + 1,
+    )
+
+    # BMR grid, one (age, weight) plane per sex and height
+    weight_axis = np.arange(weights[0], weights[1] + 1) / 10
+    age_axis = np.arange(ages[0], ages[1] + 1, dtype=np.float64)
+    plane_weight = np.tile(weight_axis, len(age_axis))
+    plane_age = np.repeat(age_axis, len(weight_axis))
+    bmr = np.empty(shape, dtype=np.int32)
+    for sex_code in range(len(SEXES)):
+        is_male = np.full(plane_weight.shape, sex_code == SEX_CODES["M"])
+        for row, height in enumerate(range(heights[0], heights[1] + 1)):
+            plane_height = np.full(plane_weight.shape, float(height))
+            bmr[sex_code, row] = _bmr(
+                plane_weight, plane_height, plane_age, is_male, formula=policy.formula
+            )[-1].reshape(shape[2:])
+    bmr_range = (int(bmr.min()), int(bmr.max()))
+
+    # TDEE per activity level and BMR; levels without a factor stay at 0
+    activity_factors, minimum_calories, _ = _policy_arrays(policy)
+    bmr_axis = np.arange(bmr_range[0], bmr_range[1] + 1)
+    tdee = np.zeros((len(ACTIVITY_LEVELS), len(bmr_axis)), dtype=np.int64)
+    for code, factor in enumerate(activity_factors):
+        if not np.isnan(factor):
+            tdee[code] = np.rint(bmr_axis * factor)
+    tdee_range = (int(tdee.min()), int(tdee.max()))
+
+    # Daily caloric needs per sex, goal step and TDEE
+    steps = _goal_steps(policy)
+    tdee_axis = np.arange(tdee_range[0], tdee_range[1] + 1)
+    dcn = np.empty((len(SEXES), len(steps), len(tdee_axis)), dtype=np.int64)
+    for sex_code in range(len(SEXES)):
+        for step, (_, _, adjustment) in enumerate(steps):
+            dcn[sex_code, step] = np.maximum(tdee_axis + adjustment, minimum_calories[sex_code])
+
+    arrays = {}
+    for name, values in (("bmr", bmr), ("tdee", tdee), ("dcn", dcn)):
+        dtype = _smallest_dtype(values.min(), values.max())
+        arrays[name] = (values.astype(dtype.newbyteorder("<")), dtype.newbyteorder("<").str)
+
+    metadata = {
+        "weight": weights,
+        "height": heights,
+        "age": ages,
+        "bmr_min": bmr_range[0],
+        "tdee_min": tdee_range[0],
+        "steps": [[code, amount] for code, amount, _ in steps],
+        "policy": _policy_tables(policy),
+        "arrays": {},
+    }
+    # Offsets depend on the metadata length, which depends on the offsets;
+    # reserve room for them by sizing the header with generous placeholders.
+    for name, (values, dtype) in arrays.items():
+        metadata["arrays"][name] = [2 ** 40, dtype, list(values.shape)]
+    offset = _align(_HEADER.size + len(json.dumps(metadata).encode()))
+    for name, (values, dtype) in arrays.items():
+        metadata["arrays"][name][0] = offset
+        offset = _align(offset + values.nbytes)
+    encoded = json.dumps(metadata).encode()
+
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(encoded)))
+            file.write(encoded)
+            for name, (values, _) in arrays.items():
+                file.seek(metadata["arrays"][name][0])
+                file.write(values.tobytes())
+        with GridIndex(temporary) as index:
+            _check(index, validate, seed)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return metadata
+
+
+def _check(index, samples, seed):
+    """Compare grid lookups with ``CaloricCalculator``."""
+    rng = random.Random(seed)
+    weights, heights, ages = index.ranges
+    steps = index._step_list
+    activity_levels = [ACTIVITY_LEVELS[code] for code in sorted(index._activity_codes)]
+    points = [
+        (weight, height, age, sex, activity_levels[0], 0)
+        for weight in weights for height in heights for age in ages for sex in SEXES
+    ]
+    for _ in range(samples):
+        points.append((
+            rng.randint(*(int(round(value * 10)) for value in weights)) / 10,
+            rng.randint(*heights),
+            rng.randint(*ages),
+            rng.choice(SEXES),
+            rng.choice(activity_levels),
+            rng.randrange(len(steps)),
+        ))
+    for weight, height, age, sex, activity_level, step in points:
+        goal_code, amount = steps[step]
+        arguments = (weight, height, age, sex, activity_level, WEIGHT_GOALS[goal_code], amount)
+        calculator = CaloricCalculator(*arguments, policy=index.policy)
+        expected = GridResult(calculator.bmr, calculator.tdee, calculator.daily_caloric_needs)
+        if index.lookup(*arguments) != expected:
+            raise ValueError(f"Grid disagrees with CaloricCalculator at {arguments}.")
+
+
+class GridIndex:
+    """
+    Read-only, memory-mapped view of a grid file.
+
+    Example:
+        >>> with GridIndex("population.grid") as index:
+        ...     index.lookup(70.5, 175, 30, "M", "MA", WeightGoal.LOSE, 0.5)
+        GridResult(bmr=1654, tdee=2564, daily_caloric_needs=2064)
+
+    Indexes can be passed to worker processes; each one maps the same file
+    again and shares its pages.
+    """
+
+    def __init__(self, path):
+        """
+        Open a grid file.
+
+        Args:
+            path (str): File written by :func:`build_grid`
+
+        Raises:
+            ValueError: If the file is not a grid file of a supported version
+        """
+        self.path = path
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, length = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} grid file.")
+        self.metadata = json.loads(self._mmap[_HEADER.size:_HEADER.size + length])
+        self.policy = _policy_from_tables(self.metadata["policy"])
+
+        self._arrays = {}
+        views = {}
+        for name, (offset, dtype, shape) in self.metadata["arrays"].items():
+            dtype = np.dtype(dtype)
+            count = int(np.prod(shape))
+            self._arrays[name] = np.frombuffer(
+                self._mmap, dtype=dtype, count=count, offset=offset
+            ).reshape(shape)
+            views[name] = memoryview(self._mmap)[offset:offset + count * dtype.itemsize].cast(
+                dtype.char
+            )
+        self._bmr_view = views["bmr"]
+        self._tdee_view = views["tdee"]
+        self._dcn_view = views["dcn"]
+
+        self._weight = tuple(self.metadata["weight"])
+        self._height = tuple(self.metadata["height"])
+        self._age = tuple(self.metadata["age"])
+        sexes, heights, ages, weights = self._arrays["bmr"].shape
+        self._strides = (heights * ages * weights, ages * weights, weights)
+        self._bmr_min = self.metadata["bmr_min"]
+        self._bmr_count = self._arrays["tdee"].shape[1]
+        self._tdee_min = self.metadata["tdee_min"]
+        self._tdee_count = self._arrays["dcn"].shape[2]
+        self._step_list = [(code, amount) for code, amount in self.metadata["steps"]]
+        self._steps = {
+            (code, float(amount)): step for step, (code, amount) in enumerate(self._step_list)
+        }
+        self._step_tables = {}
+        for code in {code for code, _ in self._step_list}:
+            pairs = sorted(
+                (amount, step) for step, (goal, amount) in enumerate(self._step_list)
+                if goal == code
+            )
+            self._step_tables[code] = (
+                np.array([amount for amount, _ in pairs], dtype=np.float64),
+                np.array([step for _, step in pairs], dtype=np.intp),
+            )
+        self._activity_codes = {
+            code for code, factor in enumerate(self.policy.activity_factor_table)
+            if factor is not None
+        }
+
+    @property
+    def ranges(self):
+        """Inclusive (low, high) weight, height and age ranges of the grid."""
+        return (
+            (self._weight[0] / 10, self._weight[1] / 10),
+            self._height,
+            self._age,
+        )
+
+    def _grid_point(self, weight, height, age):
+        """Flat BMR index without the sex term, or None when off the grid."""
+        try:
+            tenths = round(weight * 10)
+            whole_height = int(height)
+            whole_age = int(age)
+        except (TypeError, ValueError, OverflowError):
+            return None
+        if tenths / 10 != weight or whole_height != height or whole_age != age:
+            return None
+        if not (
+            self._weight[0] <= tenths <= self._weight[1]
+            and self._height[0] <= whole_height <= self._height[1]
+            and self._age[0] <= whole_age <= self._age[1]
+        ):
+            return None
+        return (
+            (whole_height - self._height[0]) * self._strides[1]
+            + (whole_age - self._age[0]) * self._strides[2]
+            + tenths - self._weight[0]
+        )
+
+    def lookup(
+        self, weight, height, age, sex, activity_level, weight_goal, weight_amount=0.0
+    ):
+        """
+        Get BMR, TDEE and daily caloric needs for one profile.
+
+        Takes the same arguments as :class:`CaloricCalculator` and returns
+        the same values it would, reading them from the grid when the inputs
+        are on it and computing them otherwise.
+
+        Returns:
+            GridResult: BMR, TDEE and daily caloric needs
+
+        Raises:
+            ValueError: If the inputs are invalid
+        """
+        sex_code = SEX_CODES.get(sex.upper())
+        activity_code = ACTIVITY_CODES.get(activity_level.upper())
+        goal_code = GOAL_CODES.get(weight_goal)
+        point = self._grid_point(weight, height, age)
+        if (
+            point is None or sex_code is None or goal_code is None
+            or activity_code not in self._activity_codes
+        ):
+            result = compute(
+                weight, height, age, sex, activity_level, weight_goal, weight_amount,
+                policy=self.policy,
+            )
+            return GridResult(result.bmr, result.tdee, result.daily_caloric_needs)
+
+        bmr = self._bmr_view[sex_code * self._strides[0] + point]
+        tdee = self._tdee_view[activity_code * self._bmr_count + bmr - self._bmr_min]
+        # Amounts without a step get no adjustment, as in the calculator
+        step = self._steps.get((goal_code, float(weight_amount)), 0)
+        dcn = self._dcn_view[
+            (sex_code * len(self._step_list) + step) * self._tdee_count + tdee - self._tdee_min
+        ]
+        return GridResult(bmr, tdee, dcn)
+
+    def lookup_batch(
+        self, weight, height, age, sex, activity_level, weight_goal, weight_amount=0.0
+    ):
+        """
+        Get BMR, TDEE and daily caloric needs for many profiles.
+
+        Takes the columns of :func:`caloric_calculator.batch.calculate_batch`.
+        Off-grid rows are calculated with ``calculate_batch``.
+
+        Returns:
+            dict: int64 arrays keyed by ``GRID_FIELDS``
+
+        Raises:
+            ValueError: If any row has an invalid sex, activity level or weight goal
+        """
+        size = max(np.size(column) for column in (
+            weight, height, age, sex, activity_level, weight_goal, weight_amount
+        ))
+        weight = _column(weight, size)
+        height = _column(height, size)
+        age = _column(age, size)
+        weight_amount = _column(weight_amount, size)
+        sex_code, activity_code, goal_code = encode_inputs(
+            sex, activity_level, weight_goal, size
+        )
+
+        with np.errstate(invalid="ignore"):
+            tenths = np.rint(weight * 10)
+            on_grid = (
+                (tenths / 10 == weight) & (np.trunc(height) == height) & (np.trunc(age) == age)
+                & (tenths >= self._weight[0]) & (tenths <= self._weight[1])
+                & (height >= self._height[0]) & (height <= self._height[1])
+                & (age >= self._age[0]) & (age <= self._age[1])
+                & np.isin(activity_code, list(self._activity_codes))
+            )
+        all_on_grid = on_grid.all()
+        # Skip the gathers in the common case of every row being on the grid
+        rows = slice(None) if all_on_grid else np.flatnonzero(on_grid)
+        point = (
+            sex_code[rows] * self._strides[0]
+            + (height[rows].astype(np.intp) - self._height[0]) * self._strides[1]
+            + (age[rows].astype(np.intp) - self._age[0]) * self._strides[2]
+            + tenths[rows].astype(np.intp) - self._weight[0]
+        )
+        bmr = self._arrays["bmr"].reshape(-1)[point].astype(np.int64)
+        tdee = self._arrays["tdee"][activity_code[rows], bmr - self._bmr_min].astype(np.int64)
+        step = self._step_codes(goal_code[rows], weight_amount[rows])
+        dcn = self._arrays["dcn"][sex_code[rows], step, tdee - self._tdee_min].astype(np.int64)
+
+        results = {field: np.empty(size, dtype=np.int64) for field in GRID_FIELDS}
+        results["bmr"][rows] = bmr
+        results["tdee"][rows] = tdee
+        results["daily_caloric_needs"][rows] = dcn
+        if not all_on_grid:
+            missing = np.flatnonzero(~on_grid)
+            computed = calculate_batch(
+                weight[missing], height[missing], age[missing], sex_code[missing],
+                activity_code[missing], goal_code[missing], weight_amount[missing],
+                policy=self.policy,
+            )
+            for field in GRID_FIELDS:
+                results[field][missing] = computed[field]
+        return results
+
+    def _step_codes(self, goal_code, weight_amount):
+        """Goal step per row; amounts without a step map to step 0."""
+        step = np.zeros(len(goal_code), dtype=np.intp)
+        for code, (amounts, steps) in self._step_tables.items():
+            rows = np.flatnonzero(goal_code == code)
+            position = np.searchsorted(amounts, weight_amount[rows])
+            position = np.minimum(position, len(amounts) - 1)
+            found = amounts[position] == weight_amount[rows]
+            step[rows[found]] = steps[position[found]]
+        return step
+
+    def close(self):
+        """Unmap the file. Arrays obtained from the index must be released first."""
+        self._bmr_view = self._tdee_view = self._dcn_view = None
+        self._arrays = {}
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __reduce__(self):
+        return (GridIndex, (self.path,))
@@ -0,0 +1,310 @@
+"""
+Opt-in timing instrumentation for the Caloric Calculator.
+
+While a :class:`Recorder` is enabled, the time spent in every derived stage
+(``bmi`` through ``daily_caloric_needs``) and every validation error are
+counted for the scalar calculator, the batch engine and the streaming
+pipeline:
+
+    >>> with instrumented(PrometheusExporter("/var/lib/node_exporter/caloric.prom")):
+    ...     CaloricCalculator(70, 175, 30, "M", "MA", WeightGoal.MAINTAIN)
+
+Enabling swaps timed descriptors onto :class:`CaloricCalculator` and
+disabling puts the originals back, so the scalar path runs the exact same
+code as before when instrumentation is off. The batch and streaming paths
+check for an active recorder once per call or chunk.
+
+Only the current process is instrumented: ``parallel_calculate`` workers
+are not.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from .calculator import CaloricCalculator, _Derived
+from .results import RESULT_FIELDS
+
+StageStats = namedtuple("StageStats", ["calls", "rows", "seconds"])
+StageStats.__doc__ = """
+Counters of one stage on one path.
+
+``seconds`` is the time spent in the stage itself, excluding upstream values
+it had to compute first.
+"""
+
+Snapshot = namedtuple("Snapshot", ["stages", "errors"])
+Snapshot.__doc__ = """
+Copy of a recorder's counters.
+
+``stages`` maps ``(path, stage)`` to :class:`StageStats` and ``errors`` maps
+``(path, stage, error_type)`` to a count. Paths are 'scalar', 'batch' and
+'stream'.
+"""
+
+# Active recorder, read by the batch and streaming paths
+_recorder = None
+_lock = threading.Lock()
+_original_descriptors = {}
+_local = threading.local()
+
+
+def _skip(stage):
+    """Stage marker used while instrumentation is disabled."""
+
+
+class Recorder:
+    """Thread-safe stage timing and error counters."""
+
+    def __init__(self, exporters=()):
+        """
+        Initialize the recorder.
+
+        Args:
+            exporters (iterable): Objects with an ``export(snapshot)`` method,
+                called by :meth:`export`
+        """
+        self.exporters = list(exporters)
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._errors = {}
+
+    def record_stage(self, path, stage, seconds, rows=1):
+        key = (path, stage)
+        with self._lock:
+            calls, total_rows, total_seconds = self._stages.get(key, (0, 0, 0.0))
+            self._stages[key] = StageStats(calls + 1, total_rows + rows, total_seconds + seconds)
+
+    def record_error(self, path, stage, error):
+        key = (path, stage, type(error).__name__)
+        with self._lock:
+            self._errors[key] = self._errors.get(key, 0) + 1
+
+    def timer(self, path, rows):
+        """
+        Start timing a sequence of stages that process ``rows`` rows.
+
+        Returns:
+            callable: ``mark(stage)`` records the time since the previous
+            mark (or since this call) against ``stage``
+        """
+        last = [time.perf_counter()]
+
+        def mark(stage):
+            now = time.perf_counter()
+            self.record_stage(path, stage, now - last[0], rows)
+            last[0] = now
+
+        return mark
+
+    def snapshot(self):
+        """
+        Copy the counters.
+
+        Returns:
+            Snapshot: Stage timings and error counts recorded so far
+        """
+        with self._lock:
+            return Snapshot(dict(self._stages), dict(self._errors))
+
+    def reset(self):
+        """Clear every counter."""
+        with self._lock:
+            self._stages.clear()
+            self._errors.clear()
+
+    def export(self):
+        """Hand a snapshot to every exporter."""
+        snapshot = self.snapshot()
+        for exporter in self.exporters:
+            exporter.export(snapshot)
+
+
+class _TimedDerived(_Derived):
+    """``_Derived`` that reports its compute time to the active recorder."""
+
+    def __init__(self, method, name):
+        self.method = method
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            return instance._derived[self.name]
+        except KeyError:
+            pass
+        # Time nested stages separately so each stage reports its own cost
+        nested = _local.__dict__.setdefault("nested", [])
+        nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            value = getattr(instance, self.method)()
+        except Exception as error:
+            if getattr(_local, "error", None) is not error:
+                _local.error = error
+                _record_error("scalar", self.name, error)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            inner = nested.pop()
+            if nested:
+                nested[-1] += elapsed
+            else:
+                _local.error = None
+        recorder = _recorder
+        if recorder is not None:
+            recorder.record_stage("scalar", self.name, elapsed - inner)
+        instance._derived[self.name] = value
+        return value
+
+
+def _record_error(path, stage, error):
+    recorder = _recorder
+    if recorder is not None:
+        recorder.record_error(path, stage, error)
+
+
+def active():
+    """
+    Get the enabled recorder.
+
+    Returns:
+        Recorder: The recorder enabled with :func:`enable`, or None
+    """
+    return _recorder
+
+
+def enable(recorder=None):
+    """
+    Start recording stage timings and validation errors.
+
+    Args:
+        recorder (Recorder): Recorder to report to. A new one is created when
+            omitted. Replaces any recorder that is already enabled.
+
+    Returns:
+        Recorder: The enabled recorder
+    """
+    global _recorder
+    if recorder is None:
+        recorder = Recorder()
+    with _lock:
+        if not _original_descriptors:
+            for field in RESULT_FIELDS:
+                descriptor = CaloricCalculator.__dict__[field]
+                _original_descriptors[field] = descriptor
+                setattr(CaloricCalculator, field, _TimedDerived(descriptor.method, field))
+        _recorder = recorder
+    return recorder
+
+
+def disable():
+    """
+    Stop recording and restore the uninstrumented calculator.
+
+    Returns:
+        Recorder: The recorder that was enabled, or None
+    """
+    global _recorder
+    with _lock:
+        recorder, _recorder = _recorder, None
+        for field, descriptor in _original_descriptors.items():
+            setattr(CaloricCalculator, field, descriptor)
+        _original_descriptors.clear()
+    return recorder
+
+
+@contextmanager
+def instrumented(*exporters):
+    """
+    Record for the duration of a ``with`` block, then export.
+
+    Args:
+        *exporters: Exporters the recorder hands its snapshot to on exit
+
+    Yields:
+        Recorder: The enabled recorder
+    """
+    recorder = enable(Recorder(exporters))
+    try:
+        yield recorder
+    finally:
+        disable()
+        recorder.export()
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_prometheus(snapshot, prefix="caloric_calculator"):
+    """
+    Render a snapshot in the Prometheus text exposition format.
+
+    Args:
+        snapshot (Snapshot): Counters to render
+        prefix (str): Metric name prefix
+
+    Returns:
+        str: Exposition text ending in a newline
+    """
+    lines = []
+    metrics = (
+        ("stage_seconds_total", "Seconds spent computing each stage.", "seconds"),
+        ("stage_calls_total", "Times each stage was computed.", "calls"),
+        ("stage_rows_total", "Rows processed by each stage.", "rows"),
+    )
+    for name, help_text, attribute in metrics:
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} counter")
+        for (path, stage), stats in sorted(snapshot.stages.items()):
+            value = getattr(stats, attribute)
+            lines.append(
+                f'{prefix}_{name}{{path="{_label(path)}",stage="{_label(stage)}"}} {value!r}'
+            )
+    lines.append(f"# HELP {prefix}_errors_total Validation errors by stage and type.")
+    lines.append(f"# TYPE {prefix}_errors_total counter")
+    for (path, stage, error), count in sorted(snapshot.errors.items()):
+        lines.append(
+            f'{prefix}_errors_total{{path="{_label(path)}",stage="{_label(stage)}",'
+            f'error="{_label(error)}"}} {count}'
+        )
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusExporter:
+    """
+    Write snapshots to a file in the Prometheus text format.
+
+    The file is replaced atomically, as the node exporter textfile collector
+    expects.
+    """
+
+    def __init__(self, path, prefix="caloric_calculator"):
+        self.path = path
+        self.prefix = prefix
+
+    def export(self, snapshot):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w") as file:
+                file.write(format_prometheus(snapshot, self.prefix))
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+
+class CallbackExporter:
+    """Pass snapshots to a plain callable."""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def export(self, snapshot):
+        self.callback(snapshot)
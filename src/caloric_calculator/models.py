@@ -5,3 +5,14 @@ class WeightGoal(Enum):
     MAINTAIN = "maintain"
     LOSE = "lose"
     GAIN = "gain"
+
+
+# Integer codes for categorical inputs. A value's code is its position in the
+# tuple; batch and streaming callers may pass these small ints directly.
+SEXES = ("M", "F")
+ACTIVITY_LEVELS = ("S", "LA", "MA", "VA", "SA")
+WEIGHT_GOALS = (WeightGoal.MAINTAIN, WeightGoal.LOSE, WeightGoal.GAIN)
+
+SEX_CODES = {sex: code for code, sex in enumerate(SEXES)}
+ACTIVITY_CODES = {level: code for code, level in enumerate(ACTIVITY_LEVELS)}
+GOAL_CODES = {goal: code for code, goal in enumerate(WEIGHT_GOALS)}
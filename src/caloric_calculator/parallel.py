@@ -0,0 +1,220 @@
+"""
+Multi-core batch computation for the Caloric Calculator.
+
+Input columns are encoded once, copied into a single shared memory block and
+split into chunks across a process pool. Workers run the batch engine on
+their slice and write results straight into a shared output block, so no
+per-row objects are pickled and results come back in input order.
+
+Requires NumPy and Python 3.8+.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .batch import (
+    _CENTIMETERS_PER_UNIT,
+    _KILOGRAMS_PER_UNIT,
+    _body_fat,
+    _check_numbers,
+    _column,
+    _encode_field,
+    _to_energy_unit,
+    _to_metric,
+    calculate_batch,
+    encode_inputs,
+)
+from .fixed_point import calculate_fixed_point
+from .policy import DEFAULT_POLICY
+from .results import RESULT_FIELDS
+
+DEFAULT_CHUNK_SIZE = 100000
+
+# Below this many rows the pool start-up costs more than it saves
+DEFAULT_MIN_PARALLEL_SIZE = 250000
+
+_INPUT_DTYPES = (
+    ("weight", np.float64),
+    ("height", np.float64),
+    ("age", np.float64),
+    ("weight_amount", np.float64),
+    ("body_fat", np.float64),
+    ("sex", np.int8),
+    ("activity_level", np.int8),
+    ("weight_goal", np.int8),
+)
+_OUTPUT_DTYPES = tuple(
+    (field, np.int64 if field in ("bmr", "tdee", "daily_caloric_needs") else np.float64)
+    for field in RESULT_FIELDS
+)
+# 8-byte columns first so every column stays aligned
+_LAYOUT = _OUTPUT_DTYPES + _INPUT_DTYPES
+
+# Set in each worker by _attach()
+_worker_memory = None
+_worker_columns = None
+_worker_policy = None
+_worker_calculate = None
+
+
+def _block_size(size):
+    return sum(np.dtype(dtype).itemsize for _, dtype in _LAYOUT) * size
+
+
+def _columns(buffer, size):
+    """Map every input and output field onto its slice of ``buffer``."""
+    columns = {}
+    offset = 0
+    for field, dtype in _LAYOUT:
+        columns[field] = np.ndarray(size, dtype=dtype, buffer=buffer, offset=offset)
+        offset += np.dtype(dtype).itemsize * size
+    return columns
+
+
+def _attach(name, size, policy, fixed_point=False):
+    global _worker_memory, _worker_columns, _worker_policy, _worker_calculate
+    _worker_memory = shared_memory.SharedMemory(name=name)
+    _worker_columns = _columns(_worker_memory.buf, size)
+    _worker_policy = policy
+    _worker_calculate = calculate_fixed_point if fixed_point else calculate_batch
+
+
+def _calculate_slice(start, stop):
+    columns = _worker_columns
+    results = _worker_calculate(
+        columns["weight"][start:stop],
+        columns["height"][start:stop],
+        columns["age"][start:stop],
+        columns["sex"][start:stop],
+        columns["activity_level"][start:stop],
+        columns["weight_goal"][start:stop],
+        columns["weight_amount"][start:stop],
+        policy=_worker_policy,
+        body_fat=columns["body_fat"][start:stop],
+    )
+    for field in RESULT_FIELDS:
+        columns[field][start:stop] = results[field]
+    return stop - start
+
+
+def parallel_calculate(
+    weight,
+    height,
+    age,
+    sex,
+    activity_level,
+    weight_goal,
+    weight_amount=0.0,
+    policy=None,
+    workers=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    min_parallel_size=DEFAULT_MIN_PARALLEL_SIZE,
+    mp_context=None,
+    body_fat=None,
+    weight_unit="kg",
+    height_unit="cm",
+    energy_unit="kcal",
+    fixed_point=False,
+):
+    """
+    Calculate the derived values for many profiles across a process pool.
+
+    Takes the same columns as :func:`caloric_calculator.batch.calculate_batch`
+    and returns the same arrays.
+
+    Args:
+        policy (CalculationPolicy): Tables to calculate with
+        workers (int): Worker processes; defaults to the number of CPUs
+        chunk_size (int): Rows per task handed to a worker
+        min_parallel_size (int): Inputs with fewer rows are calculated in
+            this process with ``calculate_batch``
+        mp_context: ``multiprocessing`` context used to start workers
+        body_fat (array-like): Body fat percentage, for BMR formulas that
+            need it
+        weight_unit (array-like): 'kg' or 'lb', for all rows or per row
+        height_unit (array-like): 'cm', 'in' or 'ft', for all rows or per row
+        energy_unit (str): Unit of ``bmr``, ``tdee`` and
+            ``daily_caloric_needs``, 'kcal' or 'kJ'
+        fixed_point (bool): Calculate with
+            :func:`caloric_calculator.fixed_point.calculate_fixed_point`
+            instead of the floating-point batch engine
+
+    Returns:
+        dict: Arrays keyed by ``RESULT_FIELDS``, in input order
+
+    Raises:
+        ValueError: If any row has an invalid sex, activity level, weight
+            goal or unit, an invalid weight, height, age or weight amount,
+            or an invalid body fat percentage
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+    workers = workers or os.cpu_count() or 1
+    size = max(np.size(column) for column in (
+        weight, height, age, sex, activity_level, weight_goal, weight_amount,
+        weight_unit, height_unit,
+    ))
+    if fixed_point and (workers == 1 or size < max(min_parallel_size, 2)):
+        weight = _to_metric(
+            _column(weight, size), weight_unit, "weight_unit", _KILOGRAMS_PER_UNIT, size
+        )
+        height = _to_metric(
+            _column(height, size), height_unit, "height_unit", _CENTIMETERS_PER_UNIT, size
+        )
+        return calculate_fixed_point(
+            weight, height, age, sex, activity_level, weight_goal, weight_amount,
+            policy=policy, body_fat=body_fat, energy_unit=energy_unit,
+        )
+    if workers == 1 or size < max(min_parallel_size, 2):
+        return calculate_batch(
+            weight, height, age, sex, activity_level, weight_goal, weight_amount,
+            policy=policy, body_fat=body_fat, weight_unit=weight_unit,
+            height_unit=height_unit, energy_unit=energy_unit,
+        )
+
+    # Encode in the parent so invalid rows raise here, before any work is shipped
+    codes = encode_inputs(sex, activity_level, weight_goal, size)
+    body_fat = _body_fat((DEFAULT_POLICY if policy is None else policy).formula, body_fat, size)
+    energy_code = _encode_field("energy_unit", energy_unit, 1)[0]
+    # Workers calculate in kg, cm and kcal
+    inputs = {
+        "weight": _to_metric(
+            _column(weight, size), weight_unit, "weight_unit", _KILOGRAMS_PER_UNIT, size
+        ),
+        "height": _to_metric(
+            _column(height, size), height_unit, "height_unit", _CENTIMETERS_PER_UNIT, size
+        ),
+        "age": _column(age, size),
+        "weight_amount": _column(weight_amount, size),
+        # Unused by formulas without body fat; NaN keeps the layout fixed
+        "body_fat": np.nan if body_fat is None else body_fat,
+        "sex": codes[0],
+        "activity_level": codes[1],
+        "weight_goal": codes[2],
+    }
+    _check_numbers(inputs["weight"], inputs["height"], inputs["age"], inputs["weight_amount"])
+
+    memory = shared_memory.SharedMemory(create=True, size=_block_size(size))
+    columns = None
+    try:
+        columns = _columns(memory.buf, size)
+        for field, values in inputs.items():
+            columns[field][:] = values
+        bounds = [(start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(bounds)),
+            mp_context=mp_context,
+            initializer=_attach,
+            initargs=(memory.name, size, policy, fixed_point),
+        ) as executor:
+            list(executor.map(_calculate_slice, *zip(*bounds)))
+        results = {field: columns[field].copy() for field in RESULT_FIELDS}
+    finally:
+        # Views into the block must be released before it can be closed
+        columns = None
+        memory.close()
+        memory.unlink()
+    return _to_energy_unit(results, energy_code)
@@ -0,0 +1,245 @@
+"""
+Calculation policy for the Caloric Calculator.
+
+A policy holds the tables behind the activity factors, the weight goal
+caloric adjustments and the minimum calorie floors, plus the name of the BMR
+formula. Tables are compiled once when the policy is created, so
+calculations do no per-call allocation, and a custom policy can be passed
+wherever a calculation happens instead of subclassing the calculator.
+"""
+
+from .formulas import DEFAULT_FORMULA, get_formula
+from .models import ACTIVITY_LEVELS, GOAL_CODES, SEXES, WeightGoal
+
+DEFAULT_ACTIVITY_FACTORS = {
+    "S": 1.2,
+    "LA": 1.375,
+    "MA": 1.55,
+    "VA": 1.725,
+    "SA": 1.9,
+}
+
+# Bump when a release changes results for unchanged inputs, so every stored
+# fingerprint goes stale and all users are recomputed once
+FINGERPRINT_VERSION = 1
+
+# Caloric adjustments for weight loss (kcal/day) keyed by kg/week
+DEFAULT_WEIGHT_LOSS_ADJUSTMENTS = {
+    0.25: 250,
+    0.5: 500,
+    0.75: 750,
+    1.0: 1000,
+    1.5: 1500,
+    2.0: 2000,
+    2.5: 2500,
+}
+
+# Caloric adjustments for weight gain (kcal/day) keyed by kg/week
+DEFAULT_WEIGHT_GAIN_ADJUSTMENTS = {
+    0.25: 250,
+    0.5: 500,
+    0.75: 750,
+    1.0: 1000,
+}
+
+# Minimum safe calorie thresholds (kcal/day)
+DEFAULT_MINIMUM_CALORIES = {
+    "F": 1300,
+    "M": 1500,
+}
+
+
+def _check_keys(table, allowed, name):
+    unknown = set(table) - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown {name} in policy: {sorted(unknown, key=str)}")
+
+
+class CalculationPolicy:
+    """
+    Immutable set of tables used by every calculation path.
+
+    Example:
+        >>> strict = DEFAULT_POLICY.replace(minimum_calories={"F": 1400, "M": 1600})
+        >>> CaloricCalculator(..., policy=strict)
+    """
+
+    __slots__ = (
+        "activity_factors",
+        "weight_loss_adjustments",
+        "weight_gain_adjustments",
+        "minimum_calories",
+        "bmr_formula",
+        "formula",
+        "activity_factor_table",
+        "goal_adjustment_table",
+        "minimum_calorie_table",
+    )
+
+    def __init__(
+        self,
+        activity_factors=None,
+        weight_loss_adjustments=None,
+        weight_gain_adjustments=None,
+        minimum_calories=None,
+        bmr_formula=None,
+    ):
+        """
+        Initialize the policy. Omitted tables use the defaults.
+
+        Args:
+            activity_factors (dict): Factor keyed by activity level code
+            weight_loss_adjustments (dict): kcal/day deficit keyed by kg/week
+            weight_gain_adjustments (dict): kcal/day surplus keyed by kg/week
+            minimum_calories (dict): kcal/day floor keyed by sex ('M'/'F');
+                a sex left out has no floor
+            bmr_formula (str): Name of a formula in
+                ``caloric_calculator.formulas.BMR_FORMULAS``. Defaults to
+                'mifflin_st_jeor'.
+
+        Raises:
+            ValueError: If a table has unknown keys or the formula is unknown
+        """
+        if activity_factors is None:
+            activity_factors = DEFAULT_ACTIVITY_FACTORS
+        if weight_loss_adjustments is None:
+            weight_loss_adjustments = DEFAULT_WEIGHT_LOSS_ADJUSTMENTS
+        if weight_gain_adjustments is None:
+            weight_gain_adjustments = DEFAULT_WEIGHT_GAIN_ADJUSTMENTS
+        if minimum_calories is None:
+            minimum_calories = DEFAULT_MINIMUM_CALORIES
+        if bmr_formula is None:
+            bmr_formula = DEFAULT_FORMULA
+        _check_keys(activity_factors, ACTIVITY_LEVELS, "activity levels")
+        _check_keys(minimum_calories, SEXES, "sexes")
+
+        set_attribute = object.__setattr__
+        set_attribute(self, "activity_factors", dict(activity_factors))
+        set_attribute(self, "weight_loss_adjustments", {
+            float(amount): calories
+            for amount, calories in weight_loss_adjustments.items()
+        })
+        set_attribute(self, "weight_gain_adjustments", {
+            float(amount): calories
+            for amount, calories in weight_gain_adjustments.items()
+        })
+        set_attribute(self, "minimum_calories", dict(minimum_calories))
+        set_attribute(self, "bmr_formula", bmr_formula)
+        set_attribute(self, "formula", get_formula(bmr_formula))
+
+        # Code-indexed tables: None marks an activity level without a factor
+        # or a sex without a floor.
+        set_attribute(self, "activity_factor_table", tuple(
+            self.activity_factors.get(level) for level in ACTIVITY_LEVELS
+        ))
+        # Signed adjustment per weight goal code, keyed by kg/week
+        goal_adjustment_table = [None] * len(GOAL_CODES)
+        goal_adjustment_table[GOAL_CODES[WeightGoal.MAINTAIN]] = {}
+        goal_adjustment_table[GOAL_CODES[WeightGoal.LOSE]] = {
+            amount: -calories for amount, calories in self.weight_loss_adjustments.items()
+        }
+        goal_adjustment_table[GOAL_CODES[WeightGoal.GAIN]] = dict(
+            self.weight_gain_adjustments
+        )
+        set_attribute(self, "goal_adjustment_table", tuple(goal_adjustment_table))
+        set_attribute(self, "minimum_calorie_table", tuple(
+            self.minimum_calories.get(sex) for sex in SEXES
+        ))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CalculationPolicy is immutable; use replace() instead.")
+
+    def __reduce__(self):
+        return (
+            CalculationPolicy,
+            (
+                self.activity_factors,
+                self.weight_loss_adjustments,
+                self.weight_gain_adjustments,
+                self.minimum_calories,
+                self.bmr_formula,
+            ),
+        )
+
+    def replace(self, **changes):
+        """
+        Create a copy of this policy with some tables swapped.
+
+        Args:
+            **changes: Any of the constructor arguments
+
+        Returns:
+            CalculationPolicy: New policy
+        """
+        tables = {
+            "activity_factors": self.activity_factors,
+            "weight_loss_adjustments": self.weight_loss_adjustments,
+            "weight_gain_adjustments": self.weight_gain_adjustments,
+            "minimum_calories": self.minimum_calories,
+            "bmr_formula": self.bmr_formula,
+        }
+        tables.update(changes)
+        return CalculationPolicy(**tables)
+
+    def activity_factor(self, activity_code):
+        """
+        Get the activity factor for an activity level code.
+
+        Raises:
+            ValueError: If the policy has no factor for the activity level
+        """
+        factor = self.activity_factor_table[activity_code]
+        if factor is None:
+            raise ValueError(f"Invalid activity level: {ACTIVITY_LEVELS[activity_code]}")
+        return factor
+
+    def goal_adjustment(self, goal_code, weight_amount):
+        """
+        Get the signed kcal/day adjustment for a goal code and weekly amount.
+
+        Unsupported amounts map to no adjustment.
+        """
+        return self.goal_adjustment_table[goal_code].get(weight_amount, 0)
+
+    def apply_minimum(self, sex_code, daily_calories):
+        """Raise ``daily_calories`` to the floor for a sex code, if it has one."""
+        floor = self.minimum_calorie_table[sex_code]
+        if floor is None:
+            return daily_calories
+        return max(daily_calories, floor)
+
+    def __repr__(self):
+        return (
+            "CalculationPolicy("
+            f"activity_factors={self.activity_factors!r}, "
+            f"weight_loss_adjustments={self.weight_loss_adjustments!r}, "
+            f"weight_gain_adjustments={self.weight_gain_adjustments!r}, "
+            f"minimum_calories={self.minimum_calories!r}, "
+            f"bmr_formula={self.bmr_formula!r})"
+        )
+
+
+DEFAULT_POLICY = CalculationPolicy()
+
+
+def policy_fingerprint(policy=None):
+    """
+    Digest of everything in a policy that affects results.
+
+    Returns:
+        bytes: 16-byte digest, equal for policies with equal tables and formula
+    """
+    # Imported here so importing the package does not load them
+    import hashlib
+    import json
+
+    policy = DEFAULT_POLICY if policy is None else policy
+    tables = {
+        "version": FINGERPRINT_VERSION,
+        "activity_factors": sorted(policy.activity_factors.items()),
+        "weight_loss_adjustments": sorted(policy.weight_loss_adjustments.items()),
+        "weight_gain_adjustments": sorted(policy.weight_gain_adjustments.items()),
+        "minimum_calories": sorted(policy.minimum_calories.items()),
+        "bmr_formula": policy.bmr_formula,
+    }
+    return hashlib.blake2b(json.dumps(tables).encode(), digest_size=16).digest()
@@ -0,0 +1,155 @@
+"""
+Compact result types for the Caloric Calculator.
+
+``CalculationResult`` is an immutable, slotted record of the derived values
+for one profile. ``ResultSet`` stores many results column-wise in typed
+arrays, costing 64 bytes per profile instead of a full calculator instance.
+"""
+
+from array import array
+from collections import namedtuple
+
+RESULT_FIELDS = (
+    "bmi",
+    "ideal_weight",
+    "adjusted_weight",
+    "recommended_weight",
+    "bmr",
+    "activity_factor",
+    "tdee",
+    "daily_caloric_needs",
+)
+
+# array typecodes: 'd' for float fields, 'q' for the integer kcal fields
+_TYPECODES = {
+    "bmi": "d",
+    "ideal_weight": "d",
+    "adjusted_weight": "d",
+    "recommended_weight": "d",
+    "bmr": "q",
+    "activity_factor": "d",
+    "tdee": "q",
+    "daily_caloric_needs": "q",
+}
+
+# Buffer formats that can be copied into each typecode without conversion
+_BUFFER_FORMATS = {"d": ("d",), "q": ("q", "l")}
+
+
+class CalculationResult(namedtuple("CalculationResult", RESULT_FIELDS)):
+    """
+    Immutable record of the derived values for one profile.
+
+    Fields follow ``RESULT_FIELDS`` and can be read by name, by index or by
+    unpacking.
+    """
+
+    __slots__ = ()
+
+    @property
+    def caloric_requirements(self):
+        """Backward compatibility alias for ``tdee``."""
+        return self.tdee
+
+
+def _to_array(typecode, values):
+    """Copy ``values`` into a typed array, via the buffer protocol when possible."""
+    try:
+        view = memoryview(values)
+    except TypeError:
+        return array(typecode, values)
+    if view.format in _BUFFER_FORMATS[typecode] and view.itemsize == 8 and view.ndim == 1:
+        column = array(typecode)
+        column.frombytes(view.cast("B") if view.c_contiguous else view.tobytes())
+        return column
+    return array(typecode, values)
+
+
+class ResultSet:
+    """
+    Column-wise container of calculation results backed by typed arrays.
+
+    Indexing with an integer returns a :class:`CalculationResult`; slicing
+    returns a new ``ResultSet``. Columns are exposed through :meth:`column`
+    and support the buffer protocol, so ``numpy.frombuffer`` can view them
+    without copying.
+    """
+
+    __slots__ = ("_columns",)
+
+    def __init__(self, results=()):
+        """
+        Initialize the result set.
+
+        Args:
+            results (iterable): CalculationResult records (or equivalent
+                tuples in ``RESULT_FIELDS`` order) to store
+        """
+        self._columns = {field: array(_TYPECODES[field]) for field in RESULT_FIELDS}
+        self.extend(results)
+
+    @classmethod
+    def from_columns(cls, columns):
+        """
+        Build a result set from one sequence per field.
+
+        Args:
+            columns (mapping): Sequences keyed by ``RESULT_FIELDS``, such as
+                the arrays returned by ``calculate_batch``
+
+        Returns:
+            ResultSet: New result set holding a copy of the columns
+        """
+        result_set = cls()
+        lengths = set()
+        for field in RESULT_FIELDS:
+            column = _to_array(_TYPECODES[field], columns[field])
+            result_set._columns[field] = column
+            lengths.add(len(column))
+        if len(lengths) > 1:
+            raise ValueError("All result columns must have the same length.")
+        return result_set
+
+    def append(self, result):
+        """Append one result record."""
+        if len(result) != len(RESULT_FIELDS):
+            raise ValueError(f"Expected {len(RESULT_FIELDS)} result fields, got {len(result)}.")
+        for field, value in zip(RESULT_FIELDS, result):
+            self._columns[field].append(value)
+
+    def extend(self, results):
+        """Append every record in ``results``."""
+        for result in results:
+            self.append(result)
+
+    def column(self, field):
+        """
+        Get the typed array holding one field.
+
+        Args:
+            field (str): One of ``RESULT_FIELDS``
+
+        Returns:
+            array.array: Column values
+        """
+        return self._columns[field]
+
+    def __len__(self):
+        return len(self._columns["bmi"])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            result_set = ResultSet()
+            result_set._columns = {
+                field: column[index] for field, column in self._columns.items()
+            }
+            return result_set
+        return CalculationResult(*(self._columns[field][index] for field in RESULT_FIELDS))
+
+    def __iter__(self):
+        columns = [self._columns[field] for field in RESULT_FIELDS]
+        for values in zip(*columns):
+            yield CalculationResult(*values)
+
+    def __repr__(self):
+        return f"<ResultSet of {len(self)} results>"
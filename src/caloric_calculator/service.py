@@ -0,0 +1,239 @@
+"""
+Asyncio front-end for the Caloric Calculator.
+
+Concurrent ``await service.calculate(profile)`` calls are collected for a
+short window and calculated together in one vectorized batch. Identical
+requests that are already in flight share a single result instead of being
+queued again.
+"""
+
+import asyncio
+import bisect
+import math
+import time
+from collections import namedtuple
+
+from .cache import make_key
+from .calculator import compute
+from .formulas import _check_body_fat
+from .models import ACTIVITY_CODES, GOAL_CODES, SEX_CODES
+from .policy import DEFAULT_POLICY
+from .results import RESULT_FIELDS, CalculationResult
+
+try:
+    from .batch import calculate_batch
+except ImportError:  # NumPy not installed: fall back to the scalar path
+    calculate_batch = None
+
+# Upper bounds (seconds) of the request latency histogram buckets
+DEFAULT_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+ServiceMetrics = namedtuple(
+    "ServiceMetrics",
+    [
+        "requests",
+        "coalesced",
+        "batches",
+        "rows_calculated",
+        "queue_depth",
+        "max_queue_depth",
+        "latency_buckets",
+        "latency_counts",
+        "latency_sum",
+    ],
+)
+ServiceMetrics.__doc__ = """
+Snapshot of service counters.
+
+``latency_counts[i]`` is the number of requests that completed within
+``latency_buckets[i]`` seconds but above the previous bound; the final entry
+counts requests slower than every bound.
+"""
+
+
+def _validate(key, formula):
+    """
+    Check one normalized key, raising the errors ``CaloricCalculator`` raises.
+
+    Numbers are also checked the way ``calculate_batch`` checks them, so an
+    invalid profile fails the same way whether or not it is batched.
+    """
+    weight, height, age, sex, activity_level, weight_goal, weight_amount, body_fat = key
+    for name, value, positive in (
+        ("weight", weight, True),
+        ("height", height, True),
+        ("age", age, False),
+        ("weight amount", weight_amount, False),
+    ):
+        number = float(value)
+        if not math.isfinite(number) or (positive and number <= 0):
+            raise ValueError(f"Invalid {name}: {value}")
+    if sex not in SEX_CODES:
+        raise ValueError("Invalid gender. Please specify 'M' or 'F'.")
+    if activity_level not in ACTIVITY_CODES:
+        raise ValueError(f"Invalid activity level: {activity_level}")
+    if weight_goal not in GOAL_CODES:
+        raise ValueError(
+            "Invalid weight goal specified. Choose from WeightGoal enum values."
+        )
+    if formula.requires_body_fat:
+        _check_body_fat(formula, body_fat)
+
+
+class AsyncCalculatorService:
+    """
+    Micro-batching, request-coalescing calculator for asyncio applications.
+
+    Example:
+        >>> service = AsyncCalculatorService(window=0.002)
+        >>> result = await service.calculate({
+        ...     "weight": 70, "height": 175, "age": 30, "sex": "M",
+        ...     "activity_level": "MA", "weight_goal": WeightGoal.MAINTAIN,
+        ... })
+        >>> result.daily_caloric_needs
+        2556
+
+    A service belongs to the event loop it is first used on.
+    """
+
+    def __init__(
+        self,
+        window=0.001,
+        max_batch_size=4096,
+        policy=None,
+        latency_buckets=DEFAULT_LATENCY_BUCKETS,
+    ):
+        """
+        Initialize the service.
+
+        Args:
+            window (float): Seconds to wait for more requests after the
+                first one of a batch arrives
+            max_batch_size (int): Requests that trigger an immediate flush
+            policy (CalculationPolicy): Tables to calculate with
+            latency_buckets (tuple): Ascending upper bounds in seconds for
+                the latency histogram
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1.")
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.policy = policy
+        self._formula = (DEFAULT_POLICY if policy is None else policy).formula
+        self._latency_buckets = tuple(latency_buckets)
+        self._latency_counts = [0] * (len(self._latency_buckets) + 1)
+        self._latency_sum = 0.0
+        self._pending = {}
+        self._inflight = {}
+        self._timer = None
+        self._requests = 0
+        self._coalesced = 0
+        self._batches = 0
+        self._rows_calculated = 0
+        self._max_queue_depth = 0
+
+    async def calculate(self, profile):
+        """
+        Calculate the derived values for one profile.
+
+        Args:
+            profile (mapping): ``CaloricCalculator`` keyword arguments
+
+        Returns:
+            CalculationResult: Derived values for the profile
+
+        Raises:
+            ValueError: If the profile is invalid
+        """
+        started = time.perf_counter()
+        self._requests += 1
+        try:
+            key = make_key(**profile)
+            if not self._formula.requires_body_fat:
+                # Unused by the formula, so it must not keep requests apart
+                key = key[:7] + (None,)
+            future = self._inflight.get(key)
+            if future is not None:
+                self._coalesced += 1
+            else:
+                _validate(key, self._formula)
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[key] = future
+                self._enqueue(key, future)
+            return await asyncio.shield(future)
+        finally:
+            self._observe(time.perf_counter() - started)
+
+    def _enqueue(self, key, future):
+        self._pending[key] = future
+        self._max_queue_depth = max(self._max_queue_depth, len(self._pending))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        keys = list(pending)
+        try:
+            results = self._calculate(keys)
+        except Exception as error:
+            results = None
+            failure = error
+        for index, key in enumerate(keys):
+            future = pending[key]
+            del self._inflight[key]
+            if future.done():
+                continue
+            if results is None:
+                future.set_exception(failure)
+            else:
+                future.set_result(results[index])
+        self._batches += 1
+        self._rows_calculated += len(keys)
+
+    def _calculate(self, keys):
+        if calculate_batch is None or len(keys) == 1:
+            return [compute(*key[:7], policy=self.policy, body_fat=key[7]) for key in keys]
+        columns = list(zip(*keys))
+        columns = calculate_batch(
+            *columns[:7], policy=self.policy,
+            body_fat=columns[7] if self._formula.requires_body_fat else None,
+        )
+        return [
+            CalculationResult(*values)
+            for values in zip(*(columns[field].tolist() for field in RESULT_FIELDS))
+        ]
+
+    def _observe(self, seconds):
+        self._latency_sum += seconds
+        self._latency_counts[bisect.bisect_left(self._latency_buckets, seconds)] += 1
+
+    async def flush(self):
+        """Calculate every queued request now instead of waiting for the window."""
+        self._flush()
+
+    def metrics(self):
+        """
+        Get a snapshot of the service counters.
+
+        Returns:
+            ServiceMetrics: Request, coalescing, batch, queue depth and
+            latency histogram counters
+        """
+        return ServiceMetrics(
+            requests=self._requests,
+            coalesced=self._coalesced,
+            batches=self._batches,
+            rows_calculated=self._rows_calculated,
+            queue_depth=len(self._pending),
+            max_queue_depth=self._max_queue_depth,
+            latency_buckets=self._latency_buckets,
+            latency_counts=tuple(self._latency_counts),
+            latency_sum=self._latency_sum,
+        )
@@ -0,0 +1,225 @@
+"""
+Inverse calculations: which activity level and weight goal reach a target intake.
+
+BMR does not depend on the activity level or the weight goal, so it is
+computed once per user. Every candidate plan is then one activity factor and
+one signed adjustment step from the policy tables:
+
+    DCN = max(round(BMR x factor) + adjustment, floor)
+
+``enumerate_intakes`` evaluates that for every plan and every user;
+``solve_target`` keeps, per user, the plan closest to a target intake. Both
+take columns and run one vectorized pass per candidate plan (at most 60 with
+the default tables), so memory stays proportional to the number of users.
+
+Requires NumPy.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from .batch import _bmr, _body_fat, _check_numbers, _column, _encode_field, _policy_arrays
+from .models import ACTIVITY_CODES, GOAL_CODES, SEXES, WeightGoal
+from .policy import DEFAULT_POLICY
+
+_MALE = SEXES.index("M")
+
+Plan = namedtuple("Plan", ["activity_level", "weight_goal", "weight_amount", "adjustment"])
+Plan.__doc__ = """
+One candidate plan: activity and goal codes, kg/week and signed kcal/day.
+"""
+
+
+def candidate_plans(policy=None, activity_levels=None, weight_goals=None):
+    """
+    List the plans a policy allows.
+
+    Plans are ordered by the size of the weekly change, then by activity
+    level, which is also the tie-break order of :func:`solve_target`.
+
+    Args:
+        policy (CalculationPolicy): Tables to take factors and steps from
+        activity_levels (iterable): Activity level codes to consider; all
+            with a factor in the policy by default
+        weight_goals (iterable): WeightGoal members to consider; all by default
+
+    Returns:
+        list: :class:`Plan` tuples
+
+    Raises:
+        ValueError: If an activity level or goal is unknown or no plan remains
+    """
+    policy = DEFAULT_POLICY if policy is None else policy
+    if activity_levels is None:
+        activity_codes = [
+            code for code, factor in enumerate(policy.activity_factor_table)
+            if factor is not None
+        ]
+    else:
+        activity_codes = []
+        for level in activity_levels:
+            code = ACTIVITY_CODES.get(str(level).upper())
+            if code is None or policy.activity_factor_table[code] is None:
+                raise ValueError(f"Invalid activity level: {level}")
+            activity_codes.append(code)
+    if weight_goals is None:
+        weight_goals = list(GOAL_CODES)
+    steps = []
+    for goal in weight_goals:
+        if goal not in GOAL_CODES:
+            raise ValueError("Invalid weight goal specified. Choose from WeightGoal enum values.")
+        code = GOAL_CODES[goal]
+        if goal == WeightGoal.MAINTAIN:
+            steps.append((0.0, code, 0))
+        else:
+            steps.extend(
+                (amount, code, adjustment)
+                for amount, adjustment in policy.goal_adjustment_table[code].items()
+            )
+    plans = [
+        Plan(activity_code, goal_code, amount, adjustment)
+        for amount, goal_code, adjustment in sorted(steps)
+        for activity_code in sorted(activity_codes)
+    ]
+    if not plans:
+        raise ValueError("No activity level and weight goal combination to choose from.")
+    return plans
+
+
+def _base(weight, height, age, sex, policy, body_fat):
+    """BMR and calorie floor per user."""
+    size = max(np.size(column) for column in (weight, height, age, sex))
+    weight = _column(weight, size)
+    height = _column(height, size)
+    age = _column(age, size)
+    _check_numbers(weight, height, age)
+    sex_code = _encode_field("sex", sex, size)
+    is_male = sex_code == _MALE
+    bmr = _bmr(
+        weight, height, age, is_male,
+        formula=policy.formula, body_fat=_body_fat(policy.formula, body_fat, size),
+    )[-1]
+    _, minimum_calories, _ = _policy_arrays(policy)
+    return bmr, minimum_calories[sex_code]
+
+
+def _intake(bmr, floor, plan, activity_factors):
+    tdee = np.rint(bmr * activity_factors[plan.activity_level]).astype(np.int64)
+    return np.maximum(tdee + plan.adjustment, floor)
+
+
+def enumerate_intakes(
+    weight, height, age, sex, policy=None, activity_levels=None, weight_goals=None,
+    body_fat=None,
+):
+    """
+    Calculate the daily caloric needs of every candidate plan for many users.
+
+    Args:
+        weight (array-like): Weight in kg
+        height (array-like): Height in cm
+        age (array-like): Age in years
+        sex (array-like): 'M'/'F' or sex codes
+        policy (CalculationPolicy): Tables to calculate with
+        activity_levels (iterable): Activity level codes to consider
+        weight_goals (iterable): WeightGoal members to consider
+        body_fat (array-like): Body fat percentage, for BMR formulas that need it
+
+    Returns:
+        tuple: ``(plans, intakes)`` where ``plans`` is the list from
+        :func:`candidate_plans` and ``intakes`` an int64 array of shape
+        ``(users, len(plans))``; ``intakes[i, j]`` equals the
+        ``daily_caloric_needs`` of user ``i`` under plan ``j``
+
+    Raises:
+        ValueError: If any row has an invalid sex or body fat percentage, a
+            weight, height or age that is not finite, or a weight or height
+            that is not positive
+    """
+    policy = DEFAULT_POLICY if policy is None else policy
+    plans = candidate_plans(policy, activity_levels, weight_goals)
+    activity_factors = _policy_arrays(policy)[0]
+    bmr, floor = _base(weight, height, age, sex, policy, body_fat)
+    intakes = np.empty((len(bmr), len(plans)), dtype=np.int64)
+    for index, plan in enumerate(plans):
+        intakes[:, index] = _intake(bmr, floor, plan, activity_factors)
+    return plans, intakes
+
+
+def solve_target(
+    weight,
+    height,
+    age,
+    sex,
+    target_calories,
+    policy=None,
+    activity_levels=None,
+    weight_goals=None,
+    body_fat=None,
+):
+    """
+    Find the plan whose daily caloric needs are closest to a target, per user.
+
+    Ties go to the smallest weekly weight change, then the lowest activity
+    level. When the target is below a user's calorie floor, every plan that
+    hits the floor ties and the gentlest one is chosen; ``floored`` marks
+    those rows.
+
+    Example:
+        >>> solution = solve_target(weight, height, age, sex, 1800,
+        ...                         weight_goals=[WeightGoal.LOSE])
+        >>> ACTIVITY_LEVELS[solution["activity_level"][0]], solution["weight_amount"][0]
+        ('LA', 0.5)
+
+    Args:
+        weight (array-like): Weight in kg
+        height (array-like): Height in cm
+        age (array-like): Age in years
+        sex (array-like): 'M'/'F' or sex codes
+        target_calories (array-like): Target kcal/day per user
+        policy (CalculationPolicy): Tables to calculate with
+        activity_levels (iterable): Activity level codes to consider
+        weight_goals (iterable): WeightGoal members to consider
+        body_fat (array-like): Body fat percentage, for BMR formulas that need it
+
+    Returns:
+        dict: Arrays with one entry per user: ``activity_level`` and
+        ``weight_goal`` codes, ``weight_amount`` (kg/week),
+        ``daily_caloric_needs`` of the chosen plan, ``difference`` from the
+        target and ``floored``
+
+    Raises:
+        ValueError: If any row has an invalid sex or body fat percentage, a
+            weight, height or age that is not finite, or a weight or height
+            that is not positive
+    """
+    policy = DEFAULT_POLICY if policy is None else policy
+    plans = candidate_plans(policy, activity_levels, weight_goals)
+    activity_factors = _policy_arrays(policy)[0]
+    bmr, floor = _base(weight, height, age, sex, policy, body_fat)
+    target = _column(target_calories, len(bmr))
+
+    best_plan = np.zeros(len(bmr), dtype=np.intp)
+    best_intake = _intake(bmr, floor, plans[0], activity_factors)
+    best_distance = np.abs(best_intake - target)
+    for index, plan in enumerate(plans[1:], 1):
+        intake = _intake(bmr, floor, plan, activity_factors)
+        distance = np.abs(intake - target)
+        better = distance < best_distance
+        best_plan[better] = index
+        best_intake[better] = intake[better]
+        best_distance[better] = distance[better]
+
+    table = np.array([(plan.activity_level, plan.weight_goal) for plan in plans])
+    amounts = np.array([plan.weight_amount for plan in plans])
+    adjustments = np.array([plan.adjustment for plan in plans], dtype=np.int64)
+    tdee = np.rint(bmr * activity_factors[table[best_plan, 0]]).astype(np.int64)
+    return {
+        "activity_level": table[best_plan, 0],
+        "weight_goal": table[best_plan, 1],
+        "weight_amount": amounts[best_plan],
+        "daily_caloric_needs": best_intake,
+        "difference": best_intake - target,
+        "floored": tdee + adjustments[best_plan] < floor,
+    }
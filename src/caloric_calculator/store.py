@@ -0,0 +1,357 @@
+"""
+Persistent result store with input fingerprints and change detection.
+
+:class:`ResultStore` keeps the latest results per user id in a backend,
+together with a fingerprint of the inputs and policy they were computed
+from. :meth:`ResultStore.update` recomputes only users whose fingerprint
+changed, writes them in one transaction, and returns only the users whose
+``tdee`` or ``daily_caloric_needs`` actually moved:
+
+    >>> store = ResultStore(SQLiteBackend("results.db"))
+    >>> changes = store.update(user_ids, weight, height, age, sex, activity, goal, amount)
+    >>> for change in changes:
+    ...     publish(change.user_id, change.daily_caloric_needs)
+
+The default backend is a local SQLite file. Any object with the methods of
+:class:`SQLiteBackend` (``transaction``, ``lookup``, ``upsert``, ``get``,
+``__len__`` and ``close``) can be used instead.
+"""
+
+import hashlib
+import math
+import sqlite3
+import struct
+from collections import namedtuple
+from contextlib import contextmanager
+
+from .context import CalculatorContext
+from .models import WeightGoal
+from .policy import DEFAULT_POLICY, policy_fingerprint
+from .results import RESULT_FIELDS, CalculationResult
+
+try:
+    from .batch import calculate_batch
+except ImportError:  # NumPy not installed: fall back to the scalar path
+    calculate_batch = None
+
+# Rows fingerprinted, looked up and computed at a time
+DEFAULT_CHUNK_SIZE = 100000
+
+_NUMBERS = struct.Struct("<5d")
+_NAN = float("nan")
+
+# Keys per lookup query, below SQLite's historical 999 parameter limit
+_LOOKUP_BATCH = 900
+
+Change = namedtuple(
+    "Change",
+    ["user_id", "tdee", "daily_caloric_needs", "previous_tdee", "previous_daily_caloric_needs"],
+)
+Change.__doc__ = """
+A user whose TDEE or daily caloric needs changed; ``previous_*`` are None for
+users that were not stored before.
+"""
+
+StoreStats = namedtuple("StoreStats", ["skipped", "computed", "changed"])
+StoreStats.__doc__ = """
+Counters of a store: users skipped for an unchanged fingerprint, users
+recomputed and written, and recomputed users whose TDEE or DCN changed.
+"""
+
+
+# Accepted weight goal spellings: members and their values
+_GOALS = {goal: goal for goal in WeightGoal}
+_GOALS.update({goal.value: goal for goal in WeightGoal})
+
+
+def _normalize(columns):
+    """Normalize input columns the way the calculator does, one column at a time."""
+    weight, height, age, sex, activity_level, weight_goal, weight_amount, body_fat = columns
+    return (
+        weight,
+        height,
+        age,
+        [value.upper() for value in sex],
+        [value.upper() for value in activity_level],
+        # Unknown goals are left for the calculation to reject
+        [_GOALS.get(value, value) for value in weight_goal],
+        weight_amount,
+        body_fat,
+    )
+
+
+def _fingerprint(row, key):
+    """Digest of one normalized row; ints and equal floats give the same digest."""
+    weight, height, age, sex, activity_level, weight_goal, weight_amount, body_fat = row
+    data = _NUMBERS.pack(
+        weight, height, age, weight_amount, _NAN if body_fat is None else body_fat
+    ) + f"{sex}|{activity_level}|{getattr(weight_goal, 'value', weight_goal)}".encode()
+    return hashlib.blake2b(data, digest_size=16, key=key).digest()
+
+
+def _broadcast(values, size):
+    """A column as a list, repeating scalar arguments ``size`` times."""
+    if isinstance(values, (str, WeightGoal)) or not hasattr(values, "__len__"):
+        return [values] * size
+    if hasattr(values, "tolist"):
+        return values.tolist()
+    return list(values)
+
+
+def _check_row(user_id, row):
+    """
+    Apply the numeric checks of ``calculate_batch`` to one normalized row.
+
+    Rows are calculated one at a time or in a batch depending on how many
+    are pending, so they are checked here to fail the same way on both.
+    """
+    for name, value, positive in (
+        ("weight", row[0], True),
+        ("height", row[1], True),
+        ("age", row[2], False),
+        ("weight amount", row[6], False),
+    ):
+        if not math.isfinite(value) or (positive and value <= 0):
+            raise ValueError(f"Invalid {name} for user {user_id}: {value}")
+
+
+class SQLiteBackend:
+    """Store backed by one table of a local SQLite database."""
+
+    def __init__(self, path, table="caloric_results"):
+        """
+        Open the database, creating the table if needed.
+
+        Args:
+            path (str): Database file, or ':memory:'
+            table (str): Table name
+        """
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table}")
+        self.table = table
+        # Transactions are managed explicitly by transaction()
+        self._connection = sqlite3.connect(path, isolation_level=None)
+        columns = ", ".join(
+            f"{field} {'INTEGER' if field in ('bmr', 'tdee', 'daily_caloric_needs') else 'REAL'}"
+            for field in RESULT_FIELDS
+        )
+        self._connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "
+            f"(user_id PRIMARY KEY, fingerprint BLOB NOT NULL, {columns})"
+        )
+        self._upsert = (
+            f"INSERT OR REPLACE INTO {table} (user_id, fingerprint, {', '.join(RESULT_FIELDS)}) "
+            f"VALUES ({', '.join('?' * (len(RESULT_FIELDS) + 2))})"
+        )
+
+    @contextmanager
+    def transaction(self):
+        """Run the enclosed lookups and writes in one transaction."""
+        self._connection.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    def lookup(self, user_ids):
+        """
+        Get the stored fingerprint, TDEE and DCN of users.
+
+        Returns:
+            dict: ``(fingerprint, tdee, daily_caloric_needs)`` keyed by user
+            id, for the users that are stored
+        """
+        found = {}
+        for start in range(0, len(user_ids), _LOOKUP_BATCH):
+            batch = user_ids[start:start + _LOOKUP_BATCH]
+            rows = self._connection.execute(
+                f"SELECT user_id, fingerprint, tdee, daily_caloric_needs FROM {self.table} "
+                f"WHERE user_id IN ({', '.join('?' * len(batch))})",
+                batch,
+            )
+            for user_id, fingerprint, tdee, daily_caloric_needs in rows:
+                found[user_id] = (fingerprint, tdee, daily_caloric_needs)
+        return found
+
+    def upsert(self, rows):
+        """
+        Insert or replace users.
+
+        Args:
+            rows (iterable): ``(user_id, fingerprint, *result)`` tuples with
+                the result fields in ``RESULT_FIELDS`` order
+        """
+        self._connection.executemany(self._upsert, rows)
+
+    def get(self, user_id):
+        """
+        Get one user's stored results.
+
+        Returns:
+            CalculationResult: The stored results, or None
+        """
+        row = self._connection.execute(
+            f"SELECT {', '.join(RESULT_FIELDS)} FROM {self.table} WHERE user_id = ?",
+            (user_id,),
+        ).fetchone()
+        return None if row is None else CalculationResult(*row)
+
+    def __len__(self):
+        return self._connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+
+class ResultStore:
+    """
+    Results per user id, recomputed only when their inputs change.
+
+    Example:
+        >>> with ResultStore(SQLiteBackend("results.db")) as store:
+        ...     store.update([1, 2], [70, 95], 175, 30, "M", "MA", WeightGoal.MAINTAIN)
+        ...     store.get(1).daily_caloric_needs
+    """
+
+    def __init__(self, backend, policy=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Initialize the store.
+
+        Args:
+            backend: Storage such as :class:`SQLiteBackend`
+            policy (CalculationPolicy): Policy every result is computed with.
+                Changing it makes every stored fingerprint stale.
+            chunk_size (int): Users fingerprinted and computed at a time
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1.")
+        self.backend = backend
+        self.policy = DEFAULT_POLICY if policy is None else policy
+        self.chunk_size = chunk_size
+        self._key = policy_fingerprint(self.policy)
+        self._context = CalculatorContext(self.policy)
+        self.skipped = 0
+        self.computed = 0
+        self.changed = 0
+
+    def update(
+        self,
+        user_ids,
+        weight,
+        height,
+        age,
+        sex,
+        activity_level,
+        weight_goal,
+        weight_amount=0.0,
+        body_fat=None,
+    ):
+        """
+        Recompute and store users whose inputs changed.
+
+        Takes one user id per profile plus the columns of
+        :func:`caloric_calculator.batch.calculate_batch` (labels, not codes);
+        scalar arguments apply to every user. Everything is written in one
+        transaction, so an invalid row leaves the store unchanged.
+
+        Args:
+            user_ids (sequence): Unique user id per profile (int or str)
+            body_fat (array-like): Body fat percentage, for BMR formulas
+                that need it
+
+        Returns:
+            list: :class:`Change` per user whose ``tdee`` or
+            ``daily_caloric_needs`` differs from the stored value, including
+            new users, in input order
+
+        Raises:
+            ValueError: If any recomputed row is invalid, including a
+                weight, height, age or weight amount that is not finite and
+                a weight or height that is not positive
+        """
+        user_ids = user_ids.tolist() if hasattr(user_ids, "tolist") else list(user_ids)
+        size = len(user_ids)
+        columns = [
+            _broadcast(column, size)
+            for column in (
+                weight, height, age, sex, activity_level, weight_goal, weight_amount, body_fat,
+            )
+        ]
+        changes = []
+        skipped = computed = 0
+        with self.backend.transaction():
+            for start in range(0, size, self.chunk_size):
+                stop = min(start + self.chunk_size, size)
+                ids = user_ids[start:stop]
+                rows = list(zip(*_normalize([column[start:stop] for column in columns])))
+                fingerprints = [_fingerprint(row, self._key) for row in rows]
+                stored = self.backend.lookup(ids)
+                pending = [
+                    index for index, (user_id, fingerprint) in enumerate(zip(ids, fingerprints))
+                    if stored.get(user_id, (None,))[0] != fingerprint
+                ]
+                for index in pending:
+                    _check_row(ids[index], rows[index])
+                skipped += len(ids) - len(pending)
+                computed += len(pending)
+                results = self._calculate([rows[index] for index in pending])
+                self.backend.upsert(
+                    (ids[index], fingerprints[index]) + result
+                    for index, result in zip(pending, results)
+                )
+                for index, result in zip(pending, results):
+                    previous = stored.get(ids[index])
+                    tdee, daily_caloric_needs = result[6], result[7]
+                    if previous is None or previous[1:] != (tdee, daily_caloric_needs):
+                        changes.append(Change(
+                            ids[index], tdee, daily_caloric_needs,
+                            None if previous is None else previous[1],
+                            None if previous is None else previous[2],
+                        ))
+        self.skipped += skipped
+        self.computed += computed
+        self.changed += len(changes)
+        return changes
+
+    def _calculate(self, rows):
+        """Results of normalized rows as tuples of Python numbers."""
+        if not rows:
+            return []
+        if calculate_batch is None or len(rows) < 64:
+            return [self._context.compute(*row) for row in rows]
+        columns = list(zip(*rows))
+        body_fat = columns[7] if self.policy.formula.requires_body_fat else None
+        results = calculate_batch(*columns[:7], policy=self.policy, body_fat=body_fat)
+        return list(zip(*(results[field].tolist() for field in RESULT_FIELDS)))
+
+    def get(self, user_id):
+        """
+        Get one user's stored results.
+
+        Returns:
+            CalculationResult: The stored results, or None
+        """
+        return self.backend.get(user_id)
+
+    def stats(self):
+        """
+        Get the store counters.
+
+        Returns:
+            StoreStats: Users skipped, recomputed and changed by this object
+        """
+        return StoreStats(self.skipped, self.computed, self.changed)
+
+    def close(self):
+        self.backend.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self.backend)
@@ -0,0 +1,281 @@
+"""
+Streaming CSV/JSONL pipeline for the Caloric Calculator.
+
+Rows are read incrementally, validated and calculated in fixed-size chunks,
+and yielded back one by one, so memory use is bounded by the chunk size no
+matter how large the input is. Rows that cannot be calculated are handed to
+a reject callback instead of aborting the run.
+"""
+
+import csv
+import json
+import math
+from itertools import islice
+
+from . import instrumentation
+from .calculator import compute
+from .formulas import _check_body_fat
+from .models import (
+    ACTIVITY_CODES,
+    ACTIVITY_LEVELS,
+    SEX_CODES,
+    SEXES,
+    WEIGHT_GOALS,
+    WeightGoal,
+)
+from .policy import DEFAULT_POLICY
+from .results import RESULT_FIELDS
+from .units import HEIGHT_UNITS, WEIGHT_UNITS
+
+try:
+    from .batch import calculate_batch
+except ImportError:  # NumPy not installed: fall back to the scalar path
+    calculate_batch = None
+
+INPUT_FIELDS = (
+    "weight",
+    "height",
+    "age",
+    "sex",
+    "activity_level",
+    "weight_goal",
+    "weight_amount",
+)
+
+# Optional unit columns; rows without them are in kg and cm
+UNIT_FIELDS = ("weight_unit", "height_unit")
+
+_WEIGHT_UNIT_CODES = {unit: code for code, unit in enumerate(WEIGHT_UNITS)}
+_HEIGHT_UNIT_CODES = {unit: code for code, unit in enumerate(HEIGHT_UNITS)}
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+class RowError(ValueError):
+    """Raised for an input row that cannot be calculated."""
+
+
+def parse_goal(value):
+    """
+    Convert a weight goal given as a WeightGoal, its value or its name.
+
+    Raises:
+        RowError: If the goal is not supported
+    """
+    if isinstance(value, WeightGoal):
+        return value
+    text = str(value).strip().lower()
+    try:
+        return WeightGoal(text)
+    except ValueError:
+        raise RowError(f"Unsupported weight goal: {value!r}") from None
+
+
+def _number(row, field, default=None, positive=False):
+    value = row.get(field)
+    if value is None or value == "":
+        if default is None:
+            raise RowError(f"Missing {field}")
+        return default
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise RowError(f"Invalid {field}: {value!r}") from None
+    if not math.isfinite(number) or (positive and number <= 0):
+        raise RowError(f"Invalid {field}: {value!r}")
+    return number
+
+
+def _code(row, field, codes):
+    value = str(row.get(field) or "").strip().upper()
+    code = codes.get(value)
+    if code is None:
+        raise RowError(f"Invalid {field}: {row.get(field)!r}")
+    return code
+
+
+def _unit_code(row, field, codes):
+    value = row.get(field)
+    if value is None or value == "":
+        return 0
+    code = codes.get(str(value).strip().lower())
+    if code is None:
+        raise RowError(f"Invalid {field}: {value!r}")
+    return code
+
+
+def _body_fat(row, formula):
+    """Body fat percentage of a row, for formulas that need it; None otherwise."""
+    if not formula.requires_body_fat:
+        return None
+    body_fat = _number(row, "body_fat")
+    try:
+        _check_body_fat(formula, body_fat)
+    except ValueError as error:
+        raise RowError(str(error)) from None
+    return body_fat
+
+
+def parse_row(row, policy=None):
+    """
+    Validate one input row and convert it to numbers and codes.
+
+    Args:
+        row (mapping): Row keyed by ``INPUT_FIELDS``; ``weight_amount`` is
+            optional and defaults to 0. Optional ``UNIT_FIELDS`` give the
+            units of weight ('kg' or 'lb') and height ('cm', 'in' or 'ft').
+            A ``body_fat`` percentage is read when the policy's BMR formula
+            needs it.
+        policy (CalculationPolicy): Policy the row will be calculated with.
+            Defaults to ``DEFAULT_POLICY``.
+
+    Returns:
+        tuple: weight, height, age, sex code, activity code, goal code,
+        weight amount, weight unit code, height unit code and body fat
+        (None unless the formula needs it). Weight and height are in the
+        row's units; the batch engine converts them.
+
+    Raises:
+        RowError: If a field is missing or invalid, a number is not finite,
+            the weight or height is not positive, or the formula needs a
+            body fat percentage the row lacks
+    """
+    formula = (DEFAULT_POLICY if policy is None else policy).formula
+    return (
+        _number(row, "weight", positive=True),
+        _number(row, "height", positive=True),
+        _number(row, "age"),
+        _code(row, "sex", SEX_CODES),
+        _code(row, "activity_level", ACTIVITY_CODES),
+        WEIGHT_GOALS.index(parse_goal(row.get("weight_goal"))),
+        _number(row, "weight_amount", 0.0),
+        _unit_code(row, "weight_unit", _WEIGHT_UNIT_CODES),
+        _unit_code(row, "height_unit", _HEIGHT_UNIT_CODES),
+        _body_fat(row, formula),
+    )
+
+
+def _calculate_chunk(parsed, policy, energy_unit):
+    """Calculate parsed rows and return one list per result field."""
+    columns = list(zip(*parsed))
+    if calculate_batch is not None:
+        results = calculate_batch(
+            *columns[:7], policy=policy, weight_unit=columns[7], height_unit=columns[8],
+            energy_unit=energy_unit,
+            body_fat=columns[9] if policy.formula.requires_body_fat else None,
+        )
+        return [results[field].tolist() for field in RESULT_FIELDS]
+    return list(zip(*(
+        compute(
+            weight, height, age, SEXES[sex], ACTIVITY_LEVELS[activity],
+            WEIGHT_GOALS[goal], amount, policy=policy, body_fat=body_fat,
+            weight_unit=WEIGHT_UNITS[weight_unit], height_unit=HEIGHT_UNITS[height_unit],
+            energy_unit=energy_unit,
+        )
+        for (
+            weight, height, age, sex, activity, goal, amount, weight_unit, height_unit, body_fat
+        ) in parsed
+    )))
+
+
+def stream_calculate(
+    rows, chunk_size=DEFAULT_CHUNK_SIZE, policy=None, rejects=None, energy_unit="kcal"
+):
+    """
+    Calculate a stream of input rows in chunks.
+
+    Args:
+        rows (iterable): Mappings keyed by ``INPUT_FIELDS``, plus
+            ``body_fat`` when the policy's BMR formula needs it. Extra keys
+            such as a user id are passed through to the output.
+        chunk_size (int): Rows validated and calculated together
+        policy (CalculationPolicy): Tables to calculate with
+        rejects (callable): Called as ``rejects(row, reason)`` for every row
+            that cannot be calculated. Rejected rows are dropped silently
+            when omitted.
+        energy_unit (str): Unit of ``bmr``, ``tdee`` and
+            ``daily_caloric_needs``, 'kcal' or 'kJ'
+
+    Yields:
+        dict: Each valid input row merged with its ``RESULT_FIELDS``, in
+        input order
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+    policy = DEFAULT_POLICY if policy is None else policy
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        recorder = instrumentation._recorder
+        if recorder is not None:
+            mark = recorder.timer("stream", len(chunk))
+        valid = []
+        parsed = []
+        for row in chunk:
+            try:
+                parsed.append(parse_row(row, policy))
+            except RowError as error:
+                if recorder is not None:
+                    recorder.record_error("stream", "parse", error)
+                if rejects is not None:
+                    rejects(row, str(error))
+                continue
+            valid.append(row)
+        if recorder is not None:
+            mark("parse")
+        if not valid:
+            continue
+        columns = _calculate_chunk(parsed, policy, energy_unit)
+        for row, values in zip(valid, zip(*columns)):
+            output = dict(row)
+            output.update(zip(RESULT_FIELDS, values))
+            yield output
+
+
+def read_rows(file, file_format):
+    """
+    Read input rows incrementally from an open text file.
+
+    Args:
+        file: Text file object
+        file_format (str): 'csv' (with a header row) or 'jsonl'
+
+    Yields:
+        dict: One input row per line. Unparseable JSON lines are yielded as
+        ``{"_line": ...}`` so they reach the reject stream.
+    """
+    if file_format == "csv":
+        yield from csv.DictReader(file)
+    elif file_format == "jsonl":
+        for line in file:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield row if isinstance(row, dict) else {"_line": line.rstrip("\n")}
+    else:
+        raise ValueError(f"Unsupported format: {file_format}")
+
+
+class RowWriter:
+    """Write output rows to an open text file as CSV or JSONL."""
+
+    def __init__(self, file, file_format):
+        if file_format not in ("csv", "jsonl"):
+            raise ValueError(f"Unsupported format: {file_format}")
+        self.file = file
+        self.file_format = file_format
+        self._csv = None
+
+    def write(self, row):
+        if self.file_format == "jsonl":
+            self.file.write(json.dumps(row, default=str) + "\n")
+            return
+        if self._csv is None:
+            self._csv = csv.DictWriter(self.file, fieldnames=list(row), extrasaction="ignore")
+            self._csv.writeheader()
+        self._csv.writerow(row)
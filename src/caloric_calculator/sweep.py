@@ -0,0 +1,268 @@
+"""
+What-if sweeps of one profile over one or two inputs.
+
+:func:`sweep_profile` holds a profile's inputs fixed except for the swept
+ones and calculates the whole grid of values in one batch, instead of one
+calculator per point:
+
+    >>> result = sweep_profile(profile, weight=np.arange(60, 120.5, 0.5))
+    >>> plot(result.axes["weight"], result.results["daily_caloric_needs"])
+    >>> for jump in result.discontinuities:
+    ...     mark(jump.interval, jump.kind)
+
+Along numeric axes the sweep also reports the points where daily caloric
+needs can jump instead of moving smoothly: where the BMI band changes (and
+with it the weight BMR is calculated from) and where the minimum calorie
+floor starts or stops applying. Curves can then be drawn in segments
+between those points.
+
+Requires NumPy.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from .batch import _column, _encode_field, _goal_adjustment, _policy_arrays, calculate_batch
+from .cohort import BMI_BANDS, bmi_bands
+from .policy import DEFAULT_POLICY
+from .results import RESULT_FIELDS
+
+INPUT_FIELDS = (
+    "weight",
+    "height",
+    "age",
+    "sex",
+    "activity_level",
+    "weight_goal",
+    "weight_amount",
+    "body_fat",
+)
+# Inputs with an order, along which discontinuities are reported
+NUMERIC_FIELDS = ("weight", "height", "age", "weight_amount", "body_fat")
+
+# Discontinuity kinds
+BMI_BAND = "bmi_band"
+CALORIE_FLOOR = "calorie_floor"
+
+# Bisection steps at most when refining a discontinuity
+_MAX_REFINEMENTS = 64
+
+Sweep = namedtuple("Sweep", ["axes", "results", "discontinuities"])
+Sweep.__doc__ = """
+Result of :func:`sweep_profile`.
+
+``axes`` maps each swept input to its values, in sweep order. ``results``
+maps each of ``RESULT_FIELDS`` to an array with one axis per swept input.
+``discontinuities`` lists a :class:`Discontinuity` per jump found.
+"""
+
+Discontinuity = namedtuple(
+    "Discontinuity",
+    ["kind", "dimension", "index", "interval", "before", "after", "daily_caloric_needs"],
+)
+Discontinuity.__doc__ = """
+A BMI band or calorie floor change along one swept input.
+
+``kind`` is ``BMI_BAND`` or ``CALORIE_FLOOR``. The change happens between
+the grid point at ``index`` and the next one along ``dimension``, within
+``interval`` (the values of ``dimension`` on either side, narrowed when a
+tolerance is given). ``before`` and ``after`` are the BMI band names, or
+whether the calorie floor applies, on either side; ``daily_caloric_needs``
+holds the values on either side of ``interval``.
+"""
+
+
+def _evaluate(columns, policy):
+    """Results, BMI band codes and calorie floor flags of encoded input columns."""
+    results = calculate_batch(
+        *(columns[field] for field in INPUT_FIELDS[:-1]),
+        policy=policy,
+        body_fat=columns["body_fat"],
+    )
+    _, minimum_calories, goal_adjustments = _policy_arrays(policy)
+    adjustment = _goal_adjustment(
+        columns["weight_goal"], columns["weight_amount"], goal_adjustments
+    )
+    floor = results["tdee"] + adjustment < minimum_calories[columns["sex"]]
+    return results, bmi_bands(results["bmi"]), floor
+
+
+def _state_label(kind, state):
+    return BMI_BANDS[state] if kind == BMI_BAND else bool(state)
+
+
+def sweep_profile(profile, policy=None, tolerance=None, **axes):
+    """
+    Calculate one profile over a range of one or two of its inputs.
+
+    Example:
+        >>> profile = {"weight": 80, "height": 175, "age": 40, "sex": "M",
+        ...            "activity_level": "MA", "weight_goal": WeightGoal.LOSE,
+        ...            "weight_amount": 0.5}
+        >>> result = sweep_profile(profile, weight=range(60, 121),
+        ...                        activity_level=ACTIVITY_LEVELS, tolerance=0.01)
+        >>> result.results["daily_caloric_needs"].shape
+        (61, 5)
+
+    Args:
+        profile (mapping): ``CaloricCalculator`` keyword arguments; the swept
+            inputs may be left out
+        policy (CalculationPolicy): Tables and BMR formula to calculate
+            with. Defaults to the profile's ``policy`` or ``DEFAULT_POLICY``.
+        tolerance (float): If given, narrow each discontinuity along a
+            numeric axis by bisection until its interval is at most this wide
+        **axes: One or two inputs to sweep, each with a sequence of values
+
+    Returns:
+        Sweep: Axes, results and discontinuities
+
+    Raises:
+        ValueError: If the axes are invalid, an input is missing, or any
+            point of the grid is invalid
+    """
+    if not 1 <= len(axes) <= 2:
+        raise ValueError("Sweep one or two inputs.")
+    for name in axes:
+        if name not in INPUT_FIELDS:
+            raise ValueError(f"Cannot sweep {name}. Choose from {INPUT_FIELDS}.")
+    profile = dict(profile)
+    profile.pop("lazy", None)
+    profile_policy = profile.pop("policy", None)
+    policy = profile_policy if policy is None else policy
+    policy = DEFAULT_POLICY if policy is None else policy
+    inputs = {"weight_amount": 0.0, "body_fat": None}
+    for name, value in profile.items():
+        if name not in INPUT_FIELDS:
+            raise ValueError(f"Unknown profile input: {name}")
+        inputs[name] = value
+    missing = [name for name in INPUT_FIELDS if name not in inputs and name not in axes]
+    if missing:
+        raise ValueError(f"Missing profile inputs: {', '.join(missing)}")
+
+    values = {}
+    for name, axis in axes.items():
+        axis = list(axis)
+        if not axis:
+            raise ValueError(f"The {name} axis is empty.")
+        values[name] = np.array(axis, dtype=np.float64 if name in NUMERIC_FIELDS else object)
+    shape = tuple(len(axis) for axis in values.values())
+    size = int(np.prod(shape))
+    positions = dict(zip(values, np.indices(shape).reshape(len(shape), size)))
+
+    columns = {}
+    for name in INPUT_FIELDS:
+        if name in values:
+            column = values[name][positions[name]]
+        else:
+            column = inputs[name]
+        if name in NUMERIC_FIELDS:
+            columns[name] = None if column is None else _column(column, size)
+        else:
+            columns[name] = _encode_field(name, column, size)
+
+    results, bands, floors = _evaluate(columns, policy)
+    discontinuities = []
+    for axis, name in enumerate(values):
+        if name not in NUMERIC_FIELDS or shape[axis] < 2:
+            continue
+        for kind, states in ((BMI_BAND, bands), (CALORIE_FLOOR, floors)):
+            states = states.reshape(shape)
+            before = np.take(states, np.arange(shape[axis] - 1), axis=axis)
+            after = np.take(states, np.arange(1, shape[axis]), axis=axis)
+            indices = np.argwhere(before != after)
+            if not len(indices):
+                continue
+            discontinuities.extend(_describe(
+                kind, name, indices, shape, values, columns, states, results, policy, tolerance,
+            ))
+    return Sweep(
+        values,
+        {field: results[field].reshape(shape) for field in RESULT_FIELDS},
+        discontinuities,
+    )
+
+
+def _describe(kind, name, indices, shape, values, columns, states, results, policy, tolerance):
+    """Build the :class:`Discontinuity` records of one kind along one axis."""
+    axis = list(values).index(name)
+    following = indices.copy()
+    following[:, axis] += 1
+    first = np.ravel_multi_index(indices.T, shape)
+    second = np.ravel_multi_index(following.T, shape)
+    low = values[name][indices[:, axis]]
+    high = values[name][following[:, axis]]
+    state = states.ravel()
+    dcn = results["daily_caloric_needs"]
+    if tolerance is None:
+        changes = [(np.arange(len(indices)), low, high, state[first], state[second],
+                    dcn[first], dcn[second])]
+    else:
+        changes = _refine(kind, name, columns, first, low, high, state[first], state[second],
+                          policy, tolerance)
+
+    records = []
+    for rows, *fields in changes:
+        for position, row in enumerate(rows):
+            start, end, before, after, dcn_before, dcn_after = (
+                field[position] for field in fields
+            )
+            records.append(Discontinuity(
+                kind,
+                name,
+                tuple(int(i) for i in indices[row]),
+                (float(start), float(end)),
+                _state_label(kind, before),
+                _state_label(kind, after),
+                (int(dcn_before), int(dcn_after)),
+            ))
+    # Several changes within one grid step are listed in order along the axis
+    return sorted(records, key=lambda record: record.index)
+
+
+def _refine(kind, name, columns, first, low, high, before, end_state, policy, tolerance):
+    """
+    Narrow grid intervals by bisection until each is at most ``tolerance`` wide.
+
+    An interval may hold several changes (e.g. 'normal' to 'obese' to
+    'overweight' across the gap at a BMI of 24.9 to 25), so after the first
+    change is found the rest of the interval is searched again.
+
+    Returns:
+        list: ``(rows, low, high, before, after, dcn_low, dcn_high)`` array
+        tuples, ``rows`` indexing the grid interval each change is in
+    """
+    points = {
+        field: None if column is None else column[first] for field, column in columns.items()
+    }
+    rows = np.arange(len(first))
+    end = high
+    changes = []
+    while len(rows):
+        for _ in range(_MAX_REFINEMENTS):
+            if not (np.abs(high - low) > tolerance).any():
+                break
+            middle = (low + high) / 2
+            points[name] = middle
+            _, bands, floors = _evaluate(points, policy)
+            same = (bands if kind == BMI_BAND else floors) == before
+            low = np.where(same, middle, low)
+            high = np.where(same, high, middle)
+        points[name] = high
+        high_results, bands, floors = _evaluate(points, policy)
+        after = bands if kind == BMI_BAND else floors
+        points[name] = low
+        low_results = _evaluate(points, policy)[0]
+        changes.append((
+            rows, low, high, before, after,
+            low_results["daily_caloric_needs"], high_results["daily_caloric_needs"],
+        ))
+        # Keep searching the intervals that change again before their end
+        more = after != end_state
+        rows, low, high, end, end_state, before = (
+            rows[more], high[more], end[more], end[more], end_state[more], after[more]
+        )
+        points = {
+            field: None if column is None else column[more] for field, column in points.items()
+        }
+    return changes
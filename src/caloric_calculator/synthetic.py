@@ -0,0 +1,315 @@
+"""
+Deterministic synthetic populations and a differential test harness.
+
+:func:`generate_population` streams plausible profiles as columnar chunks
+for load tests and fuzzing. Every sex, activity level and weight goal is
+drawn, weights are chosen to land in every BMI band (including the gaps
+between bands, e.g. 24.95, which the calculator treats as obese), and a
+share of the weekly ``weight_amount`` values are not steps of the policy's
+tables. Rows depend only on the seed and their position, so the same seed
+gives the same population whatever the chunk size:
+
+    >>> for chunk in generate_population(10_000_000, seed=42):
+    ...     calculate_batch(**chunk)
+
+:func:`differential_check` runs chunks through the fast paths (batch,
+cached, fixed point, grid, parallel, or any callable) and compares them row
+by row with the reference :class:`CaloricCalculator`:
+
+    >>> report = differential_check(generate_population(100000), paths=("batch", "cached"))
+    >>> report.mismatches
+    {'batch': 0, 'cached': 0}
+
+Requires NumPy.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from .batch import calculate_batch
+from .cache import CalculationCache
+from .calculator import CaloricCalculator
+from .fixed_point import calculate_fixed_point
+from .models import ACTIVITY_LEVELS, SEXES, WEIGHT_GOALS, WeightGoal
+from .parallel import parallel_calculate
+from .policy import DEFAULT_POLICY
+from .results import RESULT_FIELDS
+
+# Columns of every chunk: the calculate_batch inputs plus body fat
+COLUMNS = (
+    "weight",
+    "height",
+    "age",
+    "sex",
+    "activity_level",
+    "weight_goal",
+    "weight_amount",
+    "body_fat",
+)
+
+DEFAULT_CHUNK_SIZE = 100000
+
+# Rows are drawn in blocks of this size, each from its own seeded generator,
+# so a row's values do not depend on how the population is chunked
+_BLOCK_SIZE = 65536
+
+# (low, high) BMI per band, and the share of rows drawn from each. The last
+# band straddles the band edges, where rounding decides the branch taken.
+BMI_RANGES = {
+    "underweight": (14.0, 18.5),
+    "normal": (18.5, 24.9),
+    "overweight": (25.0, 29.9),
+    "obese": (30.0, 50.0),
+    "edge": (-0.15, 0.15),
+}
+BMI_SHARES = (0.1, 0.35, 0.3, 0.2, 0.05)
+_BMI_EDGES = (18.5, 24.9, 25.0, 29.9, 30.0)
+
+# Share of rows per weight goal, in WEIGHT_GOALS order
+GOAL_SHARES = (0.4, 0.4, 0.2)
+
+# Weekly amounts that are a step of no default table; the calculator applies
+# no adjustment for them
+INVALID_AMOUNTS = (-0.5, 0.1, 0.3, 0.6, 1.25, 3.0, 5.0)
+DEFAULT_INVALID_AMOUNT_RATE = 0.05
+
+# Mean and standard deviation of height in cm per sex, in SEXES order
+_HEIGHTS = ((176.0, 7.5), (162.5, 7.0))
+_HEIGHT_RANGE = (140, 210)
+_AGE_RANGE = (18, 90)
+_BODY_FAT_RANGE = (5.0, 50.0)
+_MINIMUM_WEIGHT = 25.0
+
+# Built-in paths of differential_check
+PATHS = ("batch", "cached", "fixed_point", "grid", "parallel")
+
+Mismatch = namedtuple("Mismatch", ["path", "row", "field", "expected", "actual", "inputs"])
+Mismatch.__doc__ = """
+One differing value. ``row`` is the position in the checked population and
+``inputs`` maps each of ``COLUMNS`` to the row's value.
+"""
+
+DifferentialReport = namedtuple("DifferentialReport", ["rows", "mismatches", "examples"])
+DifferentialReport.__doc__ = """
+Result of :func:`differential_check`. ``mismatches`` maps each path to the
+number of rows where any of its fields differed from the reference, and
+``examples`` lists up to ``max_examples`` :class:`Mismatch` records per path.
+"""
+
+
+def _goal_steps(policy):
+    """Weekly amounts with an adjustment, per goal code."""
+    return [sorted(table) for table in policy.goal_adjustment_table]
+
+
+def _block(seed, block, size, policy, invalid_amount_rate):
+    """Columns of ``size`` rows drawn from the generator of one block."""
+    rng = np.random.default_rng([seed, block])
+    sex = rng.integers(0, len(SEXES), size)
+    activity = rng.integers(0, len(ACTIVITY_LEVELS), size)
+    goal = rng.choice(len(WEIGHT_GOALS), size, p=GOAL_SHARES)
+
+    means, deviations = np.array(_HEIGHTS).T
+    height = np.clip(
+        np.rint(rng.normal(means[sex], deviations[sex])), *_HEIGHT_RANGE
+    )
+    band = rng.choice(len(BMI_SHARES), size, p=BMI_SHARES)
+    low, high = np.array(list(BMI_RANGES.values())).T
+    bmi = rng.uniform(low[band], high[band])
+    edge = band == len(BMI_SHARES) - 1
+    bmi[edge] += np.array(_BMI_EDGES)[rng.integers(0, len(_BMI_EDGES), edge.sum())]
+    weight = np.maximum(np.round(bmi * (height / 100) ** 2, 1), _MINIMUM_WEIGHT)
+
+    amount = np.zeros(size)
+    for code, steps in enumerate(_goal_steps(policy)):
+        rows = np.flatnonzero(goal == code)
+        if steps:
+            amount[rows] = rng.choice(steps, len(rows))
+    invalid = rng.random(size) < invalid_amount_rate
+    amount[invalid] = rng.choice(INVALID_AMOUNTS, invalid.sum())
+
+    return {
+        "weight": weight,
+        "height": height,
+        "age": rng.integers(_AGE_RANGE[0], _AGE_RANGE[1] + 1, size).astype(np.float64),
+        "sex": np.array(SEXES)[sex],
+        "activity_level": np.array(ACTIVITY_LEVELS)[activity],
+        "weight_goal": np.array([goal.value for goal in WEIGHT_GOALS])[goal],
+        "weight_amount": amount,
+        "body_fat": np.round(rng.uniform(*_BODY_FAT_RANGE, size), 1),
+    }
+
+
+def generate_population(
+    size,
+    seed=0,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    policy=None,
+    invalid_amount_rate=DEFAULT_INVALID_AMOUNT_RATE,
+):
+    """
+    Stream a deterministic synthetic population as columnar chunks.
+
+    Weights are quantized to 0.1 kg, heights to whole cm and ages to whole
+    years, as measured inputs are. Each chunk is a dict of ``COLUMNS``
+    arrays that can be passed to ``calculate_batch(**chunk)``; categorical
+    columns hold labels ('M', 'MA', 'lose').
+
+    Args:
+        size (int): Total number of rows
+        seed (int): Seed; equal seeds give equal rows
+        chunk_size (int): Rows per chunk; the last chunk may be shorter
+        policy (CalculationPolicy): Policy whose goal tables the valid
+            weekly amounts are drawn from. Defaults to ``DEFAULT_POLICY``.
+        invalid_amount_rate (float): Share of rows given one of
+            ``INVALID_AMOUNTS`` instead
+
+    Yields:
+        dict: Arrays keyed by ``COLUMNS``
+
+    Raises:
+        ValueError: If the size, chunk size or rate is out of range
+    """
+    if size < 0:
+        raise ValueError("size must not be negative.")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+    if not 0 <= invalid_amount_rate <= 1:
+        raise ValueError("invalid_amount_rate must be between 0 and 1.")
+    policy = DEFAULT_POLICY if policy is None else policy
+
+    pending = []
+    buffered = 0
+    for block, start in enumerate(range(0, size, _BLOCK_SIZE)):
+        rows = min(_BLOCK_SIZE, size - start)
+        pending.append(_block(seed, block, rows, policy, invalid_amount_rate))
+        buffered += rows
+        if buffered < chunk_size:
+            continue
+        columns = {
+            name: np.concatenate([part[name] for part in pending]) for name in COLUMNS
+        }
+        stop = buffered - buffered % chunk_size
+        for offset in range(0, stop, chunk_size):
+            yield {name: column[offset:offset + chunk_size] for name, column in columns.items()}
+        pending = [{name: column[stop:] for name, column in columns.items()}]
+        buffered -= stop
+    if buffered:
+        yield {name: np.concatenate([part[name] for part in pending]) for name in COLUMNS}
+
+
+def _reference(chunk, policy):
+    """Results of the scalar calculator, one row at a time, as columns."""
+    records = [
+        CaloricCalculator(
+            weight, height, age, sex, activity_level, WeightGoal(goal), amount,
+            policy=policy, body_fat=body_fat,
+        ).result()
+        for weight, height, age, sex, activity_level, goal, amount, body_fat in zip(
+            *(chunk[name].tolist() for name in COLUMNS)
+        )
+    ]
+    return {field: np.array(column) for field, column in zip(RESULT_FIELDS, zip(*records))}
+
+
+def _builtin_path(name, policy, grid, workers):
+    """Callable taking a chunk and returning result columns, for a built-in path."""
+    if name == "batch":
+        return lambda chunk: calculate_batch(**chunk, policy=policy)
+    if name == "fixed_point":
+        return lambda chunk: calculate_fixed_point(**chunk, policy=policy)
+    if name == "parallel":
+        return lambda chunk: parallel_calculate(
+            **chunk, policy=policy, workers=workers,
+            chunk_size=max(1, len(chunk["weight"]) // (2 * workers)), min_parallel_size=0,
+        )
+    if name == "cached":
+        cache = CalculationCache(maxsize=DEFAULT_CHUNK_SIZE, policy=policy)
+
+        def cached(chunk):
+            records = [
+                cache.calculate(
+                    weight, height, age, sex, activity_level, WeightGoal(goal), amount, body_fat
+                )
+                for weight, height, age, sex, activity_level, goal, amount, body_fat in zip(
+                    *(chunk[name].tolist() for name in COLUMNS)
+                )
+            ]
+            return {field: np.array(column) for field, column in zip(RESULT_FIELDS, zip(*records))}
+        return cached
+    if name == "grid":
+        if grid is None:
+            raise ValueError("The grid path needs a GridIndex.")
+        columns = COLUMNS[:-1]
+        return lambda chunk: grid.lookup_batch(*(chunk[name] for name in columns))
+    raise ValueError(f"Unknown path: {name}. Choose from {PATHS} or pass a callable.")
+
+
+def differential_check(
+    chunks, paths=("batch",), policy=None, grid=None, workers=2, max_examples=10
+):
+    """
+    Compare fast paths with the reference calculator row by row.
+
+    Every field a path returns is compared exactly with the
+    ``CaloricCalculator`` result of the same row. The grid returns only
+    ``bmr``, ``tdee`` and ``daily_caloric_needs``, and is built with its own
+    policy, which should be the one passed here. The grid path takes no
+    body fat, so it needs a BMR formula without it.
+
+    Example:
+        >>> with GridIndex("population.grid") as index:
+        ...     report = differential_check(
+        ...         generate_population(1000000, seed=7, chunk_size=50000),
+        ...         paths=("batch", "grid", "parallel"), grid=index,
+        ...     )
+        >>> assert not any(report.mismatches.values()), report.examples
+
+    Args:
+        chunks (iterable): Dicts of ``COLUMNS`` arrays, as yielded by
+            :func:`generate_population`
+        paths: Names from ``PATHS``, or a mapping of names to callables
+            that take a chunk and return a dict of result arrays
+        policy (CalculationPolicy): Policy of the reference and built-in
+            paths. Defaults to ``DEFAULT_POLICY``.
+        grid (GridIndex): Index for the grid path
+        workers (int): Worker processes for the parallel path
+        max_examples (int): Mismatches kept per path
+
+    Returns:
+        DifferentialReport: Rows checked, mismatching rows per path and examples
+
+    Raises:
+        ValueError: If a path is unknown, or the grid path has no index
+    """
+    policy = DEFAULT_POLICY if policy is None else policy
+    if not hasattr(paths, "items"):
+        paths = {name: _builtin_path(name, policy, grid, workers) for name in paths}
+    mismatches = dict.fromkeys(paths, 0)
+    examples = []
+    rows = 0
+    for chunk in chunks:
+        expected = _reference(chunk, policy)
+        for name, path in paths.items():
+            actual = path(chunk)
+            fields = [field for field in RESULT_FIELDS if field in actual]
+            differs = np.zeros(len(chunk["weight"]), dtype=bool)
+            for field in fields:
+                differs |= np.asarray(actual[field]) != expected[field]
+            mismatches[name] += int(differs.sum())
+            kept = sum(example.path == name for example in examples)
+            for row in np.flatnonzero(differs)[:max(0, max_examples - kept)]:
+                field = next(
+                    field for field in fields if actual[field][row] != expected[field][row]
+                )
+                examples.append(Mismatch(
+                    name,
+                    rows + int(row),
+                    field,
+                    expected[field][row].item(),
+                    np.asarray(actual[field])[row].item(),
+                    {column: chunk[column][row].item() for column in COLUMNS},
+                ))
+        rows += len(chunk["weight"])
+    return DifferentialReport(rows, mismatches, examples)
@@ -0,0 +1,203 @@
+"""
+Week-by-week projections of the Caloric Calculator.
+
+A projection advances a profile's weight by a fixed change per week and
+recalculates every derived value at each step, so BMI band transitions (the
+switch between actual, ideal and adjusted weight for BMR) and the minimum
+calorie floors are applied exactly as a fresh calculator would apply them.
+
+``project_trajectory`` follows one profile and needs only the standard
+library. ``project_trajectories`` runs many profiles at once as a
+(profiles x weeks) array computation and requires NumPy.
+"""
+
+from collections import namedtuple
+
+from .calculator import CaloricCalculator
+from .models import GOAL_CODES, WeightGoal
+from .results import RESULT_FIELDS, ResultSet
+
+TRAJECTORY_FIELDS = ("weight",) + RESULT_FIELDS
+
+_MAINTAIN = GOAL_CODES[WeightGoal.MAINTAIN]
+_LOSE = GOAL_CODES[WeightGoal.LOSE]
+_GAIN = GOAL_CODES[WeightGoal.GAIN]
+
+Trajectory = namedtuple("Trajectory", ["weight", "results"])
+Trajectory.__doc__ = """
+Projection of one profile.
+
+``weight[i]`` is the projected weight in kg at week ``i`` and ``results[i]``
+the ``CalculationResult`` at that weight; week 0 is the starting profile.
+"""
+
+
+def _goal_change(weight_goal, weight_amount):
+    """Signed kg/week implied by a weight goal."""
+    if weight_goal == WeightGoal.LOSE:
+        return -weight_amount
+    if weight_goal == WeightGoal.GAIN:
+        return weight_amount
+    return 0.0
+
+
+def _projected_weight(weight, week, weekly_change, target_weight):
+    """Weight after ``week`` weeks and whether the target has been reached."""
+    projected = weight + week * weekly_change
+    if target_weight is None or not (
+        (target_weight - weight) * weekly_change > 0 or weight == target_weight
+    ):
+        return projected, False
+    if weekly_change < 0:
+        projected = max(projected, target_weight)
+    else:
+        projected = min(projected, target_weight)
+    return projected, projected == target_weight
+
+
+def project_trajectory(profile, weeks, weekly_change=None, target_weight=None, policy=None):
+    """
+    Project one profile's derived values week by week.
+
+    A single calculator is updated in place each week, so only the
+    weight-dependent values are recomputed.
+
+    Example:
+        >>> trajectory = project_trajectory(
+        ...     {"weight": 100, "height": 175, "age": 40, "sex": "M",
+        ...      "activity_level": "MA", "weight_goal": WeightGoal.LOSE,
+        ...      "weight_amount": 0.5},
+        ...     weeks=12,
+        ... )
+        >>> trajectory.weight[-1], trajectory.results[-1].daily_caloric_needs
+        (94.0, 2076)
+
+    Args:
+        profile (mapping): ``CaloricCalculator`` keyword arguments for week 0
+        weeks (int): Number of weeks to project
+        weekly_change (float): Signed weight change in kg per week. Defaults
+            to ``-weight_amount`` for a loss goal, ``+weight_amount`` for a
+            gain goal and 0 for maintenance.
+        target_weight (float): Weight at which to stop. From the week it is
+            reached the profile is held at the target with a maintenance goal.
+        policy (CalculationPolicy): Tables to calculate with
+
+    Returns:
+        Trajectory: ``weeks + 1`` weights and results, starting at week 0
+
+    Raises:
+        ValueError: If ``weeks`` is negative or the profile is invalid
+    """
+    if weeks < 0:
+        raise ValueError("weeks must not be negative.")
+    profile = dict(profile)
+    if policy is not None:
+        profile["policy"] = policy
+    calculator = CaloricCalculator(**profile)
+    start = calculator.weight
+    if weekly_change is None:
+        weekly_change = _goal_change(calculator.weight_goal, calculator.weight_amount)
+
+    weights = []
+    results = ResultSet()
+    for week in range(weeks + 1):
+        weight, reached = _projected_weight(start, week, weekly_change, target_weight)
+        if reached:
+            calculator.update(weight=weight, weight_goal=WeightGoal.MAINTAIN, weight_amount=0.0)
+        else:
+            calculator.update(weight=weight)
+        weights.append(weight)
+        results.append(calculator.result())
+    return Trajectory(tuple(weights), results)
+
+
+def project_trajectories(
+    weight,
+    height,
+    age,
+    sex,
+    activity_level,
+    weight_goal,
+    weight_amount=0.0,
+    weeks=12,
+    weekly_change=None,
+    target_weight=None,
+    policy=None,
+    body_fat=None,
+):
+    """
+    Project many profiles week by week in one vectorized computation.
+
+    Takes the columns of :func:`caloric_calculator.batch.calculate_batch`.
+    Categorical columns are encoded once and every (profile, week) cell is
+    calculated in a single batch, matching ``project_trajectory`` exactly.
+
+    Args:
+        weeks (int): Number of weeks to project
+        weekly_change (array-like): Signed kg/week per profile. Defaults to
+            the change implied by each profile's goal and amount.
+        target_weight (array-like): Weight per profile at which to stop, or
+            NaN for no target
+        policy (CalculationPolicy): Tables to calculate with
+        body_fat (array-like): Body fat percentage per profile, kept constant
+            over the weeks, for BMR formulas that need it
+
+    Returns:
+        dict: ``(profiles, weeks + 1)`` arrays keyed by ``TRAJECTORY_FIELDS``
+
+    Raises:
+        ValueError: If ``weeks`` is negative or any row is invalid
+    """
+    import numpy as np
+
+    from .batch import _column, calculate_batch, encode_inputs
+
+    if weeks < 0:
+        raise ValueError("weeks must not be negative.")
+    size = max(np.size(column) for column in (
+        weight, height, age, sex, activity_level, weight_goal, weight_amount,
+        weekly_change, target_weight,
+    ))
+    start = _column(weight, size)
+    weight_amount = _column(weight_amount, size)
+    sex_code, activity_code, goal_code = encode_inputs(sex, activity_level, weight_goal, size)
+    if weekly_change is None:
+        weekly_change = np.where(
+            goal_code == _LOSE, -weight_amount,
+            np.where(goal_code == _GAIN, weight_amount, 0.0),
+        )
+    weekly_change = _column(weekly_change, size)[:, None]
+    start = start[:, None]
+
+    projected = start + np.arange(weeks + 1, dtype=np.float64) * weekly_change
+    reached = np.zeros(projected.shape, dtype=bool)
+    if target_weight is not None:
+        target = _column(target_weight, size)[:, None]
+        # NaN targets compare False here, so those rows are left alone
+        ahead = ((target - start) * weekly_change > 0) | (start == target)
+        projected = np.where(
+            ahead,
+            np.where(weekly_change < 0, np.maximum(projected, target), np.minimum(projected, target)),
+            projected,
+        )
+        reached = ahead & (projected == target)
+
+    shape = projected.shape
+    results = calculate_batch(
+        projected.ravel(),
+        np.broadcast_to(_column(height, size)[:, None], shape).ravel(),
+        np.broadcast_to(_column(age, size)[:, None], shape).ravel(),
+        np.broadcast_to(sex_code[:, None], shape).ravel(),
+        np.broadcast_to(activity_code[:, None], shape).ravel(),
+        np.where(reached, _MAINTAIN, goal_code[:, None]).ravel(),
+        np.where(reached, 0.0, weight_amount[:, None]).ravel(),
+        policy=policy,
+        body_fat=(
+            None if body_fat is None
+            else np.broadcast_to(_column(body_fat, size)[:, None], shape).ravel()
+        ),
+    )
+    trajectories = {"weight": projected}
+    for field in RESULT_FIELDS:
+        trajectories[field] = results[field].reshape(shape)
+    return trajectories
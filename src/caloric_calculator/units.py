@@ -0,0 +1,103 @@
+"""
+Units of measurement for inputs and outputs.
+
+Weight may be given in kilograms or pounds and height in centimeters,
+inches or feet; both are converted to kg and cm before anything is
+calculated, exactly as if the caller had converted them, so results do not
+depend on the unit used. Heights in feet and inches can be combined into
+inches with :func:`feet_and_inches`. Energy outputs (``bmr``, ``tdee`` and
+``daily_caloric_needs``) can be reported in kcal or kJ.
+
+The weekly ``weight_amount`` stays in kg/week, since the goal adjustment
+tables are keyed by kg, and weights derived from the inputs (ideal,
+adjusted and recommended weight) are reported in kg.
+"""
+
+# Units in code order, with their size in kg, cm or kcal. A unit's code is
+# its position in the tuple; bulk callers may pass these small ints.
+WEIGHT_UNITS = ("kg", "lb")
+HEIGHT_UNITS = ("cm", "in", "ft")
+ENERGY_UNITS = ("kcal", "kj")
+
+KILOGRAMS_PER_UNIT = (1.0, 0.45359237)
+CENTIMETERS_PER_UNIT = (1.0, 2.54, 30.48)
+KILOJOULES_PER_KILOCALORIE = 4.184
+
+# Result fields measured in kcal/day
+ENERGY_FIELDS = ("bmr", "tdee", "daily_caloric_needs")
+
+
+def _unit_code(units, unit, kind):
+    """Code of a unit name (any case), raising ValueError for unknown units."""
+    try:
+        return units.index(str(unit).lower())
+    except ValueError:
+        raise ValueError(f"Invalid {kind} unit: {unit}. Choose from {units}.") from None
+
+
+def to_kilograms(weight, unit="kg"):
+    """
+    Convert a weight to kg.
+
+    Args:
+        weight (float): Weight in ``unit``
+        unit (str): 'kg' or 'lb'
+
+    Returns:
+        float: Weight in kg; kg weights are returned unchanged
+
+    Raises:
+        ValueError: If the unit is unknown
+    """
+    code = _unit_code(WEIGHT_UNITS, unit, "weight")
+    return weight if code == 0 else weight * KILOGRAMS_PER_UNIT[code]
+
+
+def to_centimeters(height, unit="cm"):
+    """
+    Convert a height to cm.
+
+    Args:
+        height (float): Height in ``unit``
+        unit (str): 'cm', 'in' or 'ft'
+
+    Returns:
+        float: Height in cm; cm heights are returned unchanged
+
+    Raises:
+        ValueError: If the unit is unknown
+    """
+    code = _unit_code(HEIGHT_UNITS, unit, "height")
+    return height if code == 0 else height * CENTIMETERS_PER_UNIT[code]
+
+
+def feet_and_inches(feet, inches=0.0):
+    """
+    Combine a height in feet and inches into inches, for ``height_unit='in'``.
+
+    Works on scalars and NumPy arrays alike. Whole feet and inches combine
+    exactly, where fractional feet (5'10" is 5.8333... ft) would not.
+
+    Example:
+        >>> compute(80, feet_and_inches(5, 10), 30, "M", "MA", WeightGoal.MAINTAIN,
+        ...         height_unit="in")
+
+    Returns:
+        float: Height in inches
+    """
+    return feet * 12 + inches
+
+
+def to_energy_unit(kilocalories, unit="kcal"):
+    """
+    Convert a whole number of kcal to ``unit``.
+
+    kJ values are rounded to the nearest whole kJ (ties to even), so they
+    are derived from the kcal results rather than recalculated.
+
+    Raises:
+        ValueError: If the unit is unknown
+    """
+    if _unit_code(ENERGY_UNITS, unit, "energy") == 0:
+        return kilocalories
+    return round(kilocalories * KILOJOULES_PER_KILOCALORIE)
@@ -0,0 +1,264 @@
+"""
+Vectorized input validation for bulk calculations.
+
+``validate_batch`` checks whole columns at once and returns a boolean mask of
+valid rows plus a per-row bit set of error codes, without raising. Valid rows
+can then go straight into ``calculate_batch`` using the integer codes the
+validation pass already produced:
+
+    >>> report = validate_batch(weight, height, age, sex, activity, goal, amount)
+    >>> results = calculate_batch(*report.select(weight, height, age, amount))
+    >>> summarize(report.errors)
+    {'INVALID_SEX': 2, 'UNSUPPORTED_WEIGHT_AMOUNT': 17}
+
+Requires NumPy.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from .batch import (
+    _CENTIMETERS_PER_UNIT,
+    _KILOGRAMS_PER_UNIT,
+    _column,
+    _encode_field,
+    _policy_arrays,
+    _to_metric,
+)
+from .models import GOAL_CODES, WeightGoal
+from .policy import DEFAULT_POLICY
+
+# Error bits; a row's error code is the OR of every check it fails
+INVALID_WEIGHT = 1
+INVALID_HEIGHT = 2
+INVALID_AGE = 4
+INVALID_SEX = 8
+INVALID_ACTIVITY_LEVEL = 16
+INVALID_WEIGHT_GOAL = 32
+UNSUPPORTED_WEIGHT_AMOUNT = 64
+INVALID_BODY_FAT = 128
+
+ERROR_CODES = {
+    "INVALID_WEIGHT": INVALID_WEIGHT,
+    "INVALID_HEIGHT": INVALID_HEIGHT,
+    "INVALID_AGE": INVALID_AGE,
+    "INVALID_SEX": INVALID_SEX,
+    "INVALID_ACTIVITY_LEVEL": INVALID_ACTIVITY_LEVEL,
+    "INVALID_WEIGHT_GOAL": INVALID_WEIGHT_GOAL,
+    "UNSUPPORTED_WEIGHT_AMOUNT": UNSUPPORTED_WEIGHT_AMOUNT,
+    "INVALID_BODY_FAT": INVALID_BODY_FAT,
+}
+
+# Inclusive (low, high) bounds for the numeric inputs, in kg, cm and years
+DEFAULT_LIMITS = {
+    "weight": (20.0, 400.0),
+    "height": (100.0, 250.0),
+    "age": (18.0, 120.0),
+}
+
+_MAINTAIN = GOAL_CODES[WeightGoal.MAINTAIN]
+
+
+class ValidationReport(
+    namedtuple(
+        "ValidationReport",
+        [
+            "valid", "errors", "sex", "activity_level", "weight_goal",
+            "weight_unit", "height_unit",
+        ],
+        defaults=("kg", "cm"),
+    )
+):
+    """
+    Result of :func:`validate_batch`.
+
+    ``valid`` is a boolean mask of rows that passed every check and
+    ``errors`` a uint8 array of ``ERROR_CODES`` bits per row (0 for valid
+    rows). ``sex``, ``activity_level`` and ``weight_goal`` are the integer
+    codes of each row, -1 where the value is invalid. ``weight_unit`` and
+    ``height_unit`` are the units the validated columns were given in.
+    """
+
+    __slots__ = ()
+
+    def select(self, weight, height, age, weight_amount=0.0, body_fat=None):
+        """
+        Get ``calculate_batch`` arguments for the valid rows only.
+
+        Weights and heights are converted from the report's units to kg and
+        cm, the ``calculate_batch`` defaults, so no unit arguments are
+        needed.
+
+        Args:
+            weight (array-like): The validated weight column
+            height (array-like): The validated height column
+            age (array-like): The validated age column
+            weight_amount (array-like): The validated weight amount column
+            body_fat (array-like): The validated body fat column, for BMR
+                formulas that need it
+
+        Returns:
+            tuple: ``calculate_batch`` positional arguments in order, with
+            the categorical columns given as codes. When ``body_fat`` is
+            given, its valid rows follow as an eighth element, to pass as
+            ``calculate_batch(..., body_fat=...)``.
+        """
+        size = len(self.valid)
+        valid = self.valid
+        selected = (
+            _to_metric(
+                _column(weight, size), self.weight_unit, "weight_unit", _KILOGRAMS_PER_UNIT, size
+            )[valid],
+            _to_metric(
+                _column(height, size), self.height_unit, "height_unit", _CENTIMETERS_PER_UNIT,
+                size,
+            )[valid],
+            _column(age, size)[valid],
+            self.sex[valid],
+            self.activity_level[valid],
+            self.weight_goal[valid],
+            _column(weight_amount, size)[valid],
+        )
+        if body_fat is None:
+            return selected
+        return selected + (_column(body_fat, size)[valid],)
+
+
+def _out_of_range(values, limits):
+    low, high = limits
+    # Written as a negation so NaN fails the check
+    return ~((values >= low) & (values <= high))
+
+
+def _unsupported_amount(goal_code, weight_amount, goal_adjustments):
+    """Rows whose goal needs an adjustment step that the policy does not define."""
+    unsupported = np.zeros(goal_code.shape, dtype=bool)
+    for code, (amounts, _) in enumerate(goal_adjustments):
+        if code == _MAINTAIN:
+            continue
+        rows = goal_code == code
+        unsupported |= rows & ~np.isin(weight_amount, amounts)
+    return unsupported
+
+
+def validate_batch(
+    weight,
+    height,
+    age,
+    sex,
+    activity_level,
+    weight_goal,
+    weight_amount=0.0,
+    policy=None,
+    limits=None,
+    body_fat=None,
+    weight_unit="kg",
+    height_unit="cm",
+):
+    """
+    Check many profiles at once without raising.
+
+    Takes the columns of :func:`caloric_calculator.batch.calculate_batch`.
+    Beyond what the calculator rejects, this flags numeric inputs outside
+    ``limits`` (including NaN) and weight loss or gain amounts with no
+    adjustment step in the policy, which the calculator silently treats as
+    a zero adjustment. Maintenance rows may have any finite amount. Rows
+    ``calculate_batch`` would reject are flagged whatever the limits: a
+    weight or height that is not positive, or a number that is not finite.
+    When the policy's BMR formula needs a body fat percentage, rows without
+    one in [0, 100) are flagged too, so valid rows never fail to calculate.
+    Weights and heights are converted to kg and cm before they are checked,
+    so ``limits`` are always in kg, cm and years.
+
+    Args:
+        policy (CalculationPolicy): Tables whose activity levels and
+            adjustment steps are allowed. Defaults to ``DEFAULT_POLICY``.
+        limits (dict): ``(low, high)`` bounds overriding ``DEFAULT_LIMITS``
+            for 'weight', 'height' or 'age'
+        body_fat (array-like): Body fat percentage per row
+        weight_unit (array-like): 'kg' or 'lb', for all rows or per row
+        height_unit (array-like): 'cm', 'in' or 'ft', for all rows or per row
+
+    Returns:
+        ValidationReport: Valid-row mask, per-row error bits and codes
+
+    Raises:
+        ValueError: If a weight or height unit is unknown
+    """
+    size = max(np.size(column) for column in (
+        weight, height, age, sex, activity_level, weight_goal, weight_amount
+    ))
+    bounds = dict(DEFAULT_LIMITS)
+    if limits:
+        bounds.update(limits)
+    policy = DEFAULT_POLICY if policy is None else policy
+    activity_factors, _, goal_adjustments = _policy_arrays(policy)
+
+    errors = np.zeros(size, dtype=np.uint8)
+    weight = _to_metric(
+        _column(weight, size), weight_unit, "weight_unit", _KILOGRAMS_PER_UNIT, size
+    )
+    height = _to_metric(
+        _column(height, size), height_unit, "height_unit", _CENTIMETERS_PER_UNIT, size
+    )
+    for field, values, bit, low in (
+        ("weight", weight, INVALID_WEIGHT, 0.0),
+        ("height", height, INVALID_HEIGHT, 0.0),
+        ("age", _column(age, size), INVALID_AGE, -np.inf),
+    ):
+        with np.errstate(invalid="ignore"):
+            invalid = ~((values > low) & np.isfinite(values))
+        errors[_out_of_range(values, bounds[field]) | invalid] |= bit
+
+    sex_code = _encode_field("sex", sex, size, strict=False)
+    activity_code = _encode_field("activity_level", activity_level, size, strict=False)
+    goal_code = _encode_field("weight_goal", weight_goal, size, strict=False)
+    errors[sex_code < 0] |= INVALID_SEX
+    # Activity levels the policy has no factor for are invalid too
+    no_factor = (activity_code >= 0) & np.isnan(activity_factors)[activity_code]
+    activity_code = np.where(no_factor, -1, activity_code)
+    errors[activity_code < 0] |= INVALID_ACTIVITY_LEVEL
+    errors[goal_code < 0] |= INVALID_WEIGHT_GOAL
+    amount = _column(weight_amount, size)
+    unsupported = _unsupported_amount(goal_code, amount, goal_adjustments) | ~np.isfinite(amount)
+    errors[unsupported] |= UNSUPPORTED_WEIGHT_AMOUNT
+    if policy.formula.requires_body_fat:
+        if body_fat is None:
+            errors |= INVALID_BODY_FAT
+        else:
+            body_fat = _column(body_fat, size)
+            # Written as a negation so NaN fails the check
+            errors[~((body_fat >= 0) & (body_fat < 100))] |= INVALID_BODY_FAT
+
+    return ValidationReport(
+        errors == 0, errors, sex_code, activity_code, goal_code, weight_unit, height_unit
+    )
+
+
+def error_names(code):
+    """
+    Decode one row's error code.
+
+    Returns:
+        list: Names from ``ERROR_CODES`` whose bit is set in ``code``
+    """
+    return [name for name, bit in ERROR_CODES.items() if code & bit]
+
+
+def summarize(errors):
+    """
+    Count rows failing each check.
+
+    Args:
+        errors (ndarray): ``ValidationReport.errors``
+
+    Returns:
+        dict: Row count per ``ERROR_CODES`` name, for checks that failed
+    """
+    counts = {}
+    for name, bit in ERROR_CODES.items():
+        count = int(np.count_nonzero(errors & bit))
+        if count:
+            counts[name] = count
+    return counts
@@ -0,0 +1,109 @@
+import itertools
+import unittest
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the [fast] extra
+    np = None
+
+from src.caloric_calculator import CaloricCalculator, WeightGoal
+
+if np is not None:
+    from src.caloric_calculator.batch import BATCH_FIELDS, calculate_batch, round2
+
+
+@unittest.skipIf(np is None, "NumPy is required for the batch engine")
+class TestCalculateBatch(unittest.TestCase):
+
+    def assertMatchesScalar(self, rows):
+        """Assert every batch row equals the scalar calculator field by field."""
+        results = calculate_batch(*zip(*rows))
+        for index, row in enumerate(rows):
+            calc = CaloricCalculator(*row)
+            expected = {field: getattr(calc, field) for field in BATCH_FIELDS}
+            actual = {field: results[field][index] for field in BATCH_FIELDS}
+            self.assertEqual(actual, expected, msg=str(row))
+
+    def test_matches_scalar_across_inputs(self):
+        """Test batch output equals the scalar class for a grid of profiles."""
+        rows = list(itertools.product(
+            [45, 55.5, 70, 85.25, 100, 140],
+            [150, 165.5, 175, 190],
+            [20, 45],
+            ["M", "F"],
+            ["S", "LA", "MA", "VA", "SA"],
+            list(WeightGoal),
+            [0.0, 0.5, 2.5, 0.3],
+        ))
+        self.assertMatchesScalar(rows)
+
+    def test_bmi_band_edges(self):
+        """Test the gaps between BMI bands fall through to adjusted weight."""
+        # Weights around BMI 18.5, 24.9/25 and 29.9/30 at 175 cm
+        weights = [56.65, 56.66, 76.25, 76.26, 76.5, 76.57, 91.55, 91.6, 91.87, 91.9]
+        rows = [
+            (weight, 175, 30, "M", "MA", WeightGoal.MAINTAIN, 0.0)
+            for weight in weights
+        ]
+        self.assertMatchesScalar(rows)
+
+    def test_minimum_calorie_floors(self):
+        """Test sex-specific floors are applied per row."""
+        results = calculate_batch(
+            [45, 55], [150, 160], [20, 20], ["F", "M"], "S", WeightGoal.LOSE, 2.0
+        )
+        self.assertEqual(results["daily_caloric_needs"].tolist(), [1300, 1500])
+
+    def test_scalar_arguments_broadcast(self):
+        """Test scalar arguments apply to every row."""
+        results = calculate_batch([60, 70, 80], 175, 30, "m", "la", "maintain")
+        self.assertEqual(len(results["bmi"]), 3)
+        self.assertEqual(results["activity_factor"].tolist(), [1.375] * 3)
+
+    def test_integer_dtypes(self):
+        """Test integer outputs are returned as int64 arrays."""
+        results = calculate_batch([70], [175], [30], ["M"], ["MA"], [WeightGoal.GAIN], [0.5])
+        for field in ("bmr", "tdee", "daily_caloric_needs"):
+            self.assertEqual(results[field].dtype, np.int64)
+
+    def test_invalid_values_raise(self):
+        """Test invalid categorical values raise ValueError like the scalar class."""
+        with self.assertRaises(ValueError):
+            calculate_batch([70, 70], 175, 30, ["M", "X"], "MA", WeightGoal.MAINTAIN)
+        with self.assertRaises(ValueError):
+            calculate_batch([70, 70], 175, 30, "M", ["MA", "XX"], WeightGoal.MAINTAIN)
+        with self.assertRaises(ValueError):
+            calculate_batch([70, 70], 175, 30, "M", "MA", ["maintain", "shrink"])
+
+    def test_invalid_numbers_raise(self):
+        """Test non-finite inputs and non-positive weights or heights raise ValueError."""
+        for column, values in (
+            ("weight", [70, float("nan")]),
+            ("weight", [70, 0]),
+            ("height", [175, -175]),
+            ("height", [175, float("inf")]),
+            ("age", [30, float("nan")]),
+            ("weight_amount", [0.5, float("-inf")]),
+        ):
+            arguments = {"weight": 70, "height": 175, "age": 30, "sex": "M",
+                         "activity_level": "MA", "weight_goal": "lose", "weight_amount": 0.5}
+            arguments[column] = values
+            with self.subTest(column=column, value=values[1]):
+                with self.assertRaisesRegex(ValueError, "row 1"):
+                    calculate_batch(**arguments)
+        with self.assertRaisesRegex(ValueError, "Invalid weight in row 0"):
+            calculate_batch(float("nan"), 175, 30, "M", "MA", "maintain", weight_unit="lb")
+
+    def test_round2_matches_builtin_round(self):
+        """Test round2 agrees with round(x, 2) on values next to .5 ties."""
+        values = np.concatenate([
+            np.arange(-20000, 20000) / 1000 + 0.005,
+            (np.arange(-20000, 20000) + 0.5) / 100,
+            np.arange(0, 40000) / 10000,
+        ])
+        expected = [round(float(value), 2) for value in values]
+        self.assertEqual(round2(values).tolist(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import unittest
+
+BENCHMARK_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks", "bench_calculator.py"
+)
+
+
+def _load_benchmarks():
+    spec = importlib.util.spec_from_file_location("bench_calculator", BENCHMARK_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bench = _load_benchmarks()
+
+    def test_profiles_cover_bands_goals_and_sexes(self):
+        """Test generated profiles span every BMI band, goal and sex."""
+        profiles = self.bench.generate_profiles(2000)
+        bmis = [weight / (height / 100) ** 2 for weight, height, *_ in profiles]
+        self.assertLess(min(bmis), 18.5)
+        self.assertGreater(max(bmis), 30)
+        self.assertEqual({profile[3] for profile in profiles}, {"M", "F"})
+        self.assertEqual(len({profile[5] for profile in profiles}), 3)
+        if self.bench.np is not None:
+            columns = self.bench.generate_columns(2000)
+            self.assertEqual([list(column) for column in zip(*profiles)][:5],
+                             [column.tolist() for column in columns[:5]])
+
+    def test_compare_flags_regressions(self):
+        """Test compare() reports only slowdowns beyond the tolerance."""
+        baseline = {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}}
+        results = {"a": {"seconds": 1.05}, "b": {"seconds": 1.5}, "c": {"seconds": 9.0}}
+        regressions = self.bench.compare(results, baseline, 0.1)
+        self.assertEqual([name for name, *_ in regressions], ["b"])
+
+    def test_quick_run_outputs_json(self):
+        """Test a tiny bulk run prints a machine-readable report."""
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            status = self.bench.main(["--only", "bulk", "--scales", "10", "--repeat", "1"])
+        self.assertEqual(status, 0)
+        report = json.loads(output.getvalue())
+        self.assertIn("stream.10", report["results"])
+        self.assertEqual(report["results"]["stream.10"]["rows"], 10)
+
+    def test_import_benchmark(self):
+        """Test the import benchmark times the base package in a fresh interpreter."""
+        results = {}
+        self.bench.run_import(results, 1)
+        self.assertGreater(results["import.caloric_calculator"]["seconds"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
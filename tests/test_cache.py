@@ -0,0 +1,173 @@
+import multiprocessing
+import threading
+import unittest
+
+from src.caloric_calculator import DEFAULT_POLICY, WeightGoal, compute
+from src.caloric_calculator.cache import (
+    CalculationCache,
+    SharedMemoryBackend,
+    make_key,
+)
+
+
+def _fill_shared_cache(name, maxsize, lock):
+    backend = SharedMemoryBackend.attach(name, maxsize, lock)
+    CalculationCache(backend=backend).calculate(85, 175, 35, "M", "LA", WeightGoal.LOSE, 0.5)
+    backend.close()
+
+
+class TestCalculationCache(unittest.TestCase):
+
+    def test_repeat_requests_hit(self):
+        """Test repeated inputs are served from the cache."""
+        cache = CalculationCache(maxsize=4)
+        first = cache.calculate(70, 175, 30, "M", "MA", WeightGoal.MAINTAIN)
+        second = cache.calculate(70, 175, 30, "M", "MA", WeightGoal.MAINTAIN)
+        self.assertIs(first, second)
+        self.assertEqual(first, compute(70, 175, 30, "M", "MA", WeightGoal.MAINTAIN))
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.size), (1, 1, 1))
+
+    def test_body_fat_formula(self):
+        """Test body fat is part of the key only for formulas that need it."""
+        policy = DEFAULT_POLICY.replace(bmr_formula="katch_mcardle")
+        cache = CalculationCache(policy=policy)
+        profile = (70, 175, 30, "M", "MA", WeightGoal.MAINTAIN, 0.0)
+        lean = cache.calculate(*profile, body_fat=12)
+        heavy = cache.calculate(*profile, body_fat=30)
+        self.assertEqual(lean, compute(*profile, policy=policy, body_fat=12))
+        self.assertEqual(heavy, compute(*profile, policy=policy, body_fat=30))
+        self.assertEqual(cache.calculate(*profile, body_fat=12.0), lean)
+        self.assertEqual((cache.stats().hits, cache.stats().misses), (1, 2))
+        with self.assertRaisesRegex(ValueError, "requires body_fat"):
+            cache.calculate(*profile)
+
+        cache = CalculationCache()
+        cache.calculate(*profile, body_fat=12)
+        cache.calculate(*profile, body_fat=30)
+        self.assertEqual(cache.stats().hits, 1)
+
+    def test_key_uses_normalized_inputs(self):
+        """Test inputs differing only before normalization share an entry."""
+        self.assertEqual(
+            make_key(70, 175, 30, "m", "la", WeightGoal.LOSE, "0.5"),
+            make_key(70, 175, 30, "M", "LA", WeightGoal.LOSE, 0.5),
+        )
+        cache = CalculationCache()
+        cache.calculate(70, 175, 30, "m", "la", WeightGoal.LOSE, "0.5")
+        cache.calculate(70, 175, 30, "M", "LA", WeightGoal.LOSE, 0.5)
+        self.assertEqual(cache.stats().hits, 1)
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted first."""
+        cache = CalculationCache(maxsize=2)
+        cache.calculate(60, 175, 30, "M", "MA", WeightGoal.MAINTAIN)
+        cache.calculate(70, 175, 30, "M", "MA", WeightGoal.MAINTAIN)
+        cache.calculate(60, 175, 30, "M", "MA", WeightGoal.MAINTAIN)
+        cache.calculate(80, 175, 30, "M", "MA", WeightGoal.MAINTAIN)
+        self.assertEqual(cache.stats().evictions, 1)
+        cache.calculate(60, 175, 30, "M", "MA", WeightGoal.MAINTAIN)
+        self.assertEqual(cache.stats().hits, 2)
+
+    def test_invalid_inputs_are_not_cached(self):
+        """Test invalid inputs raise and leave the cache empty."""
+        cache = CalculationCache()
+        with self.assertRaises(ValueError):
+            cache.calculate(70, 175, 30, "X", "MA", WeightGoal.MAINTAIN)
+        self.assertEqual(cache.stats().size, 0)
+
+    def test_concurrent_access(self):
+        """Test counters stay consistent under concurrent use."""
+        cache = CalculationCache(maxsize=8)
+
+        def work():
+            for weight in range(60, 80):
+                cache.calculate(weight, 175, 30, "F", "S", WeightGoal.MAINTAIN)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = cache.stats()
+        self.assertEqual(stats.hits + stats.misses, 8 * 20)
+        self.assertLessEqual(stats.size, 8)
+
+    def test_clear(self):
+        """Test clear() empties the cache and resets counters."""
+        cache = CalculationCache()
+        cache.calculate(70, 175, 30, "M", "MA", WeightGoal.MAINTAIN)
+        cache.clear()
+        self.assertEqual(tuple(cache.stats()), (0, 0, 0, 0, 1024))
+
+
+@unittest.skipUnless(
+    "fork" in multiprocessing.get_all_start_methods(), "requires the fork start method"
+)
+class TestSharedMemoryBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.context = multiprocessing.get_context("fork")
+        self.backend = SharedMemoryBackend(maxsize=64, lock=self.context.Lock())
+        self.addCleanup(self.backend.close)
+
+    def test_entries_are_shared_between_processes(self):
+        """Test an entry stored by a child process is a hit in the parent."""
+        process = self.context.Process(
+            target=_fill_shared_cache,
+            args=(self.backend.name, self.backend.maxsize, self.backend.lock),
+        )
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+
+        cache = CalculationCache(backend=self.backend)
+        result = cache.calculate(85, 175, 35, "m", "la", WeightGoal.LOSE, 0.5)
+        self.assertEqual(cache.stats().hits, 1)
+        self.assertEqual(result, compute(85, 175, 35, "M", "LA", WeightGoal.LOSE, 0.5))
+
+    def test_collisions_count_as_evictions(self):
+        """Test a single-slot table evicts on every new key."""
+        backend = SharedMemoryBackend(maxsize=1)
+        self.addCleanup(backend.close)
+        cache = CalculationCache(backend=backend)
+        cache.calculate(60, 175, 30, "M", "MA", WeightGoal.MAINTAIN)
+        cache.calculate(70, 175, 30, "M", "MA", WeightGoal.MAINTAIN)
+        self.assertEqual(cache.stats().evictions, 1)
+        self.assertEqual(cache.stats().size, 1)
+
+    def test_policy_is_checked(self):
+        """Test a table only attaches to, and caches for, the policy it was created with."""
+        clinic = DEFAULT_POLICY.replace(minimum_calories={"F": 1400, "M": 1600})
+        backend = SharedMemoryBackend(maxsize=8, policy=clinic)
+        self.addCleanup(backend.close)
+        with self.assertRaisesRegex(ValueError, "different policy"):
+            SharedMemoryBackend.attach(backend.name, 8, backend.lock)
+        with self.assertRaisesRegex(ValueError, "different policy"):
+            CalculationCache(backend=backend)
+        attached = SharedMemoryBackend.attach(backend.name, 8, backend.lock, policy=clinic)
+        self.addCleanup(attached.close)
+        result = CalculationCache(backend=attached, policy=clinic).calculate(
+            45, 165, 60, "F", "S", WeightGoal.LOSE, 1.0
+        )
+        self.assertEqual(result.daily_caloric_needs, 1400)
+        self.assertEqual(len(backend), 1)
+        backend.clear()
+        self.assertEqual(len(backend), 0)
+        SharedMemoryBackend.attach(backend.name, 8, backend.lock, policy=clinic).close()
+
+    def test_body_fat_formula(self):
+        """Test shared entries are keyed on body fat for formulas that need it."""
+        policy = DEFAULT_POLICY.replace(bmr_formula="katch_mcardle")
+        backend = SharedMemoryBackend(maxsize=64, policy=policy)
+        self.addCleanup(backend.close)
+        cache = CalculationCache(backend=backend, policy=policy)
+        profile = (70, 175, 30, "M", "MA", WeightGoal.MAINTAIN, 0.0)
+        for body_fat in (12, 30, 12):
+            self.assertEqual(cache.calculate(*profile, body_fat=body_fat),
+                             compute(*profile, policy=policy, body_fat=body_fat))
+        self.assertEqual((cache.stats().hits, cache.stats().misses), (1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -290,6 +290,170 @@ class TestCaloricCalculator(unittest.TestCase):
                 weight_goal=WeightGoal.MAINTAIN,
             )
 
+    def test_caloric_requirements_alias(self):
+        """Test caloric_requirements still aliases tdee."""
+        self.assertEqual(self.calculator.caloric_requirements, self.calculator.tdee)
+
+    def test_reassigning_input_recomputes(self):
+        """Test reassigning an input invalidates derived values."""
+        self.calculator.weight = 100
+        expected = CaloricCalculator(
+            weight=100,
+            height=175,
+            age=30,
+            sex="M",
+            activity_level="MA",
+            weight_goal=WeightGoal.MAINTAIN,
+        )
+        self.assertEqual(self.calculator.bmi, expected.bmi)
+        self.assertEqual(self.calculator.recommended_weight, expected.adjusted_weight)
+        self.assertEqual(self.calculator.daily_caloric_needs, expected.daily_caloric_needs)
+
+        self.calculator.activity_level = "SA"
+        self.assertEqual(self.calculator.activity_factor, 1.9)
+        self.assertEqual(self.calculator.tdee, round(expected.bmr * 1.9))
+
+
+class TestLazyCaloricCalculator(unittest.TestCase):
+
+    def test_bmi_only_computes_bmi(self):
+        """Test a BMI-only request runs a single calculation."""
+        calls = []
+
+        class CountingCalculator(CaloricCalculator):
+            def __getattribute__(self, name):
+                if name.startswith(("calculate_", "get_")):
+                    calls.append(name)
+                return super().__getattribute__(name)
+
+        calc = CountingCalculator(
+            weight=70,
+            height=175,
+            age=30,
+            sex="M",
+            activity_level="MA",
+            weight_goal=WeightGoal.MAINTAIN,
+            lazy=True,
+        )
+        self.assertEqual(calls, [])
+        self.assertEqual(calc.bmi, 22.86)
+        self.assertEqual(calc.bmi, 22.86)
+        self.assertEqual(calls, ["calculate_bmi"])
+
+    def test_lazy_matches_eager(self):
+        """Test lazily computed values equal the eager ones."""
+        kwargs = dict(
+            weight=100,
+            height=175,
+            age=40,
+            sex="F",
+            activity_level="VA",
+            weight_goal=WeightGoal.LOSE,
+            weight_amount=1.0,
+        )
+        eager = CaloricCalculator(**kwargs)
+        lazy = CaloricCalculator(lazy=True, **kwargs)
+        self.assertEqual(lazy.daily_caloric_needs, eager.daily_caloric_needs)
+        for field in CaloricCalculator.DERIVED_FIELDS:
+            with self.subTest(field=field):
+                self.assertEqual(getattr(lazy, field), getattr(eager, field))
+        self.assertEqual(lazy.caloric_requirements, eager.caloric_requirements)
+
+    def test_lazy_defers_validation(self):
+        """Test invalid inputs only raise when a dependent value is read."""
+        calc = CaloricCalculator(
+            weight=70,
+            height=175,
+            age=30,
+            sex="M",
+            activity_level="INVALID",
+            weight_goal=WeightGoal.MAINTAIN,
+            lazy=True,
+        )
+        self.assertEqual(calc.bmr, 1649)
+        with self.assertRaises(ValueError):
+            calc.tdee
+
+
+class TestUpdate(unittest.TestCase):
+
+    def setUp(self):
+        self.kwargs = dict(
+            weight=70,
+            height=175,
+            age=30,
+            sex="M",
+            activity_level="MA",
+            weight_goal=WeightGoal.LOSE,
+            weight_amount=0.5,
+        )
+        self.calculator = CaloricCalculator(**self.kwargs)
+
+    def assertMatchesFresh(self, calculator, **changes):
+        self.kwargs.update(changes)
+        fresh = CaloricCalculator(**self.kwargs)
+        self.assertEqual(calculator.result(), fresh.result())
+
+    def test_weight_change(self):
+        """Test a weight change recomputes the weight-dependent chain."""
+        changed = self.calculator.update(weight=100)
+        self.assertEqual(
+            changed,
+            ("bmi", "adjusted_weight", "recommended_weight", "bmr", "tdee",
+             "daily_caloric_needs"),
+        )
+        self.assertMatchesFresh(self.calculator, weight=100)
+
+    def test_activity_change_skips_upstream(self):
+        """Test an activity change leaves BMI and BMR untouched."""
+        calls = []
+        original = CaloricCalculator.calculate_bmr
+
+        class CountingCalculator(CaloricCalculator):
+            def calculate_bmr(self):
+                calls.append("bmr")
+                return original(self)
+
+        calculator = CountingCalculator(**self.kwargs)
+        changed = calculator.update(activity_level="sa")
+        self.assertEqual(changed, ("activity_factor", "tdee", "daily_caloric_needs"))
+        self.assertEqual(calls, ["bmr"])
+        self.assertMatchesFresh(calculator, activity_level="SA")
+
+    def test_goal_change_only_touches_dcn(self):
+        """Test goal changes only affect daily caloric needs."""
+        self.assertEqual(self.calculator.update(weight_amount="1.0"), ("daily_caloric_needs",))
+        self.assertMatchesFresh(self.calculator, weight_amount=1.0)
+
+    def test_unchanged_outputs_are_not_reported(self):
+        """Test nothing is reported when outputs do not move."""
+        self.assertEqual(self.calculator.update(weight=70.0), ())
+        # BMI and BMR round to the same values for 70.001 kg
+        self.assertEqual(
+            self.calculator.update(weight=70.001),
+            ("adjusted_weight", "recommended_weight"),
+        )
+
+    def test_lazy_update_only_recomputes_cached_values(self):
+        """Test lazy calculators only recompute values already computed."""
+        calculator = CaloricCalculator(lazy=True, **self.kwargs)
+        calculator.bmi
+        self.assertEqual(calculator.update(weight=100), ("bmi",))
+        self.assertMatchesFresh(calculator, weight=100)
+
+    def test_failed_update_is_rolled_back(self):
+        """Test an invalid update raises and leaves the calculator unchanged."""
+        before = self.calculator.result()
+        with self.assertRaises(ValueError):
+            self.calculator.update(weight=90, activity_level="INVALID")
+        self.assertEqual(self.calculator.weight, 70)
+        self.assertEqual(self.calculator.result(), before)
+
+    def test_unknown_field(self):
+        """Test updating a derived or unknown field raises TypeError."""
+        with self.assertRaises(TypeError):
+            self.calculator.update(bmi=30)
+
 
 if __name__ == "__main__":
     unittest.main()
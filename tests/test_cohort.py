@@ -0,0 +1,178 @@
+import pickle
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the [fast] extra
+    np = None
+
+from src.caloric_calculator import DEFAULT_POLICY, WeightGoal
+
+if np is not None:
+    from src.caloric_calculator.batch import calculate_batch
+    from src.caloric_calculator.cohort import (
+        BMI_BANDS,
+        METRICS,
+        CohortAggregator,
+        bmi_bands,
+    )
+    from src.caloric_calculator.synthetic import COLUMNS, generate_population
+
+
+def _profiles(size, seed):
+    population = next(generate_population(size, seed=seed, chunk_size=size))
+    return tuple(population[name] for name in COLUMNS[:7])
+
+
+def _aggregate_in_worker(seed):
+    aggregator = CohortAggregator()
+    aggregator.update(*_profiles(5000, seed))
+    return aggregator
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestCohortAggregator(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.profiles = _profiles(20000, 0)
+        cls.results = calculate_batch(*cls.profiles)
+        cls.aggregator = CohortAggregator()
+        cls.aggregator.update(*cls.profiles)
+
+    def test_bmi_bands(self):
+        """Test bands follow the branches of get_recommended_weight."""
+        bmi = np.array([16.0, 18.5, 24.9, 24.95, 25.0, 29.9, 29.95, 30.0])
+        self.assertEqual(
+            [BMI_BANDS[band] for band in bmi_bands(bmi)],
+            ["underweight", "normal", "normal", "obese", "overweight", "overweight",
+             "obese", "obese"],
+        )
+
+    def test_exact_statistics(self):
+        """Test counts, means, deviations and extremes match NumPy per group."""
+        summary = self.aggregator.summary(by=("sex", "weight_goal"))
+        sex, goal = self.profiles[3], self.profiles[5]
+        self.assertEqual(len(summary), 6)
+        for (key_sex, key_goal), metrics in summary.items():
+            rows = (sex == key_sex) & (goal == key_goal.value)
+            for metric in METRICS:
+                values = self.results[metric][rows]
+                stats = metrics[metric]
+                self.assertEqual(stats.count, rows.sum())
+                self.assertAlmostEqual(stats.mean, values.mean(), places=6)
+                self.assertAlmostEqual(stats.std, values.std(), places=4)
+                self.assertEqual(stats.minimum, values.min())
+                self.assertEqual(stats.maximum, values.max())
+
+    def test_quantiles_within_one_bin(self):
+        """Test quantile estimates are within one bin width of the exact values."""
+        quantiles = (0.0, 0.1, 0.5, 0.9, 0.99, 1.0)
+        summary = self.aggregator.summary(by=("bmi_band",), quantiles=quantiles)
+        bands = bmi_bands(self.results["bmi"])
+        for (band,), metrics in summary.items():
+            rows = bands == BMI_BANDS.index(band)
+            for metric in METRICS:
+                exact = np.quantile(self.results[metric][rows], quantiles)
+                width = self.aggregator.bins[metric][2]
+                for estimate, value in zip(metrics[metric].quantiles, exact):
+                    self.assertLessEqual(abs(estimate - value), width, (band, metric))
+                self.assertEqual(metrics[metric].quantiles[0], exact[0])
+                self.assertEqual(metrics[metric].quantiles[-1], exact[-1])
+
+    def test_histogram(self):
+        """Test histogram counts match the rows of the selected groups."""
+        edges, counts = self.aggregator.histogram("bmi", sex="F", bmi_band="normal")
+        rows = (self.profiles[3] == "F") & (bmi_bands(self.results["bmi"]) == 1)
+        bmi = self.results["bmi"][rows]
+        self.assertEqual(len(edges), len(counts) + 1)
+        self.assertEqual(counts.sum(), len(bmi))
+        inner = edges[1:-1]
+        np.testing.assert_array_equal(
+            counts, np.bincount(np.searchsorted(inner, bmi, side="right"), minlength=len(counts))
+        )
+        edges, counts = self.aggregator.histogram("tdee", weight_goal=WeightGoal.GAIN)
+        self.assertEqual(counts.sum(), (self.profiles[5] == "gain").sum())
+        self.assertEqual(self.aggregator.histogram("bmr", sex="X")[1].sum(), 0)
+
+    def test_outliers_use_overflow_bins(self):
+        """Test values outside the bins are counted and bound the outer bins."""
+        aggregator = CohortAggregator(bins={"bmi": (20.0, 30.0, 1.0)})
+        aggregator.update([40, 70, 200], 175, 30, "M", "MA", WeightGoal.MAINTAIN)
+        edges, counts = aggregator.histogram("bmi")
+        self.assertEqual((counts[0], counts[-1], counts.sum()), (1, 1, 3))
+        self.assertEqual((edges[0], edges[-1]), (13.06, 65.31))
+        stats = aggregator.summary(by=(), quantiles=(0.0, 1.0))[()]["bmi"]
+        self.assertEqual(stats.quantiles, (13.06, 65.31))
+
+    def test_merge_matches_single_pass(self):
+        """Test merged partial aggregates equal one aggregate over all rows."""
+        parts = [CohortAggregator(), CohortAggregator()]
+        parts[0].add({metric: self.results[metric][:7000] for metric in METRICS},
+                     *(column[:7000] for column in self.profiles[3:6]))
+        parts[1].update(*(column[7000:] for column in self.profiles))
+        merged = parts[0].merge(parts[1])
+        self.assertEqual(merged.count, len(self.profiles[0]))
+        np.testing.assert_array_equal(merged.counts, self.aggregator.counts)
+        for metric in METRICS:
+            np.testing.assert_array_equal(
+                merged.histograms[metric], self.aggregator.histograms[metric]
+            )
+            np.testing.assert_array_equal(
+                merged.minimums[metric], self.aggregator.minimums[metric]
+            )
+        self.assertEqual(
+            merged.summary(by=("activity_level",), quantiles=(0.5,)).keys(),
+            self.aggregator.summary(by=("activity_level",), quantiles=(0.5,)).keys(),
+        )
+        with self.assertRaises(ValueError):
+            merged.merge(CohortAggregator(bins={"bmr": (0.0, 5000.0, 10.0)}))
+        policy = DEFAULT_POLICY.replace(bmr_formula="harris_benedict")
+        with self.assertRaisesRegex(ValueError, "different policies"):
+            merged.merge(CohortAggregator(policy=policy))
+        merged.merge(CohortAggregator(policy=DEFAULT_POLICY.replace()))
+
+    def test_merge_across_processes(self):
+        """Test aggregates built in worker processes merge in the parent."""
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            parts = list(executor.map(_aggregate_in_worker, range(3)))
+        merged = CohortAggregator()
+        for part in parts:
+            merged.merge(part)
+        expected = CohortAggregator()
+        for seed in range(3):
+            expected.update(*_profiles(5000, seed))
+        np.testing.assert_array_equal(merged.counts, expected.counts)
+        self.assertEqual(
+            merged.summary(by=()), pickle.loads(pickle.dumps(expected)).summary(by=())
+        )
+
+    def test_policy(self):
+        """Test update() calculates with the aggregator's policy."""
+        policy = DEFAULT_POLICY.replace(minimum_calories={"F": 2500, "M": 2500})
+        aggregator = CohortAggregator(policy=policy)
+        aggregator.update(*self.profiles)
+        summary = aggregator.summary(by=(), quantiles=(0.0,))
+        self.assertEqual(summary[()]["daily_caloric_needs"].minimum, 2500)
+
+    def test_invalid_arguments(self):
+        """Test invalid rows, dimensions, metrics, quantiles and bins raise ValueError."""
+        aggregator = CohortAggregator()
+        with self.assertRaises(ValueError):
+            aggregator.update([70, 80], 175, 30, ["M", "X"], "MA", WeightGoal.MAINTAIN)
+        self.assertEqual(aggregator.count, 0)
+        with self.assertRaises(ValueError):
+            self.aggregator.summary(by=("height",))
+        with self.assertRaises(ValueError):
+            self.aggregator.summary(metrics=("weight",))
+        with self.assertRaises(ValueError):
+            self.aggregator.summary(quantiles=(1.5,))
+        with self.assertRaises(ValueError):
+            CohortAggregator(bins={"bmi": (30.0, 20.0, 1.0)})
+        with self.assertRaises(ValueError):
+            CohortAggregator(bins={"weight": (30.0, 200.0, 1.0)})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+import io
+import unittest
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the [fast] extra
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:  # pragma: no cover - pandas is optional
+    pd = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+
+from src.caloric_calculator import RESULT_FIELDS, WeightGoal, compute
+
+if np is not None:
+    from src.caloric_calculator.columnar import (
+        DEFAULT_OUTPUT_FIELDS,
+        calculate_frame,
+        calculate_parquet,
+        calculate_table,
+        stream_parquet,
+    )
+
+COLUMNS = {
+    "user_id": [1, 2, 3, 4],
+    "weight": [70.0, 68.0, 100.0, 60.0],
+    "height": [175.0, 165.0, 175.0, 180.0],
+    "age": [30, 28, 40, 25],
+    "sex": ["M", "f", "M", "M"],
+    "activity_level": ["MA", "LA", "va", "VA"],
+    "weight_goal": ["maintain", "lose", "gain", "gain"],
+    "weight_amount": [0.0, 0.5, 1.0, 0.5],
+}
+
+EXPECTED = [
+    compute(70, 175, 30, "M", "MA", WeightGoal.MAINTAIN, 0),
+    compute(68, 165, 28, "F", "LA", WeightGoal.LOSE, 0.5),
+    compute(100, 175, 40, "M", "VA", WeightGoal.GAIN, 1),
+    compute(60, 180, 25, "M", "VA", WeightGoal.GAIN, 0.5),
+]
+
+
+@unittest.skipIf(np is None or pd is None, "NumPy and pandas are not installed")
+class TestCalculateFrame(unittest.TestCase):
+
+    def setUp(self):
+        self.frame = pd.DataFrame(COLUMNS)
+
+    def test_appends_default_outputs(self):
+        """Test the default result columns are appended and inputs kept."""
+        scored = calculate_frame(self.frame)
+        self.assertEqual(list(scored.columns), list(COLUMNS) + list(DEFAULT_OUTPUT_FIELDS))
+        for field in DEFAULT_OUTPUT_FIELDS:
+            self.assertEqual(
+                scored[field].tolist(), [getattr(result, field) for result in EXPECTED]
+            )
+        self.assertNotIn("bmi", self.frame)
+
+    def test_category_columns_and_renames(self):
+        """Test categorical dtypes and column name overrides."""
+        frame = self.frame.rename(columns={"weight": "weight_kg"}).astype(
+            {"sex": "category", "weight_goal": "category"}
+        )
+        scored = calculate_frame(
+            frame, outputs=RESULT_FIELDS, columns={"weight": "weight_kg"}
+        )
+        for field in RESULT_FIELDS:
+            self.assertEqual(
+                scored[field].tolist(), [getattr(result, field) for result in EXPECTED]
+            )
+
+    def test_missing_weight_amount_defaults_to_zero(self):
+        """Test weight_amount may be omitted."""
+        scored = calculate_frame(self.frame.drop(columns="weight_amount").head(1))
+        self.assertEqual(scored["daily_caloric_needs"].tolist(), [2556])
+
+    def test_invalid_frames(self):
+        """Test missing columns, missing values and bad codes raise ValueError."""
+        frames = [
+            self.frame.drop(columns="age"),
+            self.frame.assign(weight=[70.0, None, 100.0, 60.0]),
+            self.frame.assign(sex=["M", None, "M", "M"]),
+            self.frame.assign(activity_level=["MA", "LA", "ZZ", "VA"]),
+        ]
+        for frame in frames:
+            with self.subTest(columns=list(frame.columns)):
+                with self.assertRaises(ValueError):
+                    calculate_frame(frame)
+
+
+@unittest.skipIf(np is None or pa is None, "NumPy and pyarrow are not installed")
+class TestCalculateTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = pa.table(COLUMNS)
+
+    def assertScored(self, table, rows=EXPECTED):
+        for field in DEFAULT_OUTPUT_FIELDS:
+            self.assertEqual(
+                table.column(field).to_pylist(), [getattr(result, field) for result in rows]
+            )
+
+    def test_table_and_record_batch(self):
+        """Test tables and record batches get the result columns appended."""
+        self.assertScored(calculate_table(self.table))
+        self.assertScored(calculate_table(self.table.to_batches()[0]))
+
+    def test_dictionary_and_chunked_columns(self):
+        """Test dictionary-encoded columns split over chunks with different dictionaries."""
+        table = pa.concat_tables([
+            pa.table({
+                name: pa.array(values[start:start + 2]).dictionary_encode()
+                if name == "sex" else values[start:start + 2]
+                for name, values in COLUMNS.items()
+            })
+            for start in (0, 2)
+        ])
+        self.assertEqual(table.column("sex").num_chunks, 2)
+        self.assertScored(calculate_table(table))
+
+    def test_missing_values(self):
+        """Test null inputs raise ValueError."""
+        table = self.table.set_column(
+            1, "weight", pa.array([70.0, None, 100.0, 60.0])
+        )
+        with self.assertRaises(ValueError):
+            calculate_table(table)
+
+    def test_parquet_row_groups(self):
+        """Test Parquet files are calculated row group by row group."""
+        source = io.BytesIO()
+        pq.write_table(self.table, source, row_group_size=3)
+        source.seek(0)
+        tables = list(stream_parquet(source))
+        self.assertEqual([table.num_rows for table in tables], [3, 1])
+        self.assertScored(pa.concat_tables(tables))
+
+        source.seek(0)
+        destination = io.BytesIO()
+        self.assertEqual(calculate_parquet(source, destination), 4)
+        destination.seek(0)
+        output = pq.ParquetFile(destination)
+        self.assertEqual(output.num_row_groups, 2)
+        self.assertScored(output.read())
+
+    def test_empty_parquet(self):
+        """Test a file without row groups gives an empty file with the output schema."""
+        source = io.BytesIO()
+        pq.ParquetWriter(source, self.table.schema).close()
+        source.seek(0)
+        destination = io.BytesIO()
+        self.assertEqual(calculate_parquet(source, destination), 0)
+        destination.seek(0)
+        output = pq.ParquetFile(destination)
+        self.assertEqual(output.num_row_groups, 0)
+        self.assertTrue(output.schema_arrow.equals(calculate_table(self.table).schema))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import itertools
+import pickle
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.caloric_calculator import CalculatorContext, WeightGoal, compute
+from src.caloric_calculator.policy import DEFAULT_POLICY
+
+PROFILES = list(itertools.product(
+    (45, 62.35, 80, 95.5, 140),
+    (150, 172.7, 190),
+    (25, 60),
+    ("M", "f"),
+    ("S", "ma", "SA"),
+    (WeightGoal.MAINTAIN, WeightGoal.LOSE, WeightGoal.GAIN),
+    (0.0, 0.5, 2.5, 0.3),
+))
+
+
+class TestCalculatorContext(unittest.TestCase):
+
+    def test_matches_compute(self):
+        """Test results equal compute() across BMI bands, goals and spellings."""
+        policies = (
+            DEFAULT_POLICY,
+            DEFAULT_POLICY.replace(minimum_calories={"F": 1400}),
+            DEFAULT_POLICY.replace(bmr_formula="harris_benedict"),
+        )
+        for policy in policies:
+            context = CalculatorContext(policy)
+            for profile in PROFILES:
+                with self.subTest(policy=policy, profile=profile):
+                    self.assertEqual(context.compute(*profile), compute(*profile, policy=policy))
+
+    def test_body_fat(self):
+        """Test body fat reaches formulas that need it."""
+        policy = DEFAULT_POLICY.replace(bmr_formula="katch_mcardle")
+        context = CalculatorContext(policy)
+        arguments = (70, 175, 30, "F", "S", WeightGoal.MAINTAIN)
+        self.assertEqual(
+            context.compute(*arguments, body_fat=20),
+            compute(*arguments, policy=policy, body_fat=20),
+        )
+        with self.assertRaises(ValueError):
+            context.compute(*arguments)
+
+    def test_units(self):
+        """Test weight, height and energy units convert like compute()."""
+        context = CalculatorContext()
+        arguments = (176, 69, 30, "M", "MA", WeightGoal.LOSE, 0.5)
+        for units in (
+            {"weight_unit": "lb"},
+            {"height_unit": "in"},
+            {"weight_unit": "LB", "height_unit": "ft", "energy_unit": "kJ"},
+            {"energy_unit": "kj"},
+        ):
+            with self.subTest(**units):
+                self.assertEqual(
+                    context.compute(*arguments, **units), compute(*arguments, **units)
+                )
+        for units in ({"weight_unit": "st"}, {"height_unit": "m"}, {"energy_unit": "cal"}):
+            with self.subTest(**units):
+                with self.assertRaises(ValueError) as expected:
+                    compute(*arguments, **units)
+                with self.assertRaises(ValueError) as actual:
+                    context.compute(*arguments, **units)
+                self.assertEqual(str(actual.exception), str(expected.exception))
+
+    def test_errors_match_compute(self):
+        """Test invalid inputs raise the same errors as compute()."""
+        context = CalculatorContext(DEFAULT_POLICY.replace(activity_factors={"S": 1.2}))
+        cases = (
+            (70, 175, 30, "X", "S", WeightGoal.MAINTAIN),
+            (70, 175, 30, "M", "MA", WeightGoal.MAINTAIN),
+            (70, 175, 30, "M", "zz", WeightGoal.MAINTAIN),
+            (70, 175, 30, "M", "S", "lose"),
+            (70, 175, 30, "X", "zz", "lose"),
+        )
+        for arguments in cases:
+            with self.subTest(arguments=arguments):
+                with self.assertRaises(ValueError) as expected:
+                    compute(*arguments, policy=context.policy)
+                with self.assertRaises(ValueError) as actual:
+                    context.compute(*arguments)
+                self.assertEqual(str(actual.exception), str(expected.exception))
+
+    def test_immutable_and_picklable(self):
+        """Test a context cannot be changed and survives pickling."""
+        context = CalculatorContext()
+        with self.assertRaises(AttributeError):
+            context.policy = None
+        restored = pickle.loads(pickle.dumps(context))
+        self.assertEqual(restored.compute(*PROFILES[7]), context.compute(*PROFILES[7]))
+
+    def test_shared_across_threads(self):
+        """Test one context gives the same results when called concurrently."""
+        context = CalculatorContext()
+        expected = [context.compute(*profile) for profile in PROFILES]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            actual = list(pool.map(lambda profile: context.compute(*profile), PROFILES * 4))
+        self.assertEqual(actual, expected * 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
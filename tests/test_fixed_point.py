@@ -0,0 +1,157 @@
+import unittest
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the [fast] extra
+    np = None
+
+from src.caloric_calculator import DEFAULT_POLICY, WeightGoal, compute
+from src.caloric_calculator.formulas import BMR_FORMULAS, get_formula, register_formula
+from src.caloric_calculator.policy import DEFAULT_ACTIVITY_FACTORS
+
+if np is not None:
+    from src.caloric_calculator.batch import calculate_batch
+    from src.caloric_calculator.fixed_point import calculate_fixed_point
+    from src.caloric_calculator.parallel import parallel_calculate
+    from src.caloric_calculator.synthetic import differential_check, generate_population
+
+POLICIES = (
+    DEFAULT_POLICY,
+    DEFAULT_POLICY.replace(bmr_formula="harris_benedict"),
+    DEFAULT_POLICY.replace(bmr_formula="katch_mcardle"),
+)
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestFixedPoint(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.population = next(generate_population(200000, seed=2, chunk_size=200000))
+
+    def assertResultsEqual(self, actual, expected):
+        self.assertEqual(list(actual), list(expected))
+        for field in expected:
+            np.testing.assert_array_equal(actual[field], expected[field], err_msg=field)
+            self.assertEqual(actual[field].dtype, expected[field].dtype, field)
+
+    def test_matches_calculator(self):
+        """Test every formula matches the calculator row by row."""
+        for policy in POLICIES:
+            with self.subTest(formula=policy.bmr_formula):
+                report = differential_check(
+                    generate_population(4000, seed=1), paths=("fixed_point",), policy=policy
+                )
+                self.assertEqual(report.mismatches, {"fixed_point": 0})
+
+    def test_matches_batch(self):
+        """Test every formula matches the batch engine bit for bit, in kcal and kJ."""
+        for policy in POLICIES:
+            for energy_unit in ("kcal", "kJ"):
+                with self.subTest(formula=policy.bmr_formula, energy_unit=energy_unit):
+                    self.assertResultsEqual(
+                        calculate_fixed_point(**self.population, policy=policy,
+                                              energy_unit=energy_unit),
+                        calculate_batch(**self.population, policy=policy,
+                                        energy_unit=energy_unit),
+                    )
+
+    def test_ties(self):
+        """Test exact ties follow the calculator, or round half to even on request."""
+        # 56 kg / 1.6² m is exactly 21.875; in floating point it rounds down
+        expected = compute(56, 160, 40, "F", "MA", WeightGoal.MAINTAIN)
+        self.assertEqual(expected.bmi, 21.87)
+        profile = (56, 160, 40, "F", "MA", "maintain")
+        self.assertEqual(calculate_fixed_point(*profile)["bmi"][0], 21.87)
+        self.assertEqual(calculate_fixed_point(*profile, ties="even")["bmi"][0], 21.88)
+        # Adjusted weight 65.735 kg and BMR 1411.5 kcal
+        profile = (108.5, 159, 42, "F", "S", "maintain")
+        self.assertEqual(calculate_fixed_point(*profile)["adjusted_weight"][0], 65.73)
+        self.assertEqual(calculate_fixed_point(*profile, ties="even")["adjusted_weight"][0],
+                         65.74)
+        profile = (66.3, 163, 45, "M", "S", "maintain")
+        self.assertEqual(calculate_fixed_point(*profile)["bmr"][0], 1411)
+        self.assertEqual(calculate_fixed_point(*profile, ties="even")["bmr"][0], 1412)
+
+        # Half to even only changes results at ties
+        even = calculate_fixed_point(**self.population, ties="even")
+        batch = calculate_batch(**self.population)
+        differs = even["bmr"] != batch["bmr"]
+        self.assertTrue(0 < differs.sum() < len(differs) / 100)
+        np.testing.assert_array_equal(np.abs(even["bmr"] - batch["bmr"])[differs], 1)
+        np.testing.assert_array_equal(even["ideal_weight"], batch["ideal_weight"])
+
+    def test_inexact_inputs_use_batch_engine(self):
+        """Test inputs off the fixed-point units or out of range match the batch engine."""
+        columns = (
+            [70.123456, 70.5, 20000.0, 80.0, 80.0, 65.0],
+            [175.0, 175.123, 180.0, 170.0, 0.5, 160.0],
+            [30.0, 40.0, 50.0, 33.3333, 40.0, 1e6],
+            ["M", "F", "M", "F", "M", "F"],
+            "LA",
+            ["lose", "gain", "maintain", "lose", "maintain", "gain"],
+            0.5,
+        )
+        with np.errstate(all="ignore"):
+            self.assertResultsEqual(calculate_fixed_point(*columns), calculate_batch(*columns))
+
+    def test_fallbacks(self):
+        """Test inexact activity factors and formulas without a kernel match the batch engine."""
+        policy = DEFAULT_POLICY.replace(activity_factors=dict(DEFAULT_ACTIVITY_FACTORS, S=1 / 3))
+        self.assertResultsEqual(
+            calculate_fixed_point(**self.population, policy=policy),
+            calculate_batch(**self.population, policy=policy),
+        )
+        mifflin = get_formula("mifflin_st_jeor")
+        register_formula("mifflin_float", mifflin.scalar, mifflin.vectorized)
+        try:
+            policy = DEFAULT_POLICY.replace(bmr_formula="mifflin_float")
+            self.assertResultsEqual(
+                calculate_fixed_point(**self.population, policy=policy),
+                calculate_batch(**self.population),
+            )
+        finally:
+            del BMR_FORMULAS["mifflin_float"]
+
+    def test_formula_kernels(self):
+        """Test the fixed-point kernels equal the scalar kernels on exact inputs."""
+        for name in ("mifflin_st_jeor", "harris_benedict", "katch_mcardle"):
+            formula = get_formula(name)
+            for weight, recommended, height, age, body_fat in (
+                (70.5, 64.23, 175.5, 30, 20.5), (120.0, 88.12, 190.0, 65.25, 35.0),
+            ):
+                for is_male in (True, False):
+                    numerator, denominator = formula.fixed_point(
+                        round(weight * 10000), round(recommended * 10000),
+                        round(height * 100), round(age * 100), is_male, round(body_fat * 100),
+                    )
+                    expected = formula.scalar(weight, recommended, height, age, is_male,
+                                              body_fat)
+                    self.assertAlmostEqual(numerator / denominator, expected, places=9)
+
+    def test_parallel(self):
+        """Test parallel scoring with the fixed-point engine, in workers and in process."""
+        columns = {name: values[:20000] for name, values in self.population.items()}
+        expected = calculate_batch(**columns)
+        self.assertResultsEqual(
+            parallel_calculate(**columns, workers=2, chunk_size=5000, min_parallel_size=0,
+                               fixed_point=True),
+            expected,
+        )
+        self.assertResultsEqual(parallel_calculate(**columns, fixed_point=True), expected)
+
+    def test_invalid_arguments(self):
+        """Test invalid rows and tie modes raise ValueError."""
+        with self.assertRaisesRegex(ValueError, "Invalid ties"):
+            calculate_fixed_point(70, 175, 30, "M", "MA", "maintain", ties="up")
+        with self.assertRaises(ValueError):
+            calculate_fixed_point([70, 80], 175, 30, ["M", "X"], "MA", "maintain")
+        with self.assertRaises(ValueError):
+            calculate_fixed_point(70, 175, 30, "M", "MA", "maintain",
+                                  policy=POLICIES[2])
+        with self.assertRaisesRegex(ValueError, "Invalid height in row 1"):
+            calculate_fixed_point(70, [175, 0], 30, "M", "MA", "maintain")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+import pickle
+import unittest
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the [fast] extra
+    np = None
+
+from src.caloric_calculator import CaloricCalculator, WeightGoal, compute
+from src.caloric_calculator.formulas import (
+    BMR_FORMULAS,
+    DEFAULT_FORMULA,
+    get_formula,
+    register_formula,
+)
+from src.caloric_calculator.policy import DEFAULT_POLICY
+
+if np is not None:
+    from src.caloric_calculator.batch import calculate_batch
+    from src.caloric_calculator.validation import INVALID_BODY_FAT, validate_batch
+
+HARRIS_BENEDICT = DEFAULT_POLICY.replace(bmr_formula="harris_benedict")
+KATCH_MCARDLE = DEFAULT_POLICY.replace(bmr_formula="katch_mcardle")
+
+
+class TestRegistry(unittest.TestCase):
+
+    def test_builtin_formulas(self):
+        """Test the built-in formulas are registered, Mifflin-St Jeor by default."""
+        self.assertEqual(
+            set(BMR_FORMULAS), {"mifflin_st_jeor", "harris_benedict", "katch_mcardle"}
+        )
+        self.assertEqual(DEFAULT_POLICY.bmr_formula, DEFAULT_FORMULA)
+        self.assertIs(DEFAULT_POLICY.formula, get_formula("mifflin_st_jeor"))
+        self.assertTrue(get_formula("katch_mcardle").requires_body_fat)
+
+    def test_unknown_formula_raises(self):
+        """Test unknown names raise ValueError, including in a policy."""
+        with self.assertRaises(ValueError):
+            get_formula("no_such_formula")
+        with self.assertRaises(ValueError):
+            DEFAULT_POLICY.replace(bmr_formula="no_such_formula")
+
+    def test_duplicate_registration_raises(self):
+        """Test a name cannot be registered twice."""
+        formula = get_formula(DEFAULT_FORMULA)
+        with self.assertRaises(ValueError):
+            register_formula(DEFAULT_FORMULA, formula.scalar, formula.vectorized)
+
+    def test_custom_formula(self):
+        """Test a registered formula is used by the calculator."""
+        def flat(weight, recommended_weight, height, age, is_male, body_fat):
+            return 24 * weight
+
+        register_formula("flat", flat, flat)
+        self.addCleanup(BMR_FORMULAS.pop, "flat")
+        policy = DEFAULT_POLICY.replace(bmr_formula="flat")
+        result = compute(70, 175, 30, "M", "MA", WeightGoal.MAINTAIN, policy=policy)
+        self.assertEqual(result.bmr, 1680)
+
+    def test_policy_pickles_formula_name(self):
+        """Test the formula survives pickling and replace()."""
+        restored = pickle.loads(pickle.dumps(HARRIS_BENEDICT))
+        self.assertEqual(restored.bmr_formula, "harris_benedict")
+        self.assertIs(restored.formula, HARRIS_BENEDICT.formula)
+        replaced = HARRIS_BENEDICT.replace(minimum_calories={})
+        self.assertEqual(replaced.bmr_formula, "harris_benedict")
+
+
+class TestScalarFormulas(unittest.TestCase):
+
+    def test_harris_benedict(self):
+        """Test the revised Harris-Benedict equations."""
+        male = CaloricCalculator(
+            70, 175, 30, "M", "S", WeightGoal.MAINTAIN, policy=HARRIS_BENEDICT
+        )
+        # 88.362 + 13.397 × 70 + 4.799 × 175 - 5.677 × 30 = 1695.667
+        self.assertEqual(male.bmr, 1696)
+        female = CaloricCalculator(
+            60, 165, 40, "F", "S", WeightGoal.MAINTAIN, policy=HARRIS_BENEDICT
+        )
+        # 447.593 + 9.247 × 60 + 3.098 × 165 - 4.330 × 40 = 1340.383
+        self.assertEqual(female.bmr, 1340)
+
+    def test_harris_benedict_uses_recommended_weight(self):
+        """Test Harris-Benedict uses the BMI-banded weight like Mifflin-St Jeor."""
+        calculator = CaloricCalculator(
+            120, 175, 30, "M", "S", WeightGoal.MAINTAIN, policy=HARRIS_BENEDICT
+        )
+        expected = 88.362 + 13.397 * calculator.recommended_weight + 4.799 * 175 - 5.677 * 30
+        self.assertNotEqual(calculator.recommended_weight, 120)
+        self.assertEqual(calculator.bmr, round(expected))
+
+    def test_katch_mcardle(self):
+        """Test Katch-McArdle uses lean body mass from the actual weight."""
+        calculator = CaloricCalculator(
+            70, 175, 30, "F", "S", WeightGoal.MAINTAIN, policy=KATCH_MCARDLE, body_fat=20
+        )
+        # 370 + 21.6 × (70 × 0.8) = 1579.6
+        self.assertEqual(calculator.bmr, 1580)
+        obese = compute(
+            120, 175, 30, "M", "S", WeightGoal.MAINTAIN, policy=KATCH_MCARDLE, body_fat=35
+        )
+        self.assertEqual(obese.bmr, round(370 + 21.6 * 120 * 0.65))
+
+    def test_katch_mcardle_needs_valid_body_fat(self):
+        """Test a missing or out of range body fat percentage raises."""
+        for body_fat in (None, -1, 100, float("nan")):
+            with self.subTest(body_fat=body_fat):
+                with self.assertRaises(ValueError):
+                    compute(
+                        70, 175, 30, "M", "S", WeightGoal.MAINTAIN,
+                        policy=KATCH_MCARDLE, body_fat=body_fat,
+                    )
+
+    def test_update_recomputes_bmr(self):
+        """Test changing the formula or body fat recomputes BMR and downstream."""
+        calculator = CaloricCalculator(
+            70, 175, 30, "M", "S", WeightGoal.MAINTAIN, body_fat=20
+        )
+        self.assertEqual(calculator.bmr, 1649)
+        changed = calculator.update(policy=KATCH_MCARDLE)
+        self.assertEqual(changed, ("bmr", "tdee", "daily_caloric_needs"))
+        self.assertEqual(calculator.bmr, round(370 + 21.6 * 56))
+        calculator.update(body_fat=10)
+        self.assertEqual(calculator.bmr, round(370 + 21.6 * 63))
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestVectorizedFormulas(unittest.TestCase):
+
+    def columns(self, size=4000):
+        rng = np.random.default_rng(7)
+        return (
+            np.round(rng.uniform(35, 180, size), 2),
+            np.round(rng.uniform(140, 210, size), 1),
+            rng.integers(18, 90, size),
+            rng.choice(["M", "F"], size),
+            rng.choice(["S", "LA", "MA", "VA", "SA"], size),
+            rng.choice(["maintain", "lose", "gain"], size),
+            rng.choice([0.25, 0.5, 1.0], size),
+        ), np.round(rng.uniform(5, 55, size), 1)
+
+    def test_batch_matches_scalar(self):
+        """Test every formula's vectorized kernel matches its scalar kernel."""
+        columns, body_fat = self.columns()
+        for name in BMR_FORMULAS:
+            policy = DEFAULT_POLICY.replace(bmr_formula=name)
+            results = calculate_batch(*columns, policy=policy, body_fat=body_fat)
+            for index in range(0, len(body_fat), 7):
+                row = [column[index].item() for column in columns]
+                row[5] = WeightGoal(row[5])
+                expected = compute(*row, policy=policy, body_fat=body_fat[index].item())
+                with self.subTest(formula=name, row=index):
+                    self.assertEqual(results["bmr"][index], expected.bmr)
+                    self.assertEqual(
+                        results["daily_caloric_needs"][index], expected.daily_caloric_needs
+                    )
+
+    def test_batch_body_fat_errors(self):
+        """Test missing or invalid body fat raises only for formulas needing it."""
+        columns, body_fat = self.columns(10)
+        with self.assertRaises(ValueError):
+            calculate_batch(*columns, policy=KATCH_MCARDLE)
+        body_fat[3] = np.nan
+        with self.assertRaises(ValueError):
+            calculate_batch(*columns, policy=KATCH_MCARDLE, body_fat=body_fat)
+        calculate_batch(*columns, policy=HARRIS_BENEDICT, body_fat=body_fat)
+
+    def test_validation_flags_body_fat(self):
+        """Test validate_batch flags body fat only when the formula needs it."""
+        body_fat = [20.0, np.nan, 100.0]
+        arguments = ([70.0] * 3, 175, 30, "M", "MA", WeightGoal.MAINTAIN)
+        report = validate_batch(*arguments, policy=KATCH_MCARDLE, body_fat=body_fat)
+        self.assertEqual(report.errors.tolist(), [0, INVALID_BODY_FAT, INVALID_BODY_FAT])
+        report = validate_batch(*arguments, policy=HARRIS_BENEDICT, body_fat=body_fat)
+        self.assertTrue(report.valid.all())
+
+
+if __name__ == "__main__":
+    unittest.main()
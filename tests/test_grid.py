@@ -0,0 +1,137 @@
+import os
+import pickle
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the [fast] extra
+    np = None
+
+from src.caloric_calculator import DEFAULT_POLICY, WeightGoal, compute
+
+if np is not None:
+    from src.caloric_calculator import grid
+    from src.caloric_calculator.batch import calculate_batch
+    from src.caloric_calculator.grid import GRID_FIELDS, GridIndex, build_grid
+    from src.caloric_calculator.synthetic import COLUMNS, generate_population
+
+
+def _lookup_in_worker(index):
+    return tuple(index.lookup(70.5, 175, 30, "M", "MA", WeightGoal.LOSE, 0.5))
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestGrid(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.directory.name, "small.grid")
+        cls.policy = DEFAULT_POLICY.replace(minimum_calories={"F": 1400, "M": 1600})
+        build_grid(
+            cls.path, weight_range=(50.0, 110.0), height_range=(150, 200),
+            age_range=(20, 60), policy=cls.policy, validate=2000,
+        )
+        cls.index = GridIndex(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.index.close()
+        cls.directory.cleanup()
+
+    def expected(self, *arguments):
+        result = compute(*arguments, policy=self.policy)
+        return (result.bmr, result.tdee, result.daily_caloric_needs)
+
+    def test_lookup_matches_calculator(self):
+        """Test on-grid and off-grid lookups equal the calculator."""
+        profiles = [
+            (70.5, 175, 30, "M", "MA", WeightGoal.LOSE, 0.5),
+            (50.0, 150, 60, "f", "s", WeightGoal.LOSE, 2.5),    # grid corner, floored
+            (110.0, 200.0, 20, "M", "SA", WeightGoal.GAIN, 1.0),
+            (80.0, 180, 40, "F", "LA", WeightGoal.GAIN, 0.3),    # no such step
+            (70.55, 175, 30, "M", "MA", WeightGoal.MAINTAIN),    # between grid weights
+            (120.0, 175, 30, "M", "MA", WeightGoal.MAINTAIN),    # outside the range
+            (70.0, 175.5, 30, "M", "MA", WeightGoal.MAINTAIN),
+        ]
+        for profile in profiles:
+            with self.subTest(profile=profile):
+                self.assertEqual(tuple(self.index.lookup(*profile)), self.expected(*profile))
+
+    def test_invalid_inputs_raise(self):
+        """Test invalid inputs raise like the calculator."""
+        with self.assertRaises(ValueError):
+            self.index.lookup(70.0, 175, 30, "X", "MA", WeightGoal.LOSE, 0.5)
+        with self.assertRaises(ValueError):
+            self.index.lookup(70.0, 175, 30, "M", "ZZ", WeightGoal.LOSE, 0.5)
+
+    def test_lookup_batch_matches_calculate_batch(self):
+        """Test batch lookups, with off-grid rows, equal calculate_batch."""
+        size = 5000
+        population = next(generate_population(size, seed=0, chunk_size=size))
+        # Every 7th weight falls between grid weights
+        population["weight"] = population["weight"] + np.where(np.arange(size) % 7, 0, 0.01)
+        columns = tuple(population[name] for name in COLUMNS[:7])
+        actual = self.index.lookup_batch(*columns)
+        expected = calculate_batch(*columns, policy=self.policy)
+        for field in GRID_FIELDS:
+            self.assertTrue(np.array_equal(actual[field], expected[field]), field)
+
+    def test_shared_between_processes(self):
+        """Test an index can be sent to worker processes."""
+        self.assertEqual(
+            _lookup_in_worker(pickle.loads(pickle.dumps(self.index))),
+            _lookup_in_worker(self.index),
+        )
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            self.assertEqual(
+                executor.submit(_lookup_in_worker, self.index).result(),
+                self.expected(70.5, 175, 30, "M", "MA", WeightGoal.LOSE, 0.5),
+            )
+
+    def test_build_validation_failure(self):
+        """Test a grid disagreeing with the calculator is not written."""
+        path = os.path.join(self.directory.name, "broken.grid")
+
+        def off_by_one(*arguments, **keywords):
+            values = grid_bmr(*arguments, **keywords)
+            return values[:-1] + (values[-1] + 1,)
+
+        grid_bmr = grid._bmr
+        with mock.patch.object(grid, "_bmr", off_by_one):
+            with self.assertRaises(ValueError):
+                build_grid(path, weight_range=(60.0, 61.0), height_range=(170, 171),
+                           age_range=(30, 31), validate=10)
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ["small.grid"])
+
+    def test_formulas(self):
+        """Test grids honour the BMR formula and refuse body fat formulas."""
+        path = os.path.join(self.directory.name, "harris.grid")
+        policy = DEFAULT_POLICY.replace(bmr_formula="harris_benedict")
+        build_grid(path, weight_range=(60.0, 62.0), height_range=(170, 172),
+                   age_range=(30, 32), policy=policy, validate=50)
+        self.addCleanup(os.unlink, path)
+        with GridIndex(path) as index:
+            self.assertEqual(index.policy.bmr_formula, "harris_benedict")
+            self.assertEqual(
+                index.lookup(61.0, 171, 31, "F", "S", WeightGoal.MAINTAIN).bmr,
+                compute(61.0, 171, 31, "F", "S", WeightGoal.MAINTAIN, policy=policy).bmr,
+            )
+        with self.assertRaises(ValueError):
+            build_grid(path, policy=DEFAULT_POLICY.replace(bmr_formula="katch_mcardle"))
+
+    def test_rejects_other_files(self):
+        """Test opening a file that is not a grid raises ValueError."""
+        path = os.path.join(self.directory.name, "not.grid")
+        with open(path, "wb") as file:
+            file.write(b"\0" * 64)
+        self.addCleanup(os.unlink, path)
+        with self.assertRaises(ValueError):
+            GridIndex(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import src.caloric_calculator as caloric_calculator
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Top-level modules the base import must not load
+HEAVY_MODULES = (
+    "numpy",
+    "pandas",
+    "pyarrow",
+    "asyncio",
+    "multiprocessing",
+    "concurrent",
+    "argparse",
+    "csv",
+    "json",
+    "mmap",
+    "sqlite3",
+)
+
+
+def _modules_after(statement):
+    """Top-level modules present in a fresh interpreter after ``statement``."""
+    script = (
+        "import sys\n"
+        f"{statement}\n"
+        "print('\\n'.join(sorted({name.split('.')[0] for name in sys.modules})))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, check=True, capture_output=True, text=True
+    ).stdout
+    return set(output.split())
+
+
+class TestImports(unittest.TestCase):
+
+    def test_base_import_is_lightweight(self):
+        """Test importing the package loads no optional or heavy dependency."""
+        loaded = _modules_after("import src.caloric_calculator")
+        self.assertEqual(loaded & set(HEAVY_MODULES), set())
+
+    def test_scalar_calculation_stays_lightweight(self):
+        """Test a scalar calculation does not load the heavy machinery either."""
+        loaded = _modules_after(
+            "from src.caloric_calculator import WeightGoal, compute\n"
+            "compute(70, 175, 30, 'M', 'MA', WeightGoal.MAINTAIN)"
+        )
+        self.assertEqual(loaded & set(HEAVY_MODULES), set())
+
+    def test_cache_stays_lightweight(self):
+        """Test the pure-Python cache loads neither NumPy nor the result store."""
+        loaded = _modules_after(
+            "import src.caloric_calculator.cache as cache\n"
+            "import sys\n"
+            "assert 'src.caloric_calculator.store' not in sys.modules"
+        )
+        self.assertEqual(loaded & {"numpy", "sqlite3"}, set())
+
+    def test_lazy_attributes_resolve_to_submodules(self):
+        """Test lazy names are the submodule objects and are cached."""
+        from src.caloric_calculator import cache, stream
+
+        self.assertIs(caloric_calculator.CalculationCache, cache.CalculationCache)
+        self.assertIs(caloric_calculator.stream_calculate, stream.stream_calculate)
+        self.assertIs(caloric_calculator.stream, stream)
+        self.assertIn("CalculationCache", vars(caloric_calculator))
+
+    def test_dir_lists_lazy_names(self):
+        """Test dir() shows lazy attributes before they are loaded."""
+        names = dir(caloric_calculator)
+        self.assertIn("calculate_batch", names)
+        self.assertIn("cli", names)
+        self.assertIn("CaloricCalculator", names)
+
+    def test_unknown_attribute_raises(self):
+        """Test unknown names still raise AttributeError."""
+        with self.assertRaises(AttributeError):
+            caloric_calculator.no_such_name
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the [fast] extra
+    np = None
+
+from src.caloric_calculator import RESULT_FIELDS, CaloricCalculator, WeightGoal
+from src.caloric_calculator import instrumentation
+from src.caloric_calculator.instrumentation import (
+    CallbackExporter,
+    PrometheusExporter,
+    Recorder,
+    format_prometheus,
+    instrumented,
+)
+from src.caloric_calculator.stream import stream_calculate
+
+PROFILE = (70, 175, 30, "M", "MA", WeightGoal.LOSE, 0.5)
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def tearDown(self):
+        instrumentation.disable()
+
+    def test_disabled_by_default(self):
+        """Test the calculator uses its plain descriptors when disabled."""
+        self.assertIsNone(instrumentation.active())
+        original = CaloricCalculator.__dict__["bmi"]
+        instrumentation.enable()
+        self.assertIsNot(CaloricCalculator.__dict__["bmi"], original)
+        instrumentation.disable()
+        self.assertIs(CaloricCalculator.__dict__["bmi"], original)
+
+    def test_scalar_stages(self):
+        """Test every derived stage is timed once per calculator."""
+        recorder = instrumentation.enable()
+        calculator = CaloricCalculator(*PROFILE)
+        CaloricCalculator(*PROFILE, lazy=True).bmr
+        stages = recorder.snapshot().stages
+        for field in RESULT_FIELDS:
+            self.assertGreaterEqual(stages[("scalar", field)].seconds, 0)
+        self.assertEqual(stages[("scalar", "bmi")].calls, 2)
+        self.assertEqual(stages[("scalar", "tdee")].calls, 1)
+        self.assertEqual(calculator.daily_caloric_needs, 2056)
+
+    def test_scalar_errors_counted_once(self):
+        """Test a validation error is counted at the stage that raised it."""
+        recorder = instrumentation.enable()
+        with self.assertRaises(ValueError):
+            CaloricCalculator(70, 175, 30, "M", "XX", WeightGoal.LOSE, 0.5)
+        self.assertEqual(
+            recorder.snapshot().errors, {("scalar", "activity_factor", "ValueError"): 1}
+        )
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_batch_stages_and_errors(self):
+        """Test batch stages report rows and validation errors."""
+        from src.caloric_calculator.batch import calculate_batch
+
+        recorder = instrumentation.enable()
+        calculate_batch([70, 80, 90], 175, 30, "M", "MA", "lose", 0.5)
+        with self.assertRaises(ValueError):
+            calculate_batch([70, 80], 175, 30, "X", "MA", "lose", 0.5)
+        snapshot = recorder.snapshot()
+        for stage in ("encode",) + RESULT_FIELDS:
+            self.assertEqual(snapshot.stages[("batch", stage)].rows, 3)
+        self.assertEqual(snapshot.errors, {("batch", "validation", "ValueError"): 1})
+
+    def test_stream_rejects(self):
+        """Test stream rejects are counted as parse errors."""
+        recorder = instrumentation.enable()
+        rows = [
+            dict(weight=70, height=175, age=30, sex=sex, activity_level="MA",
+                 weight_goal="maintain")
+            for sex in ("M", "Q", "F")
+        ]
+        self.assertEqual(len(list(stream_calculate(rows))), 2)
+        snapshot = recorder.snapshot()
+        self.assertEqual(snapshot.stages[("stream", "parse")].rows, 3)
+        self.assertEqual(snapshot.errors, {("stream", "parse", "RowError"): 1})
+
+    def test_instrumented_exports(self):
+        """Test the context manager disables and exports on exit."""
+        snapshots = []
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "caloric.prom")
+        with instrumented(CallbackExporter(snapshots.append), PrometheusExporter(path)):
+            CaloricCalculator(*PROFILE)
+        self.assertIsNone(instrumentation.active())
+        self.assertEqual(snapshots[0].stages[("scalar", "bmi")].calls, 1)
+        with open(path) as file:
+            text = file.read()
+        self.assertIn("# TYPE caloric_calculator_stage_seconds_total counter", text)
+        self.assertIn('caloric_calculator_stage_calls_total{path="scalar",stage="bmi"} 1', text)
+        self.assertEqual(os.listdir(directory.name), ["caloric.prom"])
+
+    def test_format_prometheus_errors(self):
+        """Test error counters and label escaping in the text format."""
+        recorder = Recorder()
+        recorder.record_error("stream", 'pa"rse', ValueError())
+        text = format_prometheus(recorder.snapshot(), prefix="app")
+        self.assertIn('app_errors_total{path="stream",stage="pa\\"rse",error="ValueError"} 1', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
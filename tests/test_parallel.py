@@ -0,0 +1,107 @@
+import multiprocessing
+import pickle
+import unittest
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the [fast] extra
+    np = None
+
+from src.caloric_calculator import DEFAULT_POLICY, WeightGoal
+
+if np is not None:
+    from src.caloric_calculator.batch import calculate_batch
+    from src.caloric_calculator.parallel import parallel_calculate
+    from src.caloric_calculator.synthetic import COLUMNS, generate_population
+
+
+def _columns(size, seed=0):
+    population = next(generate_population(size, seed=seed, chunk_size=size))
+    return tuple(population[name] for name in COLUMNS[:7])
+
+
+@unittest.skipIf(np is None, "NumPy is required for parallel calculation")
+class TestParallelCalculate(unittest.TestCase):
+
+    def assertSameResults(self, actual, expected):
+        self.assertEqual(set(actual), set(expected))
+        for field in expected:
+            with self.subTest(field=field):
+                self.assertEqual(actual[field].dtype, expected[field].dtype)
+                self.assertTrue(np.array_equal(actual[field], expected[field]))
+
+    def test_matches_batch_in_order(self):
+        """Test pooled results equal the in-process batch, in input order."""
+        columns = _columns(5003)
+        context = None
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        results = parallel_calculate(
+            *columns, workers=3, chunk_size=1000, min_parallel_size=0, mp_context=context
+        )
+        self.assertSameResults(results, calculate_batch(*columns))
+
+    def test_small_inputs_run_serially(self):
+        """Test inputs under the threshold never start a pool."""
+        columns = _columns(10)
+        results = parallel_calculate(*columns, workers=4, mp_context="not a context")
+        self.assertSameResults(results, calculate_batch(*columns))
+
+    def test_invalid_rows_raise_before_dispatch(self):
+        """Test invalid values raise ValueError in the calling process."""
+        with self.assertRaises(ValueError):
+            parallel_calculate(
+                [70, 70], 175, 30, ["M", "X"], "MA", WeightGoal.MAINTAIN,
+                workers=2, min_parallel_size=0,
+            )
+        with self.assertRaisesRegex(ValueError, "Invalid weight in row 1"):
+            parallel_calculate(
+                [70, float("nan")], 175, 30, "M", "MA", WeightGoal.MAINTAIN,
+                workers=2, min_parallel_size=0,
+            )
+
+    def test_body_fat_formula(self):
+        """Test body fat columns reach the workers for formulas that need them."""
+        columns = _columns(2001)
+        body_fat = np.linspace(8, 45, 2001)
+        policy = DEFAULT_POLICY.replace(bmr_formula="katch_mcardle")
+        context = None
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        results = parallel_calculate(
+            *columns, policy=policy, workers=2, chunk_size=500, min_parallel_size=0,
+            mp_context=context, body_fat=body_fat,
+        )
+        self.assertSameResults(
+            results, calculate_batch(*columns, policy=policy, body_fat=body_fat)
+        )
+
+    def test_units(self):
+        """Test mixed input units and kJ output match the batch engine."""
+        columns = _columns(2001)
+        weight_unit = np.resize(["kg", "lb"], 2001)
+        height_unit = np.resize(["cm", "in", "ft"], 2001)
+        weight = np.where(weight_unit == "lb", columns[0] * 2.2, columns[0])
+        height = np.where(height_unit == "cm", columns[1], columns[1] / 30)
+        context = None
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        results = parallel_calculate(
+            weight, height, *columns[2:], workers=2, chunk_size=500, min_parallel_size=0,
+            mp_context=context, weight_unit=weight_unit, height_unit=height_unit,
+            energy_unit="kJ",
+        )
+        self.assertSameResults(results, calculate_batch(
+            weight, height, *columns[2:], weight_unit=weight_unit, height_unit=height_unit,
+            energy_unit="kJ",
+        ))
+
+    def test_policy_pickles(self):
+        """Test policies survive the trip to worker processes."""
+        policy = DEFAULT_POLICY.replace(minimum_calories={"M": 1600})
+        restored = pickle.loads(pickle.dumps(policy))
+        self.assertEqual(restored.minimum_calorie_table, policy.minimum_calorie_table)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the [fast] extra
+    np = None
+
+from src.caloric_calculator import CaloricCalculator, WeightGoal
+from src.caloric_calculator.models import (
+    ACTIVITY_CODES,
+    ACTIVITY_LEVELS,
+    GOAL_CODES,
+    SEX_CODES,
+    WEIGHT_GOALS,
+)
+from src.caloric_calculator.policy import DEFAULT_POLICY, CalculationPolicy
+
+
+class TestCodes(unittest.TestCase):
+
+    def test_codes_are_positions(self):
+        """Test every code maps back to its value."""
+        self.assertEqual(SEX_CODES, {"M": 0, "F": 1})
+        for level, code in ACTIVITY_CODES.items():
+            self.assertEqual(ACTIVITY_LEVELS[code], level)
+        for goal, code in GOAL_CODES.items():
+            self.assertEqual(WEIGHT_GOALS[code], goal)
+
+
+class TestCalculationPolicy(unittest.TestCase):
+
+    def test_default_tables(self):
+        """Test the default policy holds the documented tables."""
+        self.assertEqual(DEFAULT_POLICY.activity_factor(ACTIVITY_CODES["VA"]), 1.725)
+        self.assertEqual(DEFAULT_POLICY.goal_adjustment(GOAL_CODES[WeightGoal.LOSE], 2.5), -2500)
+        self.assertEqual(DEFAULT_POLICY.goal_adjustment(GOAL_CODES[WeightGoal.GAIN], 2.5), 0)
+        self.assertEqual(DEFAULT_POLICY.goal_adjustment(GOAL_CODES[WeightGoal.MAINTAIN], 1.0), 0)
+        self.assertEqual(DEFAULT_POLICY.apply_minimum(SEX_CODES["F"], 1000), 1300)
+
+    def test_policy_is_immutable(self):
+        """Test policies cannot be modified in place."""
+        with self.assertRaises(AttributeError):
+            DEFAULT_POLICY.minimum_calories = {}
+
+    def test_unknown_keys_rejected(self):
+        """Test tables keyed by unknown codes are rejected."""
+        with self.assertRaises(ValueError):
+            CalculationPolicy(activity_factors={"XA": 2.0})
+        with self.assertRaises(ValueError):
+            CalculationPolicy(minimum_calories={"X": 1000})
+
+    def test_custom_floor(self):
+        """Test a replaced floor is applied by the calculator."""
+        policy = DEFAULT_POLICY.replace(minimum_calories={"F": 1500, "M": 1500})
+        calc = CaloricCalculator(
+            weight=45,
+            height=150,
+            age=20,
+            sex="F",
+            activity_level="S",
+            weight_goal=WeightGoal.LOSE,
+            weight_amount=2.0,
+            policy=policy,
+        )
+        self.assertEqual(calc.daily_caloric_needs, 1500)
+
+    def test_custom_adjustment_steps(self):
+        """Test custom goal adjustment steps are used by the calculator."""
+        policy = CalculationPolicy(weight_gain_adjustments={0.1: 100, 0.2: 200})
+        calc = CaloricCalculator(
+            weight=70,
+            height=175,
+            age=30,
+            sex="M",
+            activity_level="MA",
+            weight_goal=WeightGoal.GAIN,
+            weight_amount=0.2,
+            policy=policy,
+        )
+        self.assertEqual(calc.daily_caloric_needs, calc.tdee + 200)
+
+    def test_missing_activity_factor_is_invalid(self):
+        """Test an activity level left out of the policy raises ValueError."""
+        policy = CalculationPolicy(activity_factors={"S": 1.2})
+        with self.assertRaises(ValueError):
+            CaloricCalculator(70, 175, 30, "M", "MA", WeightGoal.MAINTAIN, policy=policy)
+
+
+@unittest.skipIf(np is None, "NumPy is required for the batch engine")
+class TestBatchPolicy(unittest.TestCase):
+
+    def test_pre_encoded_codes(self):
+        """Test integer code columns give the same results as labels."""
+        from src.caloric_calculator.batch import calculate_batch
+
+        labels = calculate_batch(
+            [70, 90], [175, 160], [30, 50], ["M", "F"], ["MA", "SA"],
+            [WeightGoal.MAINTAIN, WeightGoal.LOSE], [0.0, 1.0],
+        )
+        codes = calculate_batch(
+            [70, 90], [175, 160], [30, 50], np.array([0, 1]), np.array([2, 4]),
+            np.array([0, 1]), [0.0, 1.0],
+        )
+        for field, column in labels.items():
+            self.assertEqual(codes[field].tolist(), column.tolist())
+
+    def test_out_of_range_code(self):
+        """Test out-of-range codes raise ValueError."""
+        from src.caloric_calculator.batch import calculate_batch
+
+        with self.assertRaises(ValueError):
+            calculate_batch([70], [175], [30], np.array([2]), "MA", WeightGoal.MAINTAIN)
+
+    def test_custom_policy_matches_scalar(self):
+        """Test batch and scalar agree under a custom policy."""
+        from src.caloric_calculator.batch import calculate_batch
+
+        policy = CalculationPolicy(
+            activity_factors={"S": 1.1, "LA": 1.3, "MA": 1.5, "VA": 1.7, "SA": 2.0},
+            weight_loss_adjustments={0.5: 400},
+            minimum_calories={"M": 1700},
+        )
+        rows = [
+            (70, 175, 30, "M", "S", WeightGoal.LOSE, 0.5),
+            (50, 150, 60, "F", "S", WeightGoal.LOSE, 0.5),
+            (90, 180, 40, "M", "SA", WeightGoal.GAIN, 0.5),
+        ]
+        results = calculate_batch(*zip(*rows), policy=policy)
+        for index, row in enumerate(rows):
+            calc = CaloricCalculator(*row, policy=policy)
+            self.assertEqual(results["daily_caloric_needs"][index], calc.daily_caloric_needs)
+            self.assertEqual(results["activity_factor"][index], calc.activity_factor)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the [fast] extra
+    np = None
+
+from src.caloric_calculator import (
+    RESULT_FIELDS,
+    CalculationResult,
+    CaloricCalculator,
+    ResultSet,
+    WeightGoal,
+    compute,
+)
+
+PROFILES = [
+    (70, 175, 30, "M", "MA", WeightGoal.MAINTAIN, 0.0),
+    (68, 165, 28, "F", "LA", WeightGoal.LOSE, 0.5),
+    (100, 175, 40, "M", "MA", WeightGoal.LOSE, 1.0),
+    (60, 180, 25, "M", "VA", WeightGoal.GAIN, 0.5),
+]
+
+
+class TestCalculationResult(unittest.TestCase):
+
+    def test_result_matches_calculator(self):
+        """Test result() carries every derived value of the calculator."""
+        calc = CaloricCalculator(*PROFILES[2])
+        result = calc.result()
+        self.assertIsInstance(result, CalculationResult)
+        for index, field in enumerate(RESULT_FIELDS):
+            with self.subTest(field=field):
+                self.assertEqual(getattr(result, field), getattr(calc, field))
+                self.assertEqual(result[index], getattr(calc, field))
+        self.assertEqual(result.caloric_requirements, calc.tdee)
+
+    def test_compute(self):
+        """Test compute() returns the same record as the calculator."""
+        self.assertEqual(compute(*PROFILES[1]), CaloricCalculator(*PROFILES[1]).result())
+
+    def test_result_is_immutable_and_slotted(self):
+        """Test results reject assignment and carry no __dict__."""
+        result = compute(*PROFILES[0])
+        with self.assertRaises(AttributeError):
+            result.bmi = 0
+        self.assertFalse(hasattr(result, "__dict__"))
+
+
+class TestResultSet(unittest.TestCase):
+
+    def setUp(self):
+        self.results = [compute(*profile) for profile in PROFILES]
+        self.result_set = ResultSet(self.results)
+
+    def test_indexing_and_iteration(self):
+        """Test indexing and iteration yield the stored records."""
+        self.assertEqual(len(self.result_set), len(PROFILES))
+        self.assertEqual(list(self.result_set), self.results)
+        self.assertEqual(self.result_set[-1], self.results[-1])
+        self.assertEqual(list(self.result_set[1:3]), self.results[1:3])
+
+    def test_columns_are_typed_arrays(self):
+        """Test columns are stored as typed arrays."""
+        self.assertEqual(self.result_set.column("bmi").typecode, "d")
+        self.assertEqual(self.result_set.column("tdee").typecode, "q")
+        self.assertEqual(
+            list(self.result_set.column("daily_caloric_needs")),
+            [result.daily_caloric_needs for result in self.results],
+        )
+
+    def test_append_rejects_wrong_length(self):
+        """Test appending a record with missing fields raises ValueError."""
+        with self.assertRaises(ValueError):
+            self.result_set.append((1.0, 2.0))
+
+    @unittest.skipIf(np is None, "NumPy is required for the batch engine")
+    def test_from_batch_columns(self):
+        """Test a result set built from batch output matches the scalar results."""
+        from src.caloric_calculator.batch import calculate_batch
+
+        result_set = ResultSet.from_columns(calculate_batch(*zip(*PROFILES)))
+        self.assertEqual(list(result_set), self.results)
+        self.assertEqual(
+            np.frombuffer(result_set.column("bmr"), dtype=np.int64).tolist(),
+            [result.bmr for result in self.results],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import asyncio
+import unittest
+
+from src.caloric_calculator import DEFAULT_POLICY, WeightGoal, compute
+from src.caloric_calculator.service import AsyncCalculatorService
+
+
+def _profile(weight=70, sex="M", activity_level="MA", weight_goal=WeightGoal.MAINTAIN):
+    return {
+        "weight": weight,
+        "height": 175,
+        "age": 30,
+        "sex": sex,
+        "activity_level": activity_level,
+        "weight_goal": weight_goal,
+        "weight_amount": 0.5,
+    }
+
+
+class TestAsyncCalculatorService(unittest.TestCase):
+
+    def test_concurrent_requests_share_a_batch(self):
+        """Test concurrent requests are calculated in one batch."""
+        async def scenario():
+            service = AsyncCalculatorService(window=0.01)
+            profiles = [_profile(weight) for weight in range(60, 110)]
+            results = await asyncio.gather(*(service.calculate(p) for p in profiles))
+            return service.metrics(), profiles, results
+
+        metrics, profiles, results = asyncio.run(scenario())
+        for profile, result in zip(profiles, results):
+            self.assertEqual(result, compute(**profile))
+        self.assertEqual(metrics.batches, 1)
+        self.assertEqual(metrics.rows_calculated, 50)
+        self.assertEqual(metrics.max_queue_depth, 50)
+        self.assertEqual(metrics.queue_depth, 0)
+
+    def test_identical_requests_are_coalesced(self):
+        """Test identical in-flight requests are calculated once."""
+        async def scenario():
+            service = AsyncCalculatorService(window=0.01)
+            results = await asyncio.gather(
+                service.calculate(_profile()),
+                service.calculate(_profile(sex="m", activity_level="ma")),
+                service.calculate(_profile(weight=80)),
+            )
+            return service.metrics(), results
+
+        metrics, results = asyncio.run(scenario())
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(metrics.requests, 3)
+        self.assertEqual(metrics.coalesced, 1)
+        self.assertEqual(metrics.rows_calculated, 2)
+
+    def test_max_batch_size_flushes_early(self):
+        """Test reaching max_batch_size flushes without waiting for the window."""
+        async def scenario():
+            service = AsyncCalculatorService(window=10, max_batch_size=4)
+            await asyncio.wait_for(
+                asyncio.gather(*(service.calculate(_profile(w)) for w in range(60, 68))),
+                timeout=1,
+            )
+            return service.metrics()
+
+        self.assertEqual(asyncio.run(scenario()).batches, 2)
+
+    def test_invalid_profile_fails_alone(self):
+        """Test an invalid profile raises for its caller only."""
+        async def scenario():
+            service = AsyncCalculatorService(window=0.01)
+            return await asyncio.gather(
+                service.calculate(_profile()),
+                service.calculate(_profile(sex="X")),
+                service.calculate(_profile(activity_level="ZZ")),
+                return_exceptions=True,
+            )
+
+        valid, bad_sex, bad_activity = asyncio.run(scenario())
+        self.assertEqual(valid, compute(**_profile()))
+        self.assertIsInstance(bad_sex, ValueError)
+        self.assertIsInstance(bad_activity, ValueError)
+
+    def test_body_fat_formula(self):
+        """Test body fat reaches the calculation, alone or batched, for formulas that need it."""
+        policy = DEFAULT_POLICY.replace(bmr_formula="katch_mcardle")
+        profiles = [dict(_profile(weight), body_fat=body_fat)
+                    for weight, body_fat in ((70, 12), (70, 30), (90, 25.5))]
+
+        async def scenario(profiles):
+            service = AsyncCalculatorService(window=0.01, policy=policy)
+            return await asyncio.gather(
+                *(service.calculate(profile) for profile in profiles), return_exceptions=True
+            )
+
+        for batch in (profiles[:1], profiles + [_profile()]):
+            results = asyncio.run(scenario(batch))
+            for profile, result in zip(profiles, results):
+                self.assertEqual(result, compute(**profile, policy=policy))
+        self.assertIsInstance(results[-1], ValueError)
+
+    def test_invalid_numbers_fail_alone(self):
+        """Test non-finite or non-positive numbers raise ValueError, batched or not."""
+        invalid = [_profile(weight=float("nan")), _profile(weight=0),
+                   dict(_profile(), height=float("inf")), dict(_profile(), height=-175),
+                   dict(_profile(), age=float("nan")), dict(_profile(), weight_amount="inf")]
+
+        async def scenario(profiles):
+            service = AsyncCalculatorService(window=0.01)
+            return await asyncio.gather(
+                *(service.calculate(profile) for profile in profiles), return_exceptions=True
+            )
+
+        for profile in invalid:
+            with self.subTest(profile=profile):
+                alone, = asyncio.run(scenario([profile]))
+                self.assertIsInstance(alone, ValueError)
+                valid, batched = asyncio.run(scenario([_profile(), profile]))
+                self.assertEqual(valid, compute(**_profile()))
+                self.assertIsInstance(batched, ValueError)
+
+    def test_latency_histogram(self):
+        """Test every request is counted in the latency histogram."""
+        async def scenario():
+            service = AsyncCalculatorService(window=0.001, latency_buckets=(0.0001, 5))
+            await asyncio.gather(*(service.calculate(_profile(w)) for w in range(60, 70)))
+            return service.metrics()
+
+        metrics = asyncio.run(scenario())
+        self.assertEqual(metrics.latency_buckets, (0.0001, 5))
+        self.assertEqual(sum(metrics.latency_counts), 10)
+        self.assertEqual(metrics.latency_counts[-1], 0)
+        self.assertGreater(metrics.latency_sum, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
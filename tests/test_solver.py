@@ -0,0 +1,109 @@
+import unittest
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the [fast] extra
+    np = None
+
+from src.caloric_calculator import DEFAULT_POLICY, WeightGoal, compute
+from src.caloric_calculator.models import ACTIVITY_LEVELS, WEIGHT_GOALS
+
+if np is not None:
+    from src.caloric_calculator.solver import (
+        candidate_plans,
+        enumerate_intakes,
+        solve_target,
+    )
+
+USERS = [
+    (85, 178, 35, "M"),
+    (68, 165, 28, "F"),
+    (52, 160, 60, "F"),
+    (120, 190, 45, "M"),
+]
+
+
+def scalar_intake(user, plan):
+    return compute(
+        *user, ACTIVITY_LEVELS[plan.activity_level], WEIGHT_GOALS[plan.weight_goal],
+        plan.weight_amount,
+    ).daily_caloric_needs
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestSolver(unittest.TestCase):
+
+    def columns(self):
+        return [list(column) for column in zip(*USERS)]
+
+    def test_candidate_plans(self):
+        """Test plans cover every factor and step, gentlest first."""
+        plans = candidate_plans()
+        self.assertEqual(len(plans), 5 * (1 + 7 + 4))
+        self.assertEqual(plans[0], (0, 0, 0.0, 0))
+        self.assertEqual(plans[-1].weight_amount, 2.5)
+        plans = candidate_plans(activity_levels=["s", "VA"], weight_goals=[WeightGoal.GAIN])
+        self.assertEqual({plan.activity_level for plan in plans}, {0, 3})
+        self.assertEqual([plan.adjustment for plan in plans[:2]], [250, 250])
+        with self.assertRaises(ValueError):
+            candidate_plans(activity_levels=["ZZ"])
+
+    def test_enumerate_matches_calculator(self):
+        """Test every enumerated intake equals the calculator's DCN."""
+        plans, intakes = enumerate_intakes(*self.columns())
+        self.assertEqual(intakes.shape, (len(USERS), len(plans)))
+        for row, user in enumerate(USERS):
+            for column, plan in enumerate(plans):
+                self.assertEqual(intakes[row, column], scalar_intake(user, plan))
+
+    def test_solve_matches_brute_force(self):
+        """Test the chosen plan is the closest one, with ties to the gentlest."""
+        targets = [1800, 2200, 1000, 3000]
+        solution = solve_target(*self.columns(), targets)
+        for row, user in enumerate(USERS):
+            best = min(
+                candidate_plans(),
+                key=lambda plan: abs(scalar_intake(user, plan) - targets[row]),
+            )
+            self.assertEqual(
+                (solution["activity_level"][row], solution["weight_goal"][row],
+                 solution["weight_amount"][row]),
+                best[:3],
+            )
+            self.assertEqual(
+                solution["difference"][row], scalar_intake(user, best) - targets[row]
+            )
+
+    def test_floor(self):
+        """Test targets below the floor settle on the gentlest floored plan."""
+        solution = solve_target(52, 160, 60, "F", 1000, weight_goals=[WeightGoal.LOSE])
+        self.assertEqual(solution["daily_caloric_needs"].tolist(), [1300])
+        self.assertEqual(solution["floored"].tolist(), [True])
+        self.assertEqual(solution["weight_amount"].tolist(), [0.25])
+        self.assertEqual(solution["activity_level"].tolist(), [0])
+
+        policy = DEFAULT_POLICY.replace(minimum_calories={})
+        solution = solve_target(52, 160, 60, "F", 1000, policy=policy)
+        self.assertFalse(solution["floored"][0])
+        self.assertLess(solution["daily_caloric_needs"][0], 1300)
+
+    def test_invalid_sex(self):
+        """Test an invalid sex raises ValueError."""
+        with self.assertRaises(ValueError):
+            solve_target([70], [175], [30], ["X"], 2000)
+
+    def test_invalid_numbers(self):
+        """Test non-finite or non-positive weights and heights raise ValueError."""
+        for weight, height, age in (
+            ([70, float("nan")], 175, 30), ([70, -70], 175, 30),
+            (70, [175, 0], 30), (70, 175, [30, float("inf")]),
+        ):
+            with self.subTest(weight=weight, height=height, age=age):
+                with self.assertRaisesRegex(ValueError, "row 1"):
+                    solve_target(weight, height, age, "M", 2000)
+                with self.assertRaisesRegex(ValueError, "row 1"):
+                    enumerate_intakes(weight, height, age, "M")
+
+
+if __name__ == "__main__":
+    unittest.main()
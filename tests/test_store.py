@@ -0,0 +1,191 @@
+import os
+import tempfile
+import unittest
+
+from src.caloric_calculator import WeightGoal, compute
+from src.caloric_calculator.policy import DEFAULT_POLICY
+from src.caloric_calculator.store import (
+    ResultStore,
+    SQLiteBackend,
+    StoreStats,
+    policy_fingerprint,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without NumPy
+    np = None
+
+USER_IDS = list(range(100))
+WEIGHTS = [50 + (i % 40) * 1.5 for i in USER_IDS]
+HEIGHTS = [150 + (i % 9) * 5 for i in USER_IDS]
+AGES = [20 + i % 50 for i in USER_IDS]
+SEXES = ["M" if i % 2 else "f" for i in USER_IDS]
+LEVELS = [("S", "la", "MA", "VA", "SA")[i % 5] for i in USER_IDS]
+GOALS = [(WeightGoal.MAINTAIN, WeightGoal.LOSE, "gain")[i % 3] for i in USER_IDS]
+AMOUNTS = [(0.0, 0.5, 0.25)[i % 3] for i in USER_IDS]
+
+
+def _columns(**changes):
+    columns = {
+        "weight": list(WEIGHTS),
+        "height": HEIGHTS,
+        "age": AGES,
+        "sex": SEXES,
+        "activity_level": LEVELS,
+        "weight_goal": GOALS,
+        "weight_amount": AMOUNTS,
+    }
+    columns.update(changes)
+    return columns
+
+
+def _expected(i, weight=None, policy=None):
+    return compute(
+        WEIGHTS[i] if weight is None else weight, HEIGHTS[i], AGES[i], SEXES[i], LEVELS[i],
+        WeightGoal(GOALS[i]), AMOUNTS[i], policy=policy,
+    )
+
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = ResultStore(SQLiteBackend(":memory:"))
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_first_update_returns_every_user(self):
+        """Test new users are computed, stored and reported as changes."""
+        changes = self.store.update(USER_IDS, **_columns())
+        self.assertEqual([change.user_id for change in changes], USER_IDS)
+        self.assertTrue(all(change.previous_tdee is None for change in changes))
+        self.assertEqual(len(self.store), len(USER_IDS))
+        for i in (0, 7, 99):
+            expected = _expected(i)
+            self.assertEqual(self.store.get(i), expected)
+            self.assertEqual(changes[i].daily_caloric_needs, expected.daily_caloric_needs)
+
+    def test_unchanged_inputs_are_skipped(self):
+        """Test an identical update recomputes nothing."""
+        self.store.update(USER_IDS, **_columns())
+        self.assertEqual(self.store.update(USER_IDS, **_columns()), [])
+        self.assertEqual(self.store.stats(), StoreStats(len(USER_IDS), len(USER_IDS), 100))
+
+    def test_equivalent_spellings_are_skipped(self):
+        """Test ints for floats, lowercase codes and goal values give the same fingerprint."""
+        self.store.update([1], 70.0, 175.0, 30.0, "M", "MA", WeightGoal.LOSE, 0.5)
+        self.assertEqual(self.store.update([1], 70, 175, 30, "m", "ma", "lose", 0.5), [])
+        self.assertEqual(self.store.stats().skipped, 1)
+
+    def test_only_changed_results_are_returned(self):
+        """Test changed inputs are recomputed, but only moved results are returned."""
+        self.store.update(USER_IDS, **_columns())
+        weights = list(WEIGHTS)
+        weights[3] += 10
+        weights[5] += 0.001  # recomputed, but TDEE and DCN stay the same
+        changes = self.store.update(USER_IDS, **_columns(weight=weights))
+        self.assertEqual([change.user_id for change in changes], [3])
+        self.assertEqual(
+            changes[0].previous_daily_caloric_needs, _expected(3).daily_caloric_needs
+        )
+        self.assertEqual(self.store.stats().computed, len(USER_IDS) + 2)
+        # The quiet change is still written
+        self.assertEqual(self.store.get(5), _expected(5, weight=weights[5]))
+
+    def test_scalar_arguments_broadcast(self):
+        """Test scalar arguments apply to every user."""
+        changes = self.store.update(["a", "b"], [60, 90], 170, 40, "F", "LA", WeightGoal.MAINTAIN)
+        self.assertEqual([change.user_id for change in changes], ["a", "b"])
+        self.assertEqual(
+            self.store.get("b"), compute(90, 170, 40, "F", "LA", WeightGoal.MAINTAIN)
+        )
+
+    def test_invalid_row_rolls_back(self):
+        """Test an invalid row leaves the store unchanged."""
+        self.store.update(USER_IDS, **_columns())
+        weights = list(WEIGHTS)
+        weights[0] += 5
+        levels = list(LEVELS)
+        levels[50] = "XX"
+        with self.assertRaisesRegex(ValueError, "Invalid activity level"):
+            self.store.update(USER_IDS, **_columns(weight=weights, activity_level=levels))
+        self.assertEqual(self.store.get(0), _expected(0))
+        self.assertEqual(self.store.update(USER_IDS, **_columns()), [])
+
+    def test_invalid_numbers_raise_on_both_paths(self):
+        """Test invalid numbers raise whether rows are calculated one by one or batched."""
+        for size in (10, 100):
+            for column, value in (("weight", 0), ("height", -170), ("age", float("nan")),
+                                  ("weight_amount", float("inf"))):
+                with self.subTest(size=size, column=column):
+                    values = list(_columns()[column][:size])
+                    values[size - 1] = value
+                    columns = {name: values[:size] for name, values in _columns().items()}
+                    columns[column] = values
+                    with self.assertRaisesRegex(ValueError, f"for user {size - 1}"):
+                        self.store.update(USER_IDS[:size], **columns)
+                    self.assertEqual(len(self.store), 0)
+
+    def test_policy_change_recomputes_everything(self):
+        """Test a store with another policy treats every fingerprint as stale."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.db")
+            with ResultStore(SQLiteBackend(path)) as store:
+                store.update(USER_IDS, **_columns())
+            policy = DEFAULT_POLICY.replace(minimum_calories={"F": 1600, "M": 1800})
+            with ResultStore(SQLiteBackend(path), policy=policy) as store:
+                changes = store.update(USER_IDS, **_columns())
+                self.assertEqual(store.stats().computed, len(USER_IDS))
+                self.assertTrue(changes)
+                self.assertTrue(all(change.daily_caloric_needs >= 1600 for change in changes))
+                self.assertEqual(store.get(0), _expected(0, policy=policy))
+
+    def test_policy_fingerprint(self):
+        """Test equal policies share a fingerprint and different ones do not."""
+        self.assertEqual(policy_fingerprint(), policy_fingerprint(DEFAULT_POLICY.replace()))
+        harris = DEFAULT_POLICY.replace(bmr_formula="harris_benedict")
+        self.assertNotEqual(policy_fingerprint(), policy_fingerprint(harris))
+
+    def test_body_fat(self):
+        """Test body fat is part of the fingerprint for formulas that need it."""
+        store = ResultStore(
+            SQLiteBackend(":memory:"), policy=DEFAULT_POLICY.replace(bmr_formula="katch_mcardle")
+        )
+        store.update([1], 70, 175, 30, "F", "S", WeightGoal.MAINTAIN, body_fat=20)
+        self.assertEqual(store.get(1).bmr, 1580)
+        changes = store.update([1], 70, 175, 30, "F", "S", WeightGoal.MAINTAIN, body_fat=25)
+        self.assertEqual(changes[0].previous_tdee, 1896)
+        store.close()
+
+    def test_chunking(self):
+        """Test results do not depend on the chunk size."""
+        store = ResultStore(SQLiteBackend(":memory:"), chunk_size=7)
+        changes = store.update(USER_IDS, **_columns())
+        self.assertEqual(changes, self.store.update(USER_IDS, **_columns()))
+        store.close()
+        with self.assertRaises(ValueError):
+            ResultStore(SQLiteBackend(":memory:"), chunk_size=0)
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_numpy_columns(self):
+        """Test NumPy columns give the same results as lists."""
+        expected = self.store.update(USER_IDS, **_columns())
+        store = ResultStore(SQLiteBackend(":memory:"))
+        changes = store.update(
+            np.array(USER_IDS),
+            weight=np.array(WEIGHTS), height=np.array(HEIGHTS), age=np.array(AGES),
+            sex=np.array(SEXES), activity_level=np.array(LEVELS), weight_goal=GOALS,
+            weight_amount=np.array(AMOUNTS),
+        )
+        self.assertEqual(changes, expected)
+        store.close()
+
+    def test_invalid_table_name(self):
+        """Test table names are checked before being used in SQL."""
+        with self.assertRaises(ValueError):
+            SQLiteBackend(":memory:", table="results; DROP TABLE x")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,206 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from unittest import mock
+
+from src.caloric_calculator import DEFAULT_POLICY, RESULT_FIELDS, WeightGoal, compute
+from src.caloric_calculator import stream
+from src.caloric_calculator.cli import main
+from src.caloric_calculator.stream import read_rows, stream_calculate
+
+ROWS = [
+    {"user_id": "1", "weight": "70", "height": "175", "age": "30", "sex": "M",
+     "activity_level": "MA", "weight_goal": "maintain", "weight_amount": "0"},
+    {"user_id": "2", "weight": "68", "height": "165", "age": "28", "sex": "f",
+     "activity_level": "la", "weight_goal": "lose", "weight_amount": "0.5"},
+    {"user_id": "3", "weight": "70", "height": "175", "age": "30", "sex": "X",
+     "activity_level": "MA", "weight_goal": "maintain", "weight_amount": "0"},
+    {"user_id": "4", "weight": "70", "height": "175", "age": "30", "sex": "M",
+     "activity_level": "ZZ", "weight_goal": "lose", "weight_amount": "0.5"},
+    {"user_id": "5", "weight": "100", "height": "175", "age": "40", "sex": "M",
+     "activity_level": "VA", "weight_goal": "GAIN", "weight_amount": "1"},
+    {"user_id": "6", "weight": "70", "height": "175", "age": "30", "sex": "M",
+     "activity_level": "MA", "weight_goal": "shrink", "weight_amount": "0.5"},
+    {"user_id": "7", "weight": "heavy", "height": "175", "age": "30", "sex": "M",
+     "activity_level": "MA", "weight_goal": "lose"},
+]
+
+EXPECTED = {
+    "1": compute(70, 175, 30, "M", "MA", WeightGoal.MAINTAIN, 0),
+    "2": compute(68, 165, 28, "F", "LA", WeightGoal.LOSE, 0.5),
+    "5": compute(100, 175, 40, "M", "VA", WeightGoal.GAIN, 1),
+}
+
+
+class TestStreamCalculate(unittest.TestCase):
+
+    def test_results_and_rejects(self):
+        """Test valid rows are calculated and malformed rows rejected."""
+        for chunk_size in (1, 2, 100):
+            with self.subTest(chunk_size=chunk_size):
+                rejected = []
+                output = list(stream_calculate(
+                    ROWS, chunk_size=chunk_size,
+                    rejects=lambda row, reason: rejected.append(row["user_id"]),
+                ))
+                self.assertEqual([row["user_id"] for row in output], ["1", "2", "5"])
+                for row in output:
+                    expected = EXPECTED[row["user_id"]]
+                    self.assertEqual(
+                        tuple(row[field] for field in RESULT_FIELDS), tuple(expected)
+                    )
+                self.assertEqual(rejected, ["3", "4", "6", "7"])
+
+    def test_units(self):
+        """Test optional unit columns are converted and kJ output is supported."""
+        rows = [
+            {"weight": "154.3", "height": "70", "age": "30", "sex": "M",
+             "activity_level": "MA", "weight_goal": "lose", "weight_amount": "0.5",
+             "weight_unit": "lb", "height_unit": "in"},
+            {"weight": "70", "height": "5.75", "age": "30", "sex": "F",
+             "activity_level": "S", "weight_goal": "maintain", "height_unit": "FT"},
+            {"weight": "70", "height": "175", "age": "30", "sex": "F",
+             "activity_level": "S", "weight_goal": "maintain", "weight_unit": "stone"},
+        ]
+        rejected = []
+        output = list(stream_calculate(
+            rows, energy_unit="kJ", rejects=lambda row, reason: rejected.append(reason)
+        ))
+        self.assertEqual(rejected, ["Invalid weight_unit: 'stone'"])
+        expected = [
+            compute(154.3, 70, 30, "M", "MA", WeightGoal.LOSE, 0.5, weight_unit="lb",
+                    height_unit="in", energy_unit="kJ"),
+            compute(70, 5.75, 30, "F", "S", WeightGoal.MAINTAIN, height_unit="ft",
+                    energy_unit="kJ"),
+        ]
+        for row, result in zip(output, expected):
+            self.assertEqual(tuple(row[field] for field in RESULT_FIELDS), tuple(result))
+
+    def test_invalid_numbers_are_rejected(self):
+        """Test non-finite numbers and zero weights or heights are rejected on both paths."""
+        rows = [dict(ROWS[0], user_id=field + ":" + value, **{field: value}) for field, value in (
+            ("weight", "nan"), ("height", "inf"), ("age", "NaN"), ("weight_amount", "-inf"),
+            ("weight", "0"), ("height", "0"), ("height", "-175"),
+        )] + [ROWS[0]]
+        for batch in (True, False):
+            with self.subTest(batch=batch), mock.patch.object(
+                stream, "calculate_batch", stream.calculate_batch if batch else None
+            ):
+                rejected = []
+                output = list(stream_calculate(
+                    rows, rejects=lambda row, reason: rejected.append((row["user_id"], reason))
+                ))
+                self.assertEqual([row["user_id"] for row in output], ["1"])
+                self.assertEqual(rejected, [
+                    (row["user_id"], "Invalid {}: {!r}".format(*row["user_id"].split(":")))
+                    for row in rows[:-1]
+                ])
+
+    def test_body_fat(self):
+        """Test body fat is read for formulas that need it, and rows without it rejected."""
+        policy = DEFAULT_POLICY.replace(bmr_formula="katch_mcardle")
+        rows = [dict(ROWS[0], body_fat="18"), dict(ROWS[1], body_fat="31.5"),
+                dict(ROWS[4]), dict(ROWS[4], user_id="8", body_fat="100")]
+        expected = [
+            compute(70, 175, 30, "M", "MA", WeightGoal.MAINTAIN, 0, policy=policy, body_fat=18),
+            compute(68, 165, 28, "F", "LA", WeightGoal.LOSE, 0.5, policy=policy,
+                    body_fat=31.5),
+        ]
+        for batch in (True, False):
+            with self.subTest(batch=batch), mock.patch.object(
+                stream, "calculate_batch", stream.calculate_batch if batch else None
+            ):
+                rejected = []
+                output = list(stream_calculate(
+                    rows, policy=policy,
+                    rejects=lambda row, reason: rejected.append((row["user_id"], reason)),
+                ))
+                self.assertEqual([row["user_id"] for row in output], ["1", "2"])
+                for row, result in zip(output, expected):
+                    self.assertEqual(tuple(row[field] for field in RESULT_FIELDS), tuple(result))
+                self.assertEqual(rejected, [
+                    ("5", "Missing body_fat"), ("8", "Invalid body fat percentage: 100.0"),
+                ])
+        # Other formulas ignore the column
+        output = list(stream_calculate([dict(ROWS[0], body_fat="bad")]))
+        self.assertEqual(output[0]["tdee"], EXPECTED["1"].tdee)
+
+    def test_generator_is_lazy(self):
+        """Test rows are only consumed one chunk at a time."""
+        consumed = []
+
+        def rows():
+            for index in range(10):
+                consumed.append(index)
+                yield dict(ROWS[0])
+
+        stream = stream_calculate(rows(), chunk_size=3)
+        next(stream)
+        self.assertEqual(consumed, [0, 1, 2])
+
+    def test_read_jsonl_rejects_bad_lines(self):
+        """Test unparseable JSON lines reach the reject stream."""
+        text = json.dumps(ROWS[0]) + "\nnot json\n\n"
+        rejected = []
+        output = list(stream_calculate(
+            read_rows(io.StringIO(text), "jsonl"),
+            rejects=lambda row, reason: rejected.append(row),
+        ))
+        self.assertEqual(len(output), 1)
+        self.assertEqual(rejected, [{"_line": "not json"}])
+
+
+class TestCommandLine(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.input = os.path.join(self.directory.name, "profiles.csv")
+        with open(self.input, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(ROWS[0]))
+            writer.writeheader()
+            writer.writerows(ROWS)
+
+    def test_csv_to_jsonl_with_rejects(self):
+        """Test the CLI writes scored rows and a reject file."""
+        output = os.path.join(self.directory.name, "scored.jsonl")
+        rejects = os.path.join(self.directory.name, "rejects.jsonl")
+        self.assertEqual(main([self.input, "-o", output, "--rejects", rejects]), 0)
+
+        with open(output) as file:
+            scored = [json.loads(line) for line in file]
+        self.assertEqual([row["user_id"] for row in scored], ["1", "2", "5"])
+        self.assertEqual(
+            scored[1]["daily_caloric_needs"], EXPECTED["2"].daily_caloric_needs
+        )
+
+        with open(rejects) as file:
+            errors = [json.loads(line)["error"] for line in file]
+        self.assertEqual(len(errors), 4)
+        self.assertIn("Invalid sex", errors[0])
+
+    def test_csv_output(self):
+        """Test CSV output keeps input columns and appends results."""
+        output = os.path.join(self.directory.name, "scored.csv")
+        main([self.input, "-o", output, "--chunk-size", "2"])
+        with open(output, newline="") as file:
+            scored = list(csv.DictReader(file))
+        self.assertEqual(list(scored[0])[: len(ROWS[0])], list(ROWS[0]))
+        self.assertEqual(scored[2]["tdee"], str(EXPECTED["5"].tdee))
+
+    def test_energy_unit(self):
+        """Test --energy-unit kJ converts the energy columns."""
+        output = os.path.join(self.directory.name, "scored.jsonl")
+        main([self.input, "-o", output, "--energy-unit", "kJ"])
+        with open(output) as file:
+            scored = [json.loads(line) for line in file]
+        self.assertEqual(scored[0]["tdee"], round(EXPECTED["1"].tdee * 4.184))
+        self.assertEqual(scored[0]["bmi"], EXPECTED["1"].bmi)
+
+
+if __name__ == "__main__":
+    unittest.main()
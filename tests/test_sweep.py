@@ -0,0 +1,154 @@
+import unittest
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the [fast] extra
+    np = None
+
+from src.caloric_calculator import DEFAULT_POLICY, WeightGoal, compute
+from src.caloric_calculator.models import ACTIVITY_LEVELS
+
+if np is not None:
+    from src.caloric_calculator.cohort import BMI_BANDS, bmi_bands
+    from src.caloric_calculator.results import RESULT_FIELDS
+    from src.caloric_calculator.sweep import BMI_BAND, CALORIE_FLOOR, sweep_profile
+
+PROFILE = {
+    "weight": 80,
+    "height": 165,
+    "age": 50,
+    "sex": "F",
+    "activity_level": "VA",
+    "weight_goal": WeightGoal.LOSE,
+    "weight_amount": 1.0,
+}
+
+
+def _calculate(**changes):
+    profile = dict(PROFILE)
+    profile.update(changes)
+    return compute(**profile)
+
+
+def _floor_applies(result, sex):
+    """Whether the default calorie floor raised the result's daily caloric needs."""
+    minimum = DEFAULT_POLICY.minimum_calories[sex]
+    return result.daily_caloric_needs == minimum and result.tdee - 1000 < minimum
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestSweepProfile(unittest.TestCase):
+
+    def test_one_axis_matches_compute(self):
+        """Test every point of a one-input sweep equals compute()."""
+        weights = np.arange(40, 150.5, 2.5)
+        sweep = sweep_profile(PROFILE, weight=weights)
+        np.testing.assert_array_equal(sweep.axes["weight"], weights)
+        for i, weight in enumerate(weights):
+            expected = _calculate(weight=weight)
+            for field in RESULT_FIELDS:
+                self.assertEqual(sweep.results[field][i], getattr(expected, field))
+
+    def test_two_axes_match_compute(self):
+        """Test a numeric by categorical grid equals compute() point by point."""
+        ages = range(20, 90, 10)
+        goals = [WeightGoal.MAINTAIN, "lose", WeightGoal.GAIN]
+        sweep = sweep_profile(dict(PROFILE, weight_amount=0.5), age=ages, weight_goal=goals)
+        self.assertEqual(sweep.results["daily_caloric_needs"].shape, (7, 3))
+        for i, age in enumerate(ages):
+            for j, goal in enumerate(goals):
+                expected = _calculate(age=age, weight_goal=WeightGoal(goal), weight_amount=0.5)
+                self.assertEqual(sweep.results["daily_caloric_needs"][i, j],
+                                 expected.daily_caloric_needs)
+
+    def test_grid_discontinuities(self):
+        """Test band and floor changes are reported between grid points."""
+        weights = np.arange(40, 150.5, 5.0)
+        sweep = sweep_profile(PROFILE, weight=weights)
+        bands = bmi_bands(sweep.results["bmi"])
+        expected = [
+            (i, BMI_BANDS[bands[i]], BMI_BANDS[bands[i + 1]])
+            for i in range(len(weights) - 1) if bands[i] != bands[i + 1]
+        ]
+        found = [
+            (jump.index[0], jump.before, jump.after)
+            for jump in sweep.discontinuities if jump.kind == BMI_BAND
+        ]
+        self.assertEqual(found, expected)
+        floors = [jump for jump in sweep.discontinuities if jump.kind == CALORIE_FLOOR]
+        self.assertEqual(len(floors), 1)
+        jump = floors[0]
+        low, high = jump.interval
+        self.assertEqual((low, high), tuple(weights[jump.index[0]:jump.index[0] + 2]))
+        self.assertEqual((jump.before, jump.after), (True, False))
+        self.assertTrue(_floor_applies(_calculate(weight=low), "F"))
+        self.assertFalse(_floor_applies(_calculate(weight=high), "F"))
+
+    def test_refined_discontinuities(self):
+        """Test a tolerance narrows each change, including several within one step."""
+        sweep = sweep_profile(PROFILE, weight=range(40, 151, 5), tolerance=0.01)
+        bands = [jump for jump in sweep.discontinuities if jump.kind == BMI_BAND]
+        # Between 65 and 70 kg the BMI passes through the 24.9-25 gap, which
+        # the calculator treats like obesity
+        self.assertEqual(
+            [(jump.before, jump.after) for jump in bands],
+            [("underweight", "normal"), ("normal", "obese"), ("obese", "overweight"),
+             ("overweight", "obese")],
+        )
+        for jump in sweep.discontinuities:
+            low, high = jump.interval
+            self.assertLessEqual(high - low, 0.01)
+            before, after = _calculate(weight=low), _calculate(weight=high)
+            self.assertEqual(jump.daily_caloric_needs,
+                             (before.daily_caloric_needs, after.daily_caloric_needs))
+            if jump.kind == BMI_BAND:
+                self.assertEqual(BMI_BANDS[bmi_bands(np.array([before.bmi]))[0]], jump.before)
+                self.assertEqual(BMI_BANDS[bmi_bands(np.array([after.bmi]))[0]], jump.after)
+            else:
+                self.assertEqual(_floor_applies(before, "F"), jump.before)
+                self.assertEqual(_floor_applies(after, "F"), jump.after)
+
+    def test_two_axis_discontinuities(self):
+        """Test changes along a numeric axis are reported per categorical column."""
+        sweep = sweep_profile(
+            PROFILE, weight=range(40, 151, 5), activity_level=ACTIVITY_LEVELS
+        )
+        floors = [jump for jump in sweep.discontinuities if jump.kind == CALORIE_FLOOR]
+        self.assertTrue(floors)
+        for jump in floors:
+            self.assertEqual(jump.dimension, "weight")
+            row, column = jump.index
+            dcn = sweep.results["daily_caloric_needs"][:, column]
+            self.assertEqual(jump.daily_caloric_needs, (dcn[row], dcn[row + 1]))
+        # Categorical axes have no order, so nothing is reported along them
+        self.assertFalse(any(jump.dimension == "activity_level" for jump in sweep.discontinuities))
+
+    def test_policy(self):
+        """Test the profile's policy, or the policy argument, is used."""
+        policy = DEFAULT_POLICY.replace(bmr_formula="harris_benedict")
+        profile = dict(PROFILE, policy=policy)
+        sweep = sweep_profile(profile, height=[160, 170])
+        self.assertEqual(sweep.results["bmr"][1], _calculate(height=170, policy=policy).bmr)
+        sweep = sweep_profile(PROFILE, policy=policy, height=[160, 170])
+        self.assertEqual(sweep.results["bmr"][0], _calculate(height=160, policy=policy).bmr)
+
+    def test_invalid_arguments(self):
+        """Test invalid axes and profiles raise ValueError."""
+        with self.assertRaises(ValueError):
+            sweep_profile(PROFILE)
+        with self.assertRaises(ValueError):
+            sweep_profile(PROFILE, weight=[70], height=[170], age=[30])
+        with self.assertRaises(ValueError):
+            sweep_profile(PROFILE, bmi=[20, 25])
+        with self.assertRaises(ValueError):
+            sweep_profile(PROFILE, weight=[])
+        with self.assertRaises(ValueError):
+            sweep_profile({"weight": 70}, height=[170, 180])
+        with self.assertRaises(ValueError):
+            sweep_profile(dict(PROFILE, unknown=1), weight=[70])
+        with self.assertRaisesRegex(ValueError, "Invalid activity level"):
+            sweep_profile(PROFILE, activity_level=["S", "XX"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+import os
+import tempfile
+import unittest
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the [fast] extra
+    np = None
+
+from src.caloric_calculator import DEFAULT_POLICY
+from src.caloric_calculator.models import ACTIVITY_LEVELS, SEXES, WEIGHT_GOALS
+
+if np is not None:
+    from src.caloric_calculator.batch import calculate_batch
+    from src.caloric_calculator.cohort import BMI_BANDS, bmi_bands
+    from src.caloric_calculator.grid import GridIndex, build_grid
+    from src.caloric_calculator.synthetic import (
+        COLUMNS,
+        differential_check,
+        generate_population,
+    )
+    from src.caloric_calculator.validation import UNSUPPORTED_WEIGHT_AMOUNT, validate_batch
+
+
+def _concatenate(chunks):
+    chunks = list(chunks)
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in COLUMNS}
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestGeneratePopulation(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.population = _concatenate(generate_population(100000, seed=1))
+        cls.results = calculate_batch(**cls.population)
+
+    def test_deterministic_across_chunk_sizes(self):
+        """Test equal seeds give equal rows however the population is chunked."""
+        chunks = list(generate_population(150000, seed=7, chunk_size=40000))
+        self.assertEqual([len(chunk["weight"]) for chunk in chunks], [40000] * 3 + [30000])
+        whole = _concatenate(generate_population(150000, seed=7, chunk_size=150000))
+        for name in COLUMNS:
+            np.testing.assert_array_equal(_concatenate(chunks)[name], whole[name])
+        other = next(generate_population(1000, seed=8))
+        self.assertFalse((other["weight"] == whole["weight"][:1000]).all())
+        self.assertEqual(list(generate_population(0)), [])
+
+    def test_coverage(self):
+        """Test every category, BMI band and band gap is generated."""
+        population = self.population
+        self.assertEqual(set(population["sex"]), set(SEXES))
+        self.assertEqual(set(population["activity_level"]), set(ACTIVITY_LEVELS))
+        self.assertEqual(set(population["weight_goal"]), {goal.value for goal in WEIGHT_GOALS})
+        bmi = self.results["bmi"]
+        self.assertEqual(set(bmi_bands(bmi)), set(range(len(BMI_BANDS))))
+        self.assertTrue(((bmi > 24.9) & (bmi < 25)).any())
+        self.assertTrue(((bmi > 29.9) & (bmi < 30)).any())
+        np.testing.assert_array_equal(population["weight"], population["weight"].round(1))
+        np.testing.assert_array_equal(population["height"], population["height"].round())
+
+    def test_invalid_amounts(self):
+        """Test the share of weekly amounts that are not policy steps."""
+        report = validate_batch(**self.population)
+        unsupported = (report.errors & UNSUPPORTED_WEIGHT_AMOUNT) != 0
+        self.assertTrue(0.03 < unsupported.mean() < 0.07)
+        self.assertFalse(report.errors[~unsupported].any())
+        self.assertTrue((report.errors[unsupported] == UNSUPPORTED_WEIGHT_AMOUNT).all())
+        none = _concatenate(generate_population(20000, invalid_amount_rate=0.0))
+        report = validate_batch(**none)
+        self.assertTrue(report.valid.all())
+
+    def test_invalid_arguments(self):
+        """Test invalid sizes and rates raise ValueError."""
+        for arguments in ({"size": -1}, {"size": 10, "chunk_size": 0},
+                          {"size": 10, "invalid_amount_rate": 1.5}):
+            with self.assertRaises(ValueError):
+                next(generate_population(**arguments))
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestDifferentialCheck(unittest.TestCase):
+
+    def test_fast_paths_match_reference(self):
+        """Test the batch, cached and parallel paths agree with the calculator."""
+        report = differential_check(
+            generate_population(6000, seed=3, chunk_size=2500),
+            paths=("batch", "cached", "parallel"),
+        )
+        self.assertEqual(report.rows, 6000)
+        self.assertEqual(report.mismatches, {"batch": 0, "cached": 0, "parallel": 0})
+        self.assertEqual(report.examples, [])
+
+    def test_grid_path(self):
+        """Test grid lookups, on and off the grid, agree with the calculator."""
+        policy = DEFAULT_POLICY.replace(minimum_calories={"F": 1400, "M": 1600})
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "population.grid")
+            build_grid(path, weight_range=(40.0, 120.0), height_range=(150, 195),
+                       age_range=(18, 70), policy=policy, validate=100)
+            with GridIndex(path) as index:
+                report = differential_check(
+                    generate_population(5000, seed=4), paths=("grid",), policy=policy,
+                    grid=index,
+                )
+        self.assertEqual(report.mismatches, {"grid": 0})
+
+    def test_policy(self):
+        """Test the reference and built-in paths use the given policy."""
+        policy = DEFAULT_POLICY.replace(bmr_formula="katch_mcardle")
+        report = differential_check(
+            generate_population(2000, seed=5), paths=("batch", "cached"), policy=policy
+        )
+        self.assertEqual(report.mismatches, {"batch": 0, "cached": 0})
+        report = differential_check(
+            generate_population(2000, seed=5),
+            paths={"default": lambda chunk: calculate_batch(**chunk)}, policy=policy,
+        )
+        self.assertGreater(report.mismatches["default"], 0)
+
+    def test_mismatches_are_reported(self):
+        """Test a differing path is counted and its first rows kept as examples."""
+        def off_by_one(chunk):
+            results = calculate_batch(**chunk)
+            return {"tdee": results["tdee"] + (chunk["age"] >= 60)}
+
+        chunks = list(generate_population(3000, seed=6, chunk_size=1000))
+        report = differential_check(chunks, paths={"broken": off_by_one}, max_examples=4)
+        older = _concatenate(chunks)["age"] >= 60
+        self.assertEqual(report.mismatches["broken"], older.sum())
+        self.assertEqual(len(report.examples), 4)
+        for example in report.examples:
+            self.assertTrue(older[example.row])
+            self.assertEqual((example.path, example.field), ("broken", "tdee"))
+            self.assertEqual(example.actual, example.expected + 1)
+            self.assertGreaterEqual(example.inputs["age"], 60)
+
+    def test_invalid_paths(self):
+        """Test unknown paths, and the grid path without an index, raise ValueError."""
+        with self.assertRaises(ValueError):
+            differential_check(generate_population(10), paths=("vectorized",))
+        with self.assertRaisesRegex(ValueError, "GridIndex"):
+            differential_check(generate_population(10), paths=("grid",))
+
+
+if __name__ == "__main__":
+    unittest.main()
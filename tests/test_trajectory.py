@@ -0,0 +1,123 @@
+import unittest
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the [fast] extra
+    np = None
+
+from src.caloric_calculator import RESULT_FIELDS, WeightGoal, compute
+from src.caloric_calculator.trajectory import project_trajectories, project_trajectory
+
+PROFILES = [
+    # Obese male losing weight: crosses from adjusted to ideal to actual weight
+    dict(weight=95, height=170, age=45, sex="M", activity_level="S",
+         weight_goal=WeightGoal.LOSE, weight_amount=1.0),
+    # Light female losing weight: runs into the 1300 kcal floor
+    dict(weight=52, height=160, age=35, sex="F", activity_level="S",
+         weight_goal=WeightGoal.LOSE, weight_amount=0.5),
+    dict(weight=60, height=180, age=25, sex="M", activity_level="VA",
+         weight_goal=WeightGoal.GAIN, weight_amount=0.5),
+    dict(weight=70, height=175, age=30, sex="M", activity_level="MA",
+         weight_goal=WeightGoal.MAINTAIN, weight_amount=0.0),
+]
+
+
+def fresh(profile, weight, **changes):
+    return compute(**dict(profile, weight=weight, **changes))
+
+
+class TestProjectTrajectory(unittest.TestCase):
+
+    def test_matches_fresh_calculator_each_week(self):
+        """Test every week equals a calculator built at the projected weight."""
+        for profile in PROFILES:
+            with self.subTest(profile=profile):
+                trajectory = project_trajectory(profile, weeks=30)
+                self.assertEqual(len(trajectory.weight), 31)
+                self.assertEqual(len(trajectory.results), 31)
+                for weight, result in zip(trajectory.weight, trajectory.results):
+                    self.assertEqual(result, fresh(profile, weight))
+
+    def test_bmi_band_transitions(self):
+        """Test the recommended weight switches bands as weight drops."""
+        trajectory = project_trajectory(PROFILES[0], weeks=30)
+        results = trajectory.results
+        bands = []
+        for result in results:
+            if result.recommended_weight == result.adjusted_weight:
+                band = "adjusted"
+            elif result.recommended_weight == result.ideal_weight:
+                band = "ideal"
+            else:
+                band = "actual"
+            if not bands or bands[-1] != band:
+                bands.append(band)
+        self.assertEqual(bands, ["adjusted", "ideal", "adjusted", "actual"])
+
+    def test_floor_is_applied(self):
+        """Test the minimum calorie floor holds as weight falls."""
+        trajectory = project_trajectory(PROFILES[1], weeks=10)
+        self.assertEqual(set(trajectory.results.column("daily_caloric_needs")), {1300})
+
+    def test_target_weight_switches_to_maintenance(self):
+        """Test weight stops at the target and the goal becomes maintenance."""
+        trajectory = project_trajectory(PROFILES[0], weeks=10, target_weight=88.5)
+        self.assertEqual(trajectory.weight[-4:], (88.5,) * 4)
+        self.assertEqual(trajectory.weight[6], 89.0)
+        self.assertEqual(
+            trajectory.results[-1],
+            fresh(PROFILES[0], 88.5, weight_goal=WeightGoal.MAINTAIN, weight_amount=0),
+        )
+
+    def test_explicit_weekly_change(self):
+        """Test an explicit weekly change overrides the goal amount."""
+        trajectory = project_trajectory(PROFILES[3], weeks=4, weekly_change=-0.25)
+        self.assertEqual(trajectory.weight, (70.0, 69.75, 69.5, 69.25, 69.0))
+
+    def test_negative_weeks(self):
+        """Test a negative week count raises ValueError."""
+        with self.assertRaises(ValueError):
+            project_trajectory(PROFILES[0], weeks=-1)
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestProjectTrajectories(unittest.TestCase):
+
+    def columns(self):
+        return {
+            field: [profile[field] for profile in PROFILES] for field in PROFILES[0]
+        }
+
+    def test_matches_scalar_projection(self):
+        """Test the batched projection equals the scalar one row by row."""
+        targets = [88.5, np.nan, 63.0, 70.0]
+        trajectories = project_trajectories(
+            **self.columns(), weeks=20, target_weight=targets
+        )
+        self.assertEqual(trajectories["bmr"].shape, (len(PROFILES), 21))
+        for row, profile in enumerate(PROFILES):
+            target = None if np.isnan(targets[row]) else targets[row]
+            expected = project_trajectory(profile, weeks=20, target_weight=target)
+            self.assertEqual(trajectories["weight"][row].tolist(), list(expected.weight))
+            for field in RESULT_FIELDS:
+                self.assertEqual(
+                    trajectories[field][row].tolist(),
+                    expected.results.column(field).tolist(),
+                    field,
+                )
+
+    def test_scalar_weekly_change(self):
+        """Test a scalar weekly change applies to every profile."""
+        trajectories = project_trajectories(**self.columns(), weeks=2, weekly_change=0.5)
+        self.assertEqual(trajectories["weight"][:, 2].tolist(), [96.0, 53.0, 61.0, 71.0])
+
+    def test_invalid_row(self):
+        """Test an invalid row raises ValueError."""
+        columns = self.columns()
+        columns["activity_level"] = ["S", "S", "ZZ", "MA"]
+        with self.assertRaises(ValueError):
+            project_trajectories(**columns, weeks=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import itertools
+import unittest
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the [fast] extra
+    np = None
+
+from src.caloric_calculator import CaloricCalculator, WeightGoal, compute
+from src.caloric_calculator.units import (
+    feet_and_inches,
+    to_centimeters,
+    to_energy_unit,
+    to_kilograms,
+)
+
+if np is not None:
+    from src.caloric_calculator.batch import calculate_batch
+
+# (weight, weight unit, height, height unit) spellings of the same profiles
+PROFILES = [
+    (180, "lb", 70, "in"),
+    (81.6, "kg", feet_and_inches(5, 10), "in"),
+    (154.3, "LB", 6, "ft"),
+    (220.5, "lb", 5.5, "ft"),
+    (63.5, "kg", 162.5, "cm"),
+    (121, "lb", 61, "in"),
+]
+
+
+class TestUnitConversions(unittest.TestCase):
+
+    def test_converters(self):
+        """Test unit conversions and that metric values pass through unchanged."""
+        self.assertEqual(to_kilograms(100, "lb"), 45.359237)
+        self.assertIs(to_kilograms(70), 70)
+        self.assertEqual(to_centimeters(70, "in"), 177.8)
+        self.assertEqual(to_centimeters(6, "FT"), 182.88)
+        self.assertIs(to_centimeters(175), 175)
+        self.assertEqual(feet_and_inches(5, 10), 70)
+        self.assertEqual(to_energy_unit(2000, "kJ"), 8368)
+        self.assertEqual(to_energy_unit(2000), 2000)
+        for convert in (to_kilograms, to_centimeters, to_energy_unit):
+            with self.assertRaisesRegex(ValueError, "unit"):
+                convert(1, "stone")
+
+    def test_compute_matches_converted_inputs(self):
+        """Test imperial inputs give the results of converting them first."""
+        for weight, weight_unit, height, height_unit in PROFILES:
+            for goal, amount in ((WeightGoal.MAINTAIN, 0.0), (WeightGoal.LOSE, 1.0)):
+                with self.subTest(weight=weight, height=height, goal=goal):
+                    expected = compute(
+                        to_kilograms(weight, weight_unit), to_centimeters(height, height_unit),
+                        35, "F", "LA", goal, amount,
+                    )
+                    self.assertEqual(
+                        compute(weight, height, 35, "F", "LA", goal, amount,
+                                weight_unit=weight_unit, height_unit=height_unit),
+                        expected,
+                    )
+
+    def test_calculator_stores_metric_inputs(self):
+        """Test the calculator converts its inputs once, at construction."""
+        calculator = CaloricCalculator(
+            180, 70, 30, "M", "MA", WeightGoal.MAINTAIN, weight_unit="lb", height_unit="in"
+        )
+        self.assertEqual(calculator.weight, 180 * 0.45359237)
+        self.assertEqual(calculator.height, 177.8)
+        self.assertEqual(calculator.bmi, 25.83)
+
+    def test_energy_unit(self):
+        """Test kJ output converts only the energy fields."""
+        kcal = compute(70, 175, 30, "M", "MA", WeightGoal.LOSE, 0.5)
+        kj = compute(70, 175, 30, "M", "MA", WeightGoal.LOSE, 0.5, energy_unit="kJ")
+        self.assertEqual(kj.bmi, kcal.bmi)
+        self.assertEqual(kj.recommended_weight, kcal.recommended_weight)
+        for field in ("bmr", "tdee", "daily_caloric_needs"):
+            self.assertEqual(getattr(kj, field), round(getattr(kcal, field) * 4.184))
+        calculator = CaloricCalculator(70, 175, 30, "M", "MA", WeightGoal.LOSE, 0.5)
+        self.assertEqual(calculator.result("kj"), kj)
+        self.assertEqual(calculator.result(), kcal)
+        with self.assertRaises(ValueError):
+            calculator.result("cal")
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestBatchUnits(unittest.TestCase):
+
+    def test_mixed_units_match_scalar(self):
+        """Test per-row units give the scalar results, in kcal and kJ."""
+        rows = [
+            profile + (age, sex, goal, amount)
+            for profile, age, sex, (goal, amount) in itertools.product(
+                PROFILES, (25, 60), ("M", "f"),
+                ((WeightGoal.MAINTAIN, 0.0), (WeightGoal.LOSE, 0.5), (WeightGoal.GAIN, 1.0)),
+            )
+        ]
+        weight, weight_unit, height, height_unit, age, sex, goal, amount = zip(*rows)
+        for energy_unit in ("kcal", "kJ"):
+            results = calculate_batch(
+                weight, height, age, sex, "VA", goal, amount,
+                weight_unit=list(weight_unit), height_unit=np.array(height_unit),
+                energy_unit=energy_unit,
+            )
+            for i, row in enumerate(rows):
+                expected = compute(
+                    row[0], row[2], row[4], row[5], "VA", row[6], row[7],
+                    weight_unit=row[1], height_unit=row[3], energy_unit=energy_unit,
+                )
+                self.assertEqual(tuple(results[field][i] for field in expected._fields),
+                                 tuple(expected))
+
+    def test_unit_codes_and_scalars(self):
+        """Test unit codes and a single unit for all rows."""
+        weights, heights = [150.0, 200.0], [65.0, 72.0]
+        by_name = calculate_batch(weights, heights, 40, "M", "S", "maintain",
+                                  weight_unit="lb", height_unit="in")
+        by_code = calculate_batch(weights, heights, 40, "M", "S", "maintain",
+                                  weight_unit=np.array([1, 1]), height_unit=np.array([1, 1]))
+        for field in by_name:
+            np.testing.assert_array_equal(by_name[field], by_code[field])
+        self.assertEqual(by_name["tdee"].dtype, np.int64)
+
+    def test_invalid_units(self):
+        """Test unknown units raise ValueError."""
+        with self.assertRaisesRegex(ValueError, "Invalid weight unit"):
+            calculate_batch([70, 80], 175, 30, "M", "S", "maintain", weight_unit=["kg", "st"])
+        with self.assertRaisesRegex(ValueError, "Invalid height unit"):
+            calculate_batch([70, 80], 175, 30, "M", "S", "maintain", height_unit="m")
+        with self.assertRaisesRegex(ValueError, "Invalid energy unit"):
+            calculate_batch([70, 80], 175, 30, "M", "S", "maintain", energy_unit="cal")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+import unittest
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without the [fast] extra
+    np = None
+
+from src.caloric_calculator import DEFAULT_POLICY, WeightGoal, compute
+
+if np is not None:
+    from src.caloric_calculator.batch import calculate_batch
+    from src.caloric_calculator.validation import (
+        INVALID_ACTIVITY_LEVEL,
+        INVALID_AGE,
+        INVALID_HEIGHT,
+        INVALID_SEX,
+        INVALID_WEIGHT,
+        INVALID_WEIGHT_GOAL,
+        UNSUPPORTED_WEIGHT_AMOUNT,
+        error_names,
+        summarize,
+        validate_batch,
+    )
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class TestValidateBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.weight = [70, 10, 80, float("nan"), 70, 68]
+        self.height = [175, 175, 300, 175, 175, 165]
+        self.age = [30, 30, 30, 30, 10, 28]
+        self.sex = ["M", "X", "f", None, "M", "F"]
+        self.activity = ["MA", "ZZ", "MA", "la", "S", "LA"]
+        self.goal = ["lose", "lose", "gain", "shrink", "maintain", WeightGoal.LOSE]
+        self.amount = [0.5, 0.3, 1.0, 0.0, 0.33, 0.5]
+
+    def validate(self, **kwargs):
+        return validate_batch(
+            self.weight, self.height, self.age, self.sex, self.activity,
+            self.goal, self.amount, **kwargs,
+        )
+
+    def test_error_codes(self):
+        """Test every failed check sets its bit on the row."""
+        report = self.validate()
+        self.assertEqual(report.valid.tolist(), [True, False, False, False, False, True])
+        self.assertEqual(report.errors.tolist(), [
+            0,
+            INVALID_WEIGHT | INVALID_SEX | INVALID_ACTIVITY_LEVEL | UNSUPPORTED_WEIGHT_AMOUNT,
+            INVALID_HEIGHT,
+            INVALID_WEIGHT | INVALID_SEX | INVALID_WEIGHT_GOAL,
+            INVALID_AGE,
+            0,
+        ])
+        self.assertEqual(error_names(report.errors[4]), ["INVALID_AGE"])
+        self.assertEqual(
+            summarize(report.errors),
+            {"INVALID_WEIGHT": 2, "INVALID_HEIGHT": 1, "INVALID_AGE": 1, "INVALID_SEX": 2,
+             "INVALID_ACTIVITY_LEVEL": 1, "INVALID_WEIGHT_GOAL": 1,
+             "UNSUPPORTED_WEIGHT_AMOUNT": 1},
+        )
+
+    def test_limits_and_policy(self):
+        """Test custom limits and policy tables change what is allowed."""
+        policy = DEFAULT_POLICY.replace(weight_gain_adjustments={1.5: 1500})
+        report = self.validate(limits={"age": (5, 120)}, policy=policy)
+        self.assertEqual(report.errors[4], 0)
+        self.assertEqual(report.errors[2], INVALID_HEIGHT | UNSUPPORTED_WEIGHT_AMOUNT)
+
+        policy = DEFAULT_POLICY.replace(
+            activity_factors={"S": 1.2, "LA": 1.375, "VA": 1.725, "SA": 1.9}
+        )
+        self.assertEqual(self.validate(policy=policy).errors[0], INVALID_ACTIVITY_LEVEL)
+
+    def test_select_feeds_calculate_batch(self):
+        """Test valid rows go straight into the batch engine."""
+        report = self.validate()
+        results = calculate_batch(
+            *report.select(self.weight, self.height, self.age, self.amount)
+        )
+        self.assertEqual(results["daily_caloric_needs"].tolist(), [
+            compute(70, 175, 30, "M", "MA", WeightGoal.LOSE, 0.5).daily_caloric_needs,
+            compute(68, 165, 28, "F", "LA", WeightGoal.LOSE, 0.5).daily_caloric_needs,
+        ])
+
+    def test_select_body_fat(self):
+        """Test the body fat column is filtered with the other columns."""
+        policy = DEFAULT_POLICY.replace(bmr_formula="katch_mcardle")
+        body_fat = [20, 25, 30, 35, 40, 31.5]
+        report = self.validate(policy=policy, body_fat=body_fat)
+        *columns, selected = report.select(
+            self.weight, self.height, self.age, self.amount, body_fat=body_fat
+        )
+        self.assertEqual(selected.tolist(), [20, 31.5])
+        results = calculate_batch(*columns, policy=policy, body_fat=selected)
+        self.assertEqual(results["bmr"].tolist(), [
+            compute(70, 175, 30, "M", "MA", WeightGoal.LOSE, 0.5, policy=policy,
+                    body_fat=20).bmr,
+            compute(68, 165, 28, "F", "LA", WeightGoal.LOSE, 0.5, policy=policy,
+                    body_fat=31.5).bmr,
+        ])
+        self.assertEqual(len(report.select(self.weight, self.height, self.age)), 7)
+
+    def test_many_distinct_invalid_values(self):
+        """Test columns with many distinct invalid values are coded row by row."""
+        size = 3000
+        sex = np.array(["M", "f"] * (size // 2), dtype=object)
+        sex[::3] = [f"junk{row}" for row in range(0, size, 3)]
+        sex[1] = float("nan")
+        report = validate_batch(70, 175, 30, sex, "MA", "maintain")
+        expected = np.where(np.arange(size) % 2, 1, 0)
+        expected[::3] = -1
+        expected[1] = -1
+        np.testing.assert_array_equal(report.sex, expected)
+        self.assertEqual(report.valid.sum(), (expected >= 0).sum())
+        with self.assertRaises(ValueError):
+            calculate_batch(70, 175, 30, sex, "MA", "maintain")
+        np.testing.assert_array_equal(
+            calculate_batch(70, 175, 30, sex[report.valid], "MA", "maintain")["bmr"],
+            np.where(expected[report.valid] == 0, 1649, 1483),
+        )
+
+    def test_valid_rows_always_calculate(self):
+        """Test rows calculate_batch rejects are flagged, even with permissive limits."""
+        nan, inf = float("nan"), float("inf")
+        weight = [70, 70, 0, -70, 70, 70, 70, 70]
+        height = [175, 175, 175, 175, inf, 175, 175, 175]
+        age = [30, 30, 30, 30, 30, nan, 30, 30]
+        goal = ["maintain", "maintain", "lose", "lose", "lose", "lose", "gain", "lose"]
+        amount = [0.0, nan, 0.5, 0.5, 0.5, 0.5, inf, -inf]
+        limits = {name: (-inf, inf) for name in ("weight", "height", "age")}
+        report = validate_batch(weight, height, age, "M", "MA", goal, amount, limits=limits)
+        self.assertEqual(report.errors.tolist(), [
+            0, UNSUPPORTED_WEIGHT_AMOUNT, INVALID_WEIGHT, INVALID_WEIGHT, INVALID_HEIGHT,
+            INVALID_AGE, UNSUPPORTED_WEIGHT_AMOUNT, UNSUPPORTED_WEIGHT_AMOUNT,
+        ])
+        results = calculate_batch(*report.select(weight, height, age, amount))
+        self.assertEqual(results["daily_caloric_needs"].tolist(), [
+            compute(70, 175, 30, "M", "MA", WeightGoal.MAINTAIN, 0.0).daily_caloric_needs,
+        ])
+
+    def test_units(self):
+        """Test limits apply in kg and cm and select returns kg and cm columns."""
+        weight = [154.32, 30, 1000]
+        height = [68.9, 68.9, 68.9]
+        report = validate_batch(
+            weight, height, 30, "M", "MA", "maintain", weight_unit="lb", height_unit="in"
+        )
+        self.assertEqual(report.errors.tolist(), [0, INVALID_WEIGHT, INVALID_WEIGHT])
+        results = calculate_batch(*report.select(weight, height, 30))
+        expected = calculate_batch(
+            weight[0], height[0], 30, "M", "MA", "maintain", weight_unit="lb", height_unit="in"
+        )
+        self.assertEqual(results["bmr"].tolist(), expected["bmr"].tolist())
+        report = validate_batch(
+            [70, 154.32], [175, 5.74], 30, "M", "MA", "maintain",
+            weight_unit=["kg", "LB"], height_unit=["cm", "ft"],
+        )
+        self.assertEqual(report.valid.tolist(), [True, True])
+        with self.assertRaises(ValueError):
+            validate_batch(70, 175, 30, "M", "MA", "maintain", weight_unit="st")
+
+    def test_integer_codes(self):
+        """Test pre-encoded columns are range checked without raising."""
+        report = validate_batch(
+            [70, 70], 175, 30, np.array([0, 5]), np.array([2, 2]), np.array([0, -1])
+        )
+        self.assertEqual(report.errors.tolist(), [0, INVALID_SEX | INVALID_WEIGHT_GOAL])
+
+
+if __name__ == "__main__":
+    unittest.main()